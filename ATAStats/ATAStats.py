@@ -13,24 +13,45 @@
 import pdb
 import os
 import glob
+import fnmatch
 import argparse 
 import sys
 import getpass
 import re
 import math
 import shutil
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.AerocomFileName import ParseFileName
+from helpers.DurationDB import DurationDB, DefaultDBFile
+
+#time stamps written to the head of a runlog, e.g. by date or date --iso-8601=seconds
+#Thu Mar 15 10:11:12 CET 2018
+#2018-03-15T10:11:12+0100
+DateRegexp=re.compile(r'(?P<Date>(Mon|Tue|Wed|Thu|Fri|Sat|Sun) +(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d+ +\d\d:\d\d:\d\d)( +[A-Z]+)? +(?P<Year>\d{4})')
+IsoDateRegexp=re.compile(r'(?P<Date>\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d)(?P<Zone>[+-]\d\d:?\d\d|Z)?')
+## of lines at the head of a runlog searched for the start time
+HeaderLines=50
+DefaultRunLogDir='/lustre/storeA/project/aerocom/logs/runlog'
+#the lines of a runlog ATAStats looks at, found with a single search per line
+RunLogPattern=re.compile(rb'aerocom_main_|ABOUT TO READ MODELS|Searched:|Reading file:|CHECK:|mean original value|% Execution halted')
+## of lines at the end of a runlog read to check for success
+TailLines=10
+## of processes reading the runlogs
+DefaultJobs=1
 
 def ATAStats(RunLogDir, MoveSuccessLogs=False, DeleteSuccessLogs=False, DoNothingFlag=False, VerboseFlag=False, 
-	AllUserFlag=False, DebugFlag=False):
+	AllUserFlag=False, DebugFlag=False, Jobs=DefaultJobs):
 	#procedure to analyse the log files of the idl aerocom tools
+	#the logs are read by Jobs processes; the results are the same as with a single one
 	# get a list of files
 	if os.path.isdir(RunLogDir):
 		OutData={}
 		VarOutData={}
 		ModelOutData={}
-		i_ModelPos=1
-		i_ModelYearPos=3
-		i_DataYearPos=5
 		SuccessDir=os.path.join(RunLogDir,'success')
 		try:
 			os.mkdir(SuccessDir)
@@ -40,99 +61,25 @@ def ATAStats(RunLogDir, MoveSuccessLogs=False, DeleteSuccessLogs=False, DoNothin
 			logfiles=glob.glob(os.path.join(RunLogDir,'*'+getpass.getuser()+'_aerocom-tools*.log'))
 		else:
 			logfiles=glob.glob(os.path.join(RunLogDir,'*_aerocom-tools*.log'))
-		for logfile in logfiles:
+		#the results are merged in the order of logfiles
+		SuccessLogs=[]
+		for logfile, LogData in zip(logfiles, MapRunLogs(logfiles, Jobs=Jobs)):
 			#Leave out size 0 files
-			if os.path.getsize(logfile) == 0:
+			if LogData is None:
 				if VerboseFlag is True:
 					sys.stderr.write(logfile+' has zero length. Skipping\n')
 				continue
 			LogName=os.path.basename(logfile)
-			OutData[LogName]={}
-			OutData[LogName]['File']=logfile
 			if VerboseFlag is True:
-				sys.stderr.write('reading: '+logfile+'\n')
-			with open(logfile, 'rt') as InFile:
-				FileData=InFile.readlines()
-			#pdb.set_trace()
-			#now start the analysis and put the data into the OutData dict
-			#line 10 is written to the log even when idl failed to start
-			#so we should be able to rely on it
-			#UNFORTUNATELY this is not the case
-			for line in FileData:
-				if 'aerocom_main_' in line:
-					c_DummyArr=line.split("'")
-					break
-
-			try:
-				OutData[LogName]['Model']=c_DummyArr[i_ModelPos]
-			except UnboundLocalError:
+				sys.stderr.write('read: '+logfile+'\n')
+			OutData[LogName]=LogData
+			if 'Model' not in OutData[LogName]:
+				#no idl command line
 				continue
-			OutData[LogName]['ModelYear']=c_DummyArr[i_ModelYearPos]
-			OutData[LogName]['ObsYear']=c_DummyArr[i_DataYearPos]
-			if '0000' in OutData[LogName]['ObsYear']: OutData[LogName]['ObsYear'] = OutData[LogName]['ModelYear']
 
 			#test if the job ran through without problems
-			#if yes, don't do a deeper analysis for now
-			OutData[LogName]['Success']=False
-			OutData[LogName]['LastLines']=FileData[-10:-1]
-			OutData[LogName]['CHECK']=[]
-			OutData[LogName]['MeanValOrig']=[]
-			OutData[LogName]['ModelDir']=''
-			OutData[LogName]['Var']=''
-			OutData[LogName]['Halted']=[]
-			OutData[LogName]['ModelFileName']=''
-			if 'total size' in FileData[-1]:
-				#assume that the job ran without problems for now if some plots were transfered
-				OutData[LogName]['Success']=True
-				#test if the logs for successfully run jobs should be moved or deleted
-				if MoveSuccessLogs is True:
-					#Move file to success directory
-					if VerboseFlag is True:
-						if DoNothingFlag is False:
-							sys.stderr.write(logfile+' moved to success directory\n')
-						else:
-							sys.stderr.write(logfile+' would have been moved to success directory\n')
-							
-					if DoNothingFlag is False:
-						shutil.move(logfile, SuccessDir)
-				elif DeleteSuccessLogs is True:
-					#delete logs of successful run jobs
-					if VerboseFlag is True:
-						if DoNothingFlag is False:
-							sys.stderr.write(logfile+' deleted\n')
-						else:
-							sys.stderr.write(logfile+' would have been deleted\n')
-					if DoNothingFlag is False:
-						os.remove(logfile)
-				#continue
-			
-
-			#Now search for some stuff
-			for line in FileData:
-				if 'ABOUT TO READ MODELS' in line:
-					#ABOUT TO READ MODELS /lustre/storeB/project/aerocom/aerocom-users-database/AEROCOM-PHASE-II/GOCART-v4.A2.PRE/renamed/
-					OutData[LogName]['ModelDir']=line.split()[4]
-					continue
-				if 'Searched:' in line:
-					#Searched: DRY_SO4 => VarInFile:  DRYSO4 / All vars to Read DRY_SO4
-					OutData[LogName]['Var']=line.split()[1]
-					continue
-				if 'Reading file:' in line:
-					#Reading file: aerocom.GOCART-v4.A2.PRE.daily.dryso4.2006.nc
-					OutData[LogName]['ModelFileName']=line.split()[2]
-					continue
-				if 'CHECK:' in line:
-					#CHECK: Warning Model GOCART_V4_A2_PRE Var DRY_SO4 not properly read
-					OutData[LogName]['CHECK'].append(line.strip())
-					continue
-				if 'mean original value' in line:
-					OutData[LogName]['MeanValOrig'].append(line.split()[-1])
-					continue
-				if '% Execution halted' in line:
-					OutData[LogName]['Halted'].append(line)
-					continue
-
-			#pdb.set_trace()
+			if OutData[LogName]['Success'] is True:
+				SuccessLogs.append(logfile)
 
 			#Now build a model sorted list of file names
 			try:
@@ -141,6 +88,29 @@ def ATAStats(RunLogDir, MoveSuccessLogs=False, DeleteSuccessLogs=False, DoNothin
 				ModelOutData[OutData[LogName]['Model']]=[]
 				ModelOutData[OutData[LogName]['Model']].append(LogName)
 
+		#test if the logs for successfully run jobs should be moved or deleted
+		#only now that all logs have been read
+		for logfile in SuccessLogs:
+			if MoveSuccessLogs is True:
+				#Move file to success directory
+				if VerboseFlag is True:
+					if DoNothingFlag is False:
+						sys.stderr.write(logfile+' moved to success directory\n')
+					else:
+						sys.stderr.write(logfile+' would have been moved to success directory\n')
+						
+				if DoNothingFlag is False:
+					shutil.move(logfile, SuccessDir)
+			elif DeleteSuccessLogs is True:
+				#delete logs of successful run jobs
+				if VerboseFlag is True:
+					if DoNothingFlag is False:
+						sys.stderr.write(logfile+' deleted\n')
+					else:
+						sys.stderr.write(logfile+' would have been deleted\n')
+				if DoNothingFlag is False:
+					os.remove(logfile)
+
 	else:
 		sys.stderr.write("ERROR: input directory "+RunLogDir+" not found!\n")
 		os.exit(1)
@@ -152,6 +122,337 @@ def ATAStats(RunLogDir, MoveSuccessLogs=False, DeleteSuccessLogs=False, DoNothin
 
 ##########################################################################################
 
+def ReadRunLog(logfile):
+	#ParseRunLog for MapRunLogs; None for logs of zero length
+	if os.path.getsize(logfile) == 0:
+		return None
+	return ParseRunLog(logfile)
+
+def MapRunLogs(logfiles, Jobs=DefaultJobs):
+	#yield ReadRunLog(logfile) for all logfiles in their order, computed with Jobs processes
+	if Jobs <= 1 or len(logfiles) <= 1:
+		yield from map(ReadRunLog, logfiles)
+		return
+	#hand the logs out in chunks to keep the overhead per log low, but small enough
+	#to even out the differences in the size of the logs
+	ChunkSize=max(1, min(100, len(logfiles)//(Jobs*8)))
+	with ProcessPoolExecutor(max_workers=min(Jobs, len(logfiles))) as Executor:
+		yield from Executor.map(ReadRunLog, logfiles, chunksize=ChunkSize)
+
+def GetMatchingLines(logfile, Pattern, BlockSize=1024*1024):
+	#yield the lines (as str, with line end) of a file in which the bytes regexp
+	#Pattern matches, in the order of the file
+	#The file is read once in blocks of BlockSize bytes and each block is
+	#searched as a whole, which is a lot faster than searching line by line.
+	Rest=b''
+	with open(logfile, 'rb') as InFile:
+		while True:
+			Block=InFile.read(BlockSize)
+			if len(Block) == 0:
+				Data=Rest
+			else:
+				#just complete lines; the last one is searched with the next block
+				Data=Rest+Block
+				Cut=Data.rfind(b'\n')+1
+				Data, Rest=Data[:Cut], Data[Cut:]
+			LineEnd=-1
+			for Match in Pattern.finditer(Data):
+				if Match.start() <= LineEnd:
+					#more than one match in a line
+					continue
+				LineStart=Data.rfind(b'\n', 0, Match.start())+1
+				LineEnd=Data.find(b'\n', Match.end())
+				if LineEnd < 0:
+					LineEnd=len(Data)
+				yield Data[LineStart:LineEnd+1].decode('utf-8', 'replace')
+			if len(Block) == 0:
+				break
+
+def ParseRunLog(logfile):
+	#return the data ATAStats needs from a runlog as dict
+	#The log is read once in blocks and searched for the single pattern
+	#RunLogPattern; just the lines it matches are looked at further. The end of
+	#the log is read with seek. So the memory needed does not depend on the size
+	#of the log, which can be hundreds of MB for verbose idl runs.
+	#Logs without idl command line give a dict with just the key File.
+	i_ModelPos=1
+	i_ModelYearPos=3
+	i_DataYearPos=5
+	LogData={}
+	LogData['File']=logfile
+	LogData['CHECK']=[]
+	LogData['MeanValOrig']=[]
+	LogData['ModelDir']=''
+	LogData['Var']=''
+	LogData['Halted']=[]
+	LogData['ModelFileName']=''
+	c_DummyArr=None
+	for line in GetMatchingLines(logfile, RunLogPattern):
+		#the command line is usually in the head of the log
+		#line 10 is written to the log even when idl failed to start
+		#so we should be able to rely on it
+		#UNFORTUNATELY this is not the case
+		if c_DummyArr is None and 'aerocom_main_' in line:
+			c_DummyArr=line.split("'")
+		if 'ABOUT TO READ MODELS' in line:
+			#ABOUT TO READ MODELS /lustre/storeB/project/aerocom/aerocom-users-database/AEROCOM-PHASE-II/GOCART-v4.A2.PRE/renamed/
+			LogData['ModelDir']=line.split()[4]
+		elif 'Searched:' in line:
+			#Searched: DRY_SO4 => VarInFile:  DRYSO4 / All vars to Read DRY_SO4
+			LogData['Var']=line.split()[1]
+		elif 'Reading file:' in line:
+			#Reading file: aerocom.GOCART-v4.A2.PRE.daily.dryso4.2006.nc
+			LogData['ModelFileName']=line.split()[2]
+		elif 'CHECK:' in line:
+			#CHECK: Warning Model GOCART_V4_A2_PRE Var DRY_SO4 not properly read
+			LogData['CHECK'].append(line.strip())
+		elif 'mean original value' in line:
+			LogData['MeanValOrig'].append(line.split()[-1])
+		elif '% Execution halted' in line:
+			LogData['Halted'].append(line)
+
+	if c_DummyArr is None:
+		return {'File':logfile}
+	LogData['Model']=c_DummyArr[i_ModelPos]
+	LogData['ModelYear']=c_DummyArr[i_ModelYearPos]
+	LogData['ObsYear']=c_DummyArr[i_DataYearPos]
+	if '0000' in LogData['ObsYear']: LogData['ObsYear'] = LogData['ModelYear']
+
+	#the job ran without problems if some plots were transfered at the end
+	Tail=ReadLastLines(logfile, TailLines)
+	LogData['LastLines']=Tail[:-1]
+	LogData['Success']='total size' in Tail[-1]
+	return LogData
+
+##########################################################################################
+
+def ParseLogTime(line):
+	#return the time stamp (seconds since the epoch) in line or None
+	#time stamps without time zone are taken as local time
+	Match=IsoDateRegexp.search(line)
+	if Match is not None:
+		Zone=Match.group('Zone')
+		c_Date=Match.group('Date').replace(' ','T')
+		if Zone is not None:
+			c_Date=c_Date+Zone.replace('Z','+00:00')
+		try:
+			return datetime.datetime.fromisoformat(c_Date).timestamp()
+		except ValueError:
+			pass
+	Match=DateRegexp.search(line)
+	if Match is not None:
+		try:
+			return datetime.datetime.strptime(' '.join(Match.group('Date').split())+' '+Match.group('Year'),
+				'%a %b %d %H:%M:%S %Y').timestamp()
+		except ValueError:
+			pass
+	return None
+
+##########################################################################################
+
+def GetRunDurations(RunLogDir, AllUserFlag=False, KnownLogs=None, VerboseFlag=False, DebugFlag=False):
+	#return the durations of the idl runs logged in RunLogDir and its success directory
+	#as a list of dicts with the keys File, Model, ModelYear, Var, Freq, Start, End,
+	#Duration (seconds) and Success
+	#The start time is the first time stamp in the head of the log, the end time the
+	#modification time of the log. Logs without start time are left out.
+	#Var and Freq are taken from the name of the first model file read.
+	#KnownLogs: dict log name -> end time (see helpers.DurationDB.KnownLogs);
+	#these logs are skipped unless they were modified after that time
+	if KnownLogs is None:
+		KnownLogs={}
+	RetVal=[]
+	if AllUserFlag is False:
+		Pattern='*'+getpass.getuser()+'_aerocom-tools*.log'
+	else:
+		Pattern='*_aerocom-tools*.log'
+	logfiles=glob.glob(os.path.join(RunLogDir,Pattern))+glob.glob(os.path.join(RunLogDir,'success',Pattern))
+	for logfile in logfiles:
+		Run={}
+		Run['File']=logfile
+		Run['Model']=None
+		Run['ModelYear']=None
+		Run['Var']=None
+		Run['Freq']=None
+		Run['Start']=None
+		Run['Success']=False
+		try:
+			Run['End']=os.path.getmtime(logfile)
+			if Run['End'] <= KnownLogs.get(os.path.basename(logfile), -1.):
+				continue
+			with open(logfile, 'rt', errors='replace') as InFile:
+				for LineNo, line in enumerate(InFile):
+					if Run['Start'] is None and LineNo < HeaderLines:
+						Run['Start']=ParseLogTime(line)
+					if Run['Model'] is None and 'aerocom_main_' in line:
+						c_DummyArr=line.split("'")
+						if len(c_DummyArr) > 3:
+							Run['Model']=c_DummyArr[1]
+							Run['ModelYear']=c_DummyArr[3]
+					elif Run['Var'] is None and 'Reading file:' in line and len(line.split()) > 2:
+						#Reading file: aerocom.GOCART-v4.A2.PRE.daily.dryso4.2006.nc
+						FileInfo=ParseFileName(line.split()[2])
+						if FileInfo is not None:
+							Run['Var']=FileInfo['Var']
+							Run['Freq']=FileInfo['Freq']
+					if Run['Var'] is not None and (Run['Start'] is not None or LineNo >= HeaderLines):
+						#the rest of the log is not needed
+						break
+			#the last line tells if the run was successful
+			Run['Success']='total size' in ReadLastLine(logfile)
+		except OSError as ErrorMessage:
+			sys.stderr.write('Error reading '+logfile+': '+str(ErrorMessage)+'\n')
+			continue
+		if Run['Start'] is None or Run['Model'] is None:
+			if VerboseFlag is True:
+				sys.stderr.write(logfile+': no start time or model found. Skipping\n')
+			continue
+		Run['Duration']=Run['End']-Run['Start']
+		RetVal.append(Run)
+
+	if DebugFlag:
+		pdb.set_trace()
+
+	return RetVal
+
+def ReadLastLines(logfile, NumOfLines=1, BlockSize=4096):
+	#return the last NumOfLines lines of a file (like readlines()[-NumOfLines:])
+	#without reading all of it
+	with open(logfile, 'rb') as InFile:
+		InFile.seek(0, os.SEEK_END)
+		Size=InFile.tell()
+		Start=Size
+		Data=b''
+		while Start > 0:
+			Start=max(0, Start-BlockSize)
+			InFile.seek(Start)
+			Data=InFile.read(Size-Start)
+			#the last lines are complete once there are enough line ends before them
+			if Data[:-1].count(b'\n') >= NumOfLines:
+				break
+	return Data.decode('utf-8', 'replace').splitlines(True)[-NumOfLines:]
+
+def ReadLastLine(logfile, BlockSize=4096):
+	#return the last line of a file (like readlines()[-1]) without reading all of it
+	Lines=ReadLastLines(logfile, 1, BlockSize=BlockSize)
+	if len(Lines) == 0:
+		return ''
+	return Lines[0]
+
+def RunSucceeded(logfile):
+	#True if the run of a runlog was successful (the same check as in ATAStats)
+	try:
+		return 'total size' in ReadLastLine(logfile)
+	except OSError:
+		return False
+
+class RunLogIndex:
+	#find the runlogs of runs by the idl statement (as given to idl -e) in their head,
+	#for a program looking up many runs in the same (big, shared) runlog directory
+	#The directory and its success directory are listed when the index is made and
+	#again only when they have changed. The logs that were there already are only
+	#looked at if their name contains the hint given for a run (e.g. its screen session
+	#name), all others have their head read once.
+
+	def __init__(self, RunLogDir, AllUserFlag=False):
+		self.Dirs=[RunLogDir, os.path.join(RunLogDir,'success')]
+		if AllUserFlag is False:
+			self.Pattern='*'+getpass.getuser()+'_aerocom-tools*.log'
+		else:
+			self.Pattern='*_aerocom-tools*.log'
+		#dir -> (mtime, logs in it)
+		self.Listings={}
+		#complete heads of the logs read
+		self.Heads={}
+		self._Update()
+		self.Existing=set(self._Logs())
+
+	def _Update(self):
+		#list the directories that have changed
+		for Dir in self.Dirs:
+			try:
+				MTime=os.stat(Dir).st_mtime_ns
+				if Dir in self.Listings and self.Listings[Dir][0] == MTime:
+					continue
+				Logs=[os.path.join(Dir, x) for x in fnmatch.filter(os.listdir(Dir), self.Pattern)]
+			except OSError:
+				MTime, Logs=None, []
+			self.Listings[Dir]=(MTime, Logs)
+
+	def _Logs(self):
+		return [x for Dir in self.Dirs for x in self.Listings[Dir][1]]
+
+	def _Head(self, logfile):
+		#the head of a log up to the idl call; kept if it is complete
+		if logfile in self.Heads:
+			return self.Heads[logfile]
+		Head=''
+		Complete=False
+		with open(logfile, 'rt', errors='replace') as InFile:
+			for LineNo, line in enumerate(InFile):
+				Head+=line
+				if 'aerocom_main_' in line or LineNo >= HeaderLines:
+					Complete=True
+					break
+		#a log with the same name written again later is taken as a new log
+		if Complete and logfile not in self.Existing:
+			self.Heads[logfile]=Head
+		return Head
+
+	def Find(self, IdlCmd, Since=0., Hint=None):
+		#return the runlog of the run of the idl statement IdlCmd
+		#Only the logs modified after Since (seconds since the epoch) are looked at.
+		#None if no log was found.
+		self._Update()
+		Candidates=[]
+		for logfile in self._Logs():
+			if Hint is not None and Hint in os.path.basename(logfile):
+				Candidates.insert(0, logfile)
+			elif logfile not in self.Existing:
+				Candidates.append(logfile)
+		for logfile in Candidates:
+			try:
+				if logfile in self.Heads and IdlCmd not in self.Heads[logfile]:
+					continue
+				if os.path.getmtime(logfile) < Since:
+					continue
+				if IdlCmd in self._Head(logfile):
+					return logfile
+			except OSError:
+				continue
+		return None
+
+##########################################################################################
+
+def UpdateDurationDB(RunLogDir, DBFile=DefaultDBFile, AllUserFlag=False, VerboseFlag=False, DebugFlag=False):
+	#add the durations of the runs in RunLogDir not yet in the data base DBFile to it
+	#returns the DurationDB object
+	DB=DurationDB(DBFile)
+	Runs=GetRunDurations(RunLogDir, AllUserFlag=AllUserFlag, KnownLogs=DB.KnownLogs(), VerboseFlag=VerboseFlag)
+	DB.Add(Runs)
+	if VerboseFlag is True:
+		sys.stderr.write(str(len(Runs))+' new run(s) added to '+DBFile+'\n')
+	if DebugFlag:
+		pdb.set_trace()
+	return DB
+
+##########################################################################################
+
+def PrintDurations(DB, Since=None):
+	#print p50 and p95 of the run durations per model, variable and frequency
+	MaxModelStrLength=25
+	MaxVarLength=12
+	MaxFreqLength=8
+	Stats=DB.Percentiles(GroupBy=('Model','Var','Freq'), Since=Since)
+	sys.stdout.write(' | '.join(['Model'.ljust(MaxModelStrLength),'Var'.ljust(MaxVarLength),'Freq'.ljust(MaxFreqLength),
+		'# runs'.rjust(6),'p50 [s]'.rjust(8),'p95 [s]'.rjust(8)])+'\n')
+	for Key in sorted(Stats, key=lambda x: [str(y) for y in x]):
+		Model, Var, Freq=[str(x) for x in Key]
+		sys.stdout.write(' | '.join([Model.ljust(MaxModelStrLength),Var.ljust(MaxVarLength),Freq.ljust(MaxFreqLength),
+			str(Stats[Key]['N']).rjust(6),'{:8.0f}'.format(Stats[Key]['P50']),'{:8.0f}'.format(Stats[Key]['P95'])])+'\n')
+
+##########################################################################################
+
 def PrintAtaStats(InData,ModelInData,FailedOnlyFlag=False):
 	#procedure to pretty print the ATAStats output struct
 	#for key in InData:
@@ -219,13 +520,17 @@ if __name__ == '__main__':
 	dict_Param={}
 	parser = argparse.ArgumentParser(description='ATAStats: Program to analyse run logs of the aerocom-tool-automation software\n\n',)
 	#epilog='RI#eturns some general statistics')
-	parser.add_argument("-d","--directory", help="use directory. Defaults to /lustre/storeA/project/aerocom/logs/runlog", default='/lustre/storeA/project/aerocom/logs/runlog')
+	parser.add_argument("-d","--directory", help="use directory. Defaults to "+DefaultRunLogDir, default=DefaultRunLogDir)
 	parser.add_argument("-m","--movelogs", help="move successfully run log files to <success directory>", action='store_true')
 	parser.add_argument("--deletelogs", help="delete successfully run log files", action='store_true')
 	parser.add_argument("-f","--failedonly", help="list only failed jobs", action='store_true')
 	parser.add_argument("-n","--donothing", help="do nothing, just print, what would be done", action='store_true')
 	parser.add_argument("-v","--verbose", help="be verbose", action='store_true')
 	parser.add_argument("-a","--allusers", help="analyse all logfiles, not just your own", action='store_true')
+	parser.add_argument("-j","--jobs", help="# of processes reading the log files in parallel. Defaults to {}.".format(DefaultJobs), type=int, default=DefaultJobs)
+	parser.add_argument("--durationdb", help="add the durations of the runs to a SQLite data base; only logs not yet in there are read. Defaults to "+DefaultDBFile+" if given without file name.", nargs='?', const=DefaultDBFile)
+	parser.add_argument("--durations", help="print p50 and p95 of the run durations per model, variable and frequency from the data base of --durationdb instead of the list of jobs", action='store_true')
+	parser.add_argument("--since", help="with --durations: only use runs started on or after this date (YYYY-MM-DD)")
 	#parser.add_argument("-l", help="")
 
 	args = parser.parse_args()
@@ -264,15 +569,28 @@ if __name__ == '__main__':
 	if args.directory:
 		dict_Param['dir']=args.directory
 	else:
-		dict_Param['dir']='/lustre/storeA/project/aerocom/logs/runlog'
+		dict_Param['dir']=DefaultRunLogDir
 
 	if os.path.isdir(dict_Param['dir']) is False:
 		sys.stderr.write('Error: The supplied directory does not exist. Exiting.\n')
 		sys.exit(1)
 		
+	if args.durations or args.durationdb:
+		if args.durationdb:
+			DBFile=args.durationdb
+		else:
+			DBFile=DefaultDBFile
+		DB=UpdateDurationDB(dict_Param['dir'], DBFile=DBFile, AllUserFlag=dict_Param['allusers'], VerboseFlag=dict_Param['verbose'])
+		if args.durations:
+			Since=None
+			if args.since:
+				Since=datetime.datetime.strptime(args.since, '%Y-%m-%d').timestamp()
+			PrintDurations(DB, Since=Since)
+			sys.exit(0)
+
 	#pdb.set_trace()
 	ATAStatData, ModelATAStatData=ATAStats(dict_Param['dir'], DoNothingFlag=dict_Param['donothing'], 
 		AllUserFlag=dict_Param['allusers'], MoveSuccessLogs=dict_Param['movelogs'], 
-		DeleteSuccessLogs=dict_Param['deletelogs'], VerboseFlag=dict_Param['verbose'], DebugFlag=False)
+		DeleteSuccessLogs=dict_Param['deletelogs'], VerboseFlag=dict_Param['verbose'], DebugFlag=False, Jobs=args.jobs)
 	PrintAtaStats(ATAStatData, ModelATAStatData, FailedOnlyFlag=dict_Param['failedonly'])
 
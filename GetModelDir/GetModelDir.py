@@ -26,47 +26,157 @@
 #################################################################
 
 import pdb
-import configparser
 import os
 import glob
+import fnmatch
+import json
 import argparse 
 import sys
 import subprocess
+import hashlib
+
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.ReadIniFile import ReadFoldersToSearchIn
+from helpers.DirWalker import MapFolders, DefaultJobs
+
+#version of the index file format; increase if the format changes
+IndexVersion=1
+
+def GetModelDirIndexFile(c_ConfigFile):
+	#the index of a config file in the user's own directory; the install directory
+	#is shared and usually not writable
+	Name=hashlib.sha1(os.path.realpath(c_ConfigFile).encode()).hexdigest()[:12]
+	return os.path.join(os.path.expanduser('~'),'.aerocom-tool-automation','modeldir_index_'+Name+'.json')
+
+###################################################################################
+
+def UpdateModelDirIndex(FoldersToSearchIn, IndexFile, RebuildFlag=False, VerboseFlag=False, DebugFlag=False, Jobs=None):
+	#read the index of the entries of the folders to search in
+	#and refresh the folders that changed since the index was written
+	#
+	#The index holds the directory listing of each folder together with the
+	#folder's mtime. A new model directory changes the mtime of its parent folder,
+	#so only folders with a changed mtime need to be listed again.
+	#The folders are checked using Jobs threads (see helpers.DirWalker)
+	#returns a dict with the folder as key and a set of its entries as value
+
+	dict_Index={}
+	if RebuildFlag is False and os.path.isfile(IndexFile):
+		try:
+			with open(IndexFile, 'rt') as InHandle:
+				dict_Index=json.load(InHandle)
+			if dict_Index.get('version') != IndexVersion:
+				dict_Index={}
+		except (OSError, ValueError):
+			sys.stderr.write('WARNING: index file '+IndexFile+' unreadable. Rebuilding it.\n')
+			dict_Index={}
+
+	dict_Folders=dict_Index.get('folders',{})
+
+	def CheckFolder(FolderToSearchIn):
+		#returns the index entry of a folder and if it had to be listed again
+		try:
+			#stat before listing; a change after this gets noticed next time
+			MTime=os.stat(FolderToSearchIn).st_mtime_ns
+		except OSError:
+			return None, False
+		if not os.path.isdir(FolderToSearchIn):
+			return None, False
+		if FolderToSearchIn in dict_Folders and dict_Folders[FolderToSearchIn]['mtime'] == MTime:
+			return dict_Folders[FolderToSearchIn], False
+		if VerboseFlag:
+			print('Indexing: ',FolderToSearchIn)
+		return {'mtime':MTime, 'entries':sorted(os.listdir(FolderToSearchIn))}, True
+
+	UniqueFolders=list(dict.fromkeys(FoldersToSearchIn))
+	Results=MapFolders(CheckFolder, UniqueFolders, Jobs=Jobs)
+
+	ChangedFlag=RebuildFlag or len(dict_Folders) == 0
+	RetVal={}
+	for FolderToSearchIn, Result in zip(UniqueFolders, Results):
+		dict_Folder, ListedFlag=Result
+		if dict_Folder is None:
+			continue
+		dict_Folders[FolderToSearchIn]=dict_Folder
+		RetVal[FolderToSearchIn]=set(dict_Folder['entries'])
+		ChangedFlag=ChangedFlag or ListedFlag
+
+	if ChangedFlag:
+		#write to a temporary file and rename it so that concurrent readers
+		#never see a half written index
+		TmpFile=IndexFile+'.'+str(os.getpid())+'.tmp'
+		try:
+			os.makedirs(os.path.dirname(os.path.abspath(IndexFile)), exist_ok=True)
+			with open(TmpFile, 'wt') as OutHandle:
+				json.dump({'version':IndexVersion, 'folders':dict_Folders}, OutHandle)
+			os.replace(TmpFile, IndexFile)
+		except OSError as ErrorMessage:
+			#the index is just a speed up; work without writing it
+			sys.stderr.write('WARNING: could not write index file '+IndexFile+': '+str(ErrorMessage)+'\n')
+			try:
+				os.remove(TmpFile)
+			except OSError:
+				pass
 
+	if DebugFlag:
+		pdb.set_trace()
 
+	return RetVal
 
-def GetModelDir(ModelArr, VerboseFlag=False, DebugFlag=False, c_ConfigFile=None ):
+###################################################################################
+
+def GetModelDir(ModelArr, VerboseFlag=False, DebugFlag=False, c_ConfigFile=None, UseIndexFlag=True, 
+	RebuildIndexFlag=False, IndexFile=None, Jobs=None):
 	if c_ConfigFile == None:
 		c_ConfigFile='constants.ini'
 	dict_Config={}
 	ModelDirs={}
 	if os.path.isfile(c_ConfigFile):
-		ReadConfig = configparser.ConfigParser()
-		ReadConfig.read(c_ConfigFile)
-		dict_Config['BaseDir']=[ReadConfig['folders']['BASEDIR']]
-		dict_Config['FoldersToSearchIn']=ReadConfig['folders']['dir'].replace('${BASEDIR}',dict_Config['BaseDir'][0]).replace('\n','').split(',')
+		dict_Config['FoldersToSearchIn']=ReadFoldersToSearchIn(c_ConfigFile)
+
+		if UseIndexFlag:
+			if IndexFile is None:
+				IndexFile=GetModelDirIndexFile(c_ConfigFile)
+			dict_Index=UpdateModelDirIndex(dict_Config['FoldersToSearchIn'], IndexFile, 
+				RebuildFlag=RebuildIndexFlag, VerboseFlag=VerboseFlag, Jobs=Jobs)
+
+		def FindModel(FolderToSearchIn):
+			#return the directories matching ModelName in FolderToSearchIn
+			if VerboseFlag:
+				print('Searching in: ',FolderToSearchIn)
+			#get the directories
+			if UseIndexFlag and FolderToSearchIn in dict_Index and FolderToSearchIn.endswith('/') and '/' not in ModelName:
+				#look up the indexed folder entries instead of asking the file system
+				if glob.has_magic(ModelName):
+					Entries=sorted(fnmatch.filter(dict_Index[FolderToSearchIn], ModelName))
+					#glob does not return hidden entries unless asked for them
+					if not ModelName.startswith('.'):
+						Entries=[x for x in Entries if not x.startswith('.')]
+				elif ModelName in dict_Index[FolderToSearchIn]:
+					Entries=[ModelName]
+				else:
+					Entries=[]
+				return [FolderToSearchIn+x for x in Entries]
+			if not os.path.isdir(FolderToSearchIn):
+				if VerboseFlag:
+					print('directory: ',FolderToSearchIn, ' does not exist')
+				return []
+			return sorted(glob.glob(FolderToSearchIn+ModelName))
 
 		#Return only folders containing renamed at the end
 		#This way we are sure to find only model dirs likely containing data
 		
 		for ModelName in ModelArr:
 			#loop through the list of models
-			for FolderToSearchIn in dict_Config['FoldersToSearchIn']:
-				if VerboseFlag:
-					print('Searching in: ',FolderToSearchIn)
-				#get the directories
-				if os.path.isdir(FolderToSearchIn):
-					dir=glob.glob(FolderToSearchIn+ModelName)
-					if len(dir) > 0:
-						ModelDirs[ModelName]=dir
-						if VerboseFlag:
-							print('Found: ',ModelDirs[ModelName])
-						#break
-					else:
-						continue
-				else:
+			#the folders are searched in parallel, but the result is the same
+			#as searching them one after the other: the last folder containing
+			#the model wins
+			for dir in MapFolders(FindModel, dict_Config['FoldersToSearchIn'], Jobs=Jobs):
+				if len(dir) > 0:
+					ModelDirs[ModelName]=dir
 					if VerboseFlag:
-						print('directory: ',FolderToSearchIn, ' does not exist')
+						print('Found: ',ModelDirs[ModelName])
 					
 	else:
 		sys.stderr.write('Error: Config file '+c_ConfigFile+' not found. Exiting.\n')
@@ -87,6 +197,9 @@ if __name__ == '__main__':
 	parser.add_argument("model", help="model names to use; can be a comma separated list; shell wildcards can be used")
 	parser.add_argument("-c","--config", help="use another config file; ./folder.ini if not given", default='folders.ini')
 	parser.add_argument("-l","--list", help="list files in model directory", action='store_true')
+	parser.add_argument("--rebuild-index", help="rebuild the index of the model directories from scratch", action='store_true')
+	parser.add_argument("--noindex", help="do not use the index of the model directories, search the file system directly", action='store_true')
+	parser.add_argument("--jobs", help="# of directories to search in parallel. Defaults to {}.".format(DefaultJobs), type=int, default=DefaultJobs)
 	#parser.add_argument("-l", help="")
 
 	args = parser.parse_args()
@@ -114,7 +227,8 @@ if __name__ == '__main__':
 			else:
 				dict_Param['ConfigFile']=IniPath
 
-	ModelDirs=GetModelDir(dict_Param['ModelName'], c_ConfigFile=dict_Param['ConfigFile'])
+	ModelDirs=GetModelDir(dict_Param['ModelName'], c_ConfigFile=dict_Param['ConfigFile'], 
+		UseIndexFlag=not args.noindex, RebuildIndexFlag=args.rebuild_index, Jobs=args.jobs)
 	for Model in ModelDirs:
 		if dict_Param['ls'] is False:
 			sys.stdout.write(':'.join([Model,','.join(ModelDirs[Model])])+'\n')
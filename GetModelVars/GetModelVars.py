@@ -13,50 +13,25 @@
 
 import pdb
 import os
-import glob
-from collections import OrderedDict
 import argparse
 import sys
 
-def GetModelVars(ModelFolder, VerboseFlag=False, DebugFlag=False):
-	#unfortunately there's more than one file naming convention
-	#examples
-	#aerocom3_CAM5.3-Oslo_AP3-CTRL2016-PD_od550aer_Column_2010_monthly.nc
-	#aerocom.AATSR_ensemble.v2.6.daily.od550aer.2012.nc
-	Vars=[]
-	DataTypesToList=['surface','column','modellevel']
-	if os.path.isdir(ModelFolder):
-		files=glob.glob(ModelFolder+'/*.nc')
-		for file in files:
-			#divide the type based on the # of underscores in a file name
-			if os.path.basename(file).count('_') >= 4:
-				#newest file naming convention
-				c_DummyArr=file.split('_')
-				# include vars for the surface
-				if c_DummyArr[-3].lower() in DataTypesToList:
-					Vars.append(c_DummyArr[-4])
-				#also include 3d vars that provide station based data
-				#and contain the string vmr
-				#in this case the variable name has to slightly changed to the aerocom phase 2 naming
-				elif c_DummyArr[-3].lower() == 'modellevelatstations':
-					if 'vmr' in c_DummyArr[-4]:
-						Vars.append(c_DummyArr[-4].replace('vmr','vmr3d'))
-			elif os.path.basename(file).count('.') >= 4:
-				c_DummyArr=file.split('.')
-				Vars.append(c_DummyArr[-3])
-
-		#make sorted list of unique years
-		Vars=(sorted(OrderedDict.fromkeys(Vars)))
-
-		if VerboseFlag:
-			print(Vars)
-		if DebugFlag:
-			pdb.set_trace()
-	else:
-		sys.stderr.write("Error: Model folder does not exist: \n")
-		sys.stderr.write(ModelFolder+"\n")
-		sys.stderr.write('Exiting.\n')
-		sys.exit(3)
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.ModelInventory import ModelInventory
+
+def GetModelVars(ModelFolder, VerboseFlag=False, DebugFlag=False, Inventory=None):
+	#return the variables of a model folder
+	#The work is done by helpers.ModelInventory; hand in an existing inventory
+	#of ModelFolder to avoid reading the directory again
+	if Inventory is None:
+		Inventory=ModelInventory(ModelFolder)
+	Vars=Inventory.GetVars()
+
+	if VerboseFlag:
+		print(Vars)
+	if DebugFlag:
+		pdb.set_trace()
 
 	return Vars
 
@@ -13,41 +13,20 @@
 
 import pdb
 import os
-import glob
-from collections import OrderedDict
 import argparse
 import sys
 
-def GetModelYears(ModelFolder, Variable=None, VerboseFlag=False, DebugFlag=False):
-	#unfortunately there's more than one file naming convention
-	#examples
-	#aerocom3_CAM5.3-Oslo_AP3-CTRL2016-PD_od550aer_Column_2010_monthly.nc
-	#aerocom.AATSR_ensemble.v2.6.daily.od550aer.2012.nc
-	Years=[]
-	if os.path.isdir(ModelFolder):
-		if Variable == None:
-			files=glob.glob(ModelFolder+'/*.nc')
-		else:
-			files=glob.glob(ModelFolder+'/*'+Variable+'*.nc')
-		for file in files:
-			#divide the type based on the # of underscores in a file name
-			if os.path.basename(file).count('_') >= 4:
-				#newest file naming convention
-				c_DummyArr=file.split('_')
-				Years.append(c_DummyArr[-2])
-			elif os.path.basename(file).count('.') >= 4:
-				c_DummyArr=file.split('.')
-				Years.append(c_DummyArr[-2])
-
-		#make sorted list of unique years
-		Years=(sorted(OrderedDict.fromkeys(Years)))
-
-	else:
-		sys.stderr.write("Error: Model folder does not exist: \n")
-		sys.stderr.write(ModelFolder+"\n")
-		sys.stderr.write('Exiting.\n')
-		sys.exit(3)
-
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.ModelInventory import ModelInventory
+
+def GetModelYears(ModelFolder, Variable=None, VerboseFlag=False, DebugFlag=False, Inventory=None):
+	#return the years of a model folder; only those of Variable if given
+	#The work is done by helpers.ModelInventory; hand in an existing inventory
+	#of ModelFolder to avoid reading the directory again
+	if Inventory is None:
+		Inventory=ModelInventory(ModelFolder)
+	Years=Inventory.GetYears(Variable)
 
 	if VerboseFlag:
 		print(Years)
@@ -26,55 +26,136 @@
 #################################################################
 
 import pdb
-import configparser
 import os
 import time
-import re
+import json
 import argparse
 import sys
 
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.ReadIniFile import ReadFoldersToSearchIn
+from helpers.DirWalker import ParallelWalk, DefaultJobs
 
+#version of the state file format; increase if the format changes
+StateVersion=1
 
-def GetModelDirsToWorkOn(MaxTimeDiffDays, VerboseFlag=False, DebugFlag=False, c_ConfigFile=None):
+def GetDefaultStateFile():
+	#per user, since the cron jobs run under different accounts
+	return os.path.join(os.path.expanduser('~'),'.aerocom-tool-automation','GetNewFolder_state.json')
+
+###################################################################################
+
+def ReadState(StateFile):
+	#read the directory state of the last run
+	#returns an empty state if there is none (yet)
+	if StateFile is None or not os.path.isfile(StateFile):
+		return {}
+	try:
+		with open(StateFile, 'rt') as InHandle:
+			dict_State=json.load(InHandle)
+	except (OSError, ValueError):
+		sys.stderr.write('WARNING: state file '+StateFile+' unreadable. Doing a full scan.\n')
+		return {}
+	if dict_State.get('version') != StateVersion:
+		return {}
+	return dict_State['dirs']
+
+def WriteState(StateFile, dict_Dirs):
+	#write to a temporary file and rename it so that a crashed run
+	#never leaves a half written state behind
+	try:
+		os.makedirs(os.path.dirname(StateFile), exist_ok=True)
+		TmpFile=StateFile+'.'+str(os.getpid())+'.tmp'
+		with open(TmpFile, 'wt') as OutHandle:
+			json.dump({'version':StateVersion, 'dirs':dict_Dirs}, OutHandle)
+		os.replace(TmpFile, StateFile)
+	except OSError as ErrorMessage:
+		sys.stderr.write('WARNING: could not write state file '+StateFile+': '+str(ErrorMessage)+'\n')
+
+###################################################################################
+
+def GetModelDirsToWorkOn(MaxTimeDiffDays, VerboseFlag=False, DebugFlag=False, c_ConfigFile=None, 
+	StateFile=None, UseStateFlag=True, Jobs=None):
+	#find the directories named renamed below the folders to search in that
+	#were changed in the last MaxTimeDiffDays days
+	#
+	#- we do not descend into a directory named renamed; the model data is there,
+	#  but no other model directories
+	#- the sub directories of a directory whose mtime did not change since the
+	#  last run are taken from the state file instead of listing the directory again
+	#  (adding or removing a sub directory changes the mtime of its parent).
+	#  Only a stat is needed for these.
+	#- the directories are listed using Jobs threads (see helpers.DirWalker)
 	if c_ConfigFile == None:
 		c_ConfigFile=os.path.join(os.path.dirname(os.path.realpath(__file__)),'../constants.ini')
 		#pdb.set_trace()
+	if StateFile == None:
+		StateFile=GetDefaultStateFile()
 	dict_Config={}
 	now=time.time()
 	if VerboseFlag:
 		sys.stderr.write('reading config file :'+c_ConfigFile+'\n')
 	if os.path.isfile(c_ConfigFile):
-		ReadConfig = configparser.ConfigParser()
-		ReadConfig.read(c_ConfigFile)
-		dict_Config['BaseDir']=[ReadConfig['folders']['BASEDIR']]
-		dict_Config['FoldersToSearchIn']=ReadConfig['folders']['dir'].replace('${BASEDIR}',dict_Config['BaseDir'][0]).replace('\n','').split(',')
+		dict_Config['FoldersToSearchIn']=ReadFoldersToSearchIn(c_ConfigFile)
+
+		dict_OldState={}
+		if UseStateFlag:
+			dict_OldState=ReadState(StateFile)
+
+		def ListDir(Dir):
+			#called by ParallelWalk for every directory
+			#returns the sub directories to descend into and
+			#the directory state plus the renamed dir found (if any)
+			MTime=os.stat(Dir).st_mtime_ns
+			if Dir in dict_OldState and dict_OldState[Dir]['mtime'] == MTime:
+				SubDirs=dict_OldState[Dir]['subdirs']
+			else:
+				with os.scandir(Dir) as Entries:
+					#like os.walk: symlinks to directories are not followed
+					SubDirs=sorted([x.name for x in Entries if x.is_dir(follow_symlinks=False)])
+			Renamed=None
+			if 'renamed' in SubDirs:
+				RenamedDir=os.path.join(Dir, 'renamed')
+				try:
+					Renamed=(RenamedDir, os.stat(RenamedDir).st_mtime)
+				except OSError:
+					pass
+			return [x for x in SubDirs if x != 'renamed'], ({'mtime':MTime, 'subdirs':SubDirs}, Renamed)
+
+		Folders=[x for x in dict_Config['FoldersToSearchIn'] if os.path.isdir(x)]
+		Walks=dict(zip(Folders, ParallelWalk(Folders, ListFunc=ListDir, Jobs=Jobs)))
 
 		DirsToWorkOn=[]
+		dict_NewState={}
 		#Return only folderd containing renamed at the end
 		#This way we are sure to find only model dirs likely containing data
-		MatchPattern=re.compile('.*/renamed$')
 		for FolderToSearchIn in dict_Config['FoldersToSearchIn']:
 			if VerboseFlag:
 				sys.stderr.write('checking '+FolderToSearchIn+' ...\n')
-			#get the directories
-			if os.path.isdir(FolderToSearchIn):
-				SubDirs=[x[0] for x in os.walk(FolderToSearchIn)]
-				for dir in SubDirs:
-					#unfortunately FolderToSearchIn appears here as well
-					if dir != FolderToSearchIn:
-						#look for folders according to MatchPattern
-						if MatchPattern.match(dir):
-							DiffDays=(now - os.path.getmtime(dir))/360./24.
-							if DiffDays <= MaxTimeDiffDays:
-								DirsToWorkOn.append(dir)
-								if VerboseFlag:
-									sys.stderr.write(dir+'\n')
-									#pdb.set_trace()
-									#sys.stderr.write('difference to now: '+str(now - os.path.getmtime(dir))/60./60./24.,+' days'+'\n')
-									sys.stderr.write('difference to now: {:5.2f} days'.format(DiffDays)+'\n')
+			if FolderToSearchIn not in Walks:
+				continue
+			for Dir, Data in Walks[FolderToSearchIn]:
+				dict_DirState, Renamed=Data
+				dict_NewState[Dir]=dict_DirState
+				if Renamed is None:
+					continue
+				dir, MTime=Renamed
+				DiffDays=(now - MTime)/3600./24.
+				if DiffDays <= MaxTimeDiffDays:
+					DirsToWorkOn.append(dir)
+					if VerboseFlag:
+						sys.stderr.write(dir+'\n')
+						sys.stderr.write('difference to now: {:5.2f} days'.format(DiffDays)+'\n')
+
+		if UseStateFlag:
+			WriteState(StateFile, dict_NewState)
 
 		if DebugFlag:
 			pdb.set_trace()
+	else:
+		sys.stderr.write('Error: Config file '+c_ConfigFile+' not found. Exiting.\n')
+		sys.exit(2)
 
 	return DirsToWorkOn
 
@@ -85,6 +166,9 @@ if __name__ == '__main__':
 	parser.add_argument("--age", help="max file age in days. Defaults to 2.",default=2)
 	parser.add_argument("--verbose", help="switch on verbosity",action='store_true')
 	parser.add_argument("--listmodels", help="list just the model name, not the model folder.",action='store_true')
+	parser.add_argument("--statefile", help="file to keep the directory state between runs in. Defaults to "+GetDefaultStateFile())
+	parser.add_argument("--nostate", help="do a full scan without using or writing the state file",action='store_true')
+	parser.add_argument("--jobs", help="# of directories to list in parallel. Defaults to {}.".format(DefaultJobs),type=int,default=DefaultJobs)
 	#parser.add_argument("--modelyear", help="model years to run; use 9999 for climatology, leave out for all years; comma separated list")
 
 	args = parser.parse_args()
@@ -106,7 +190,8 @@ if __name__ == '__main__':
 	
 	#MaxTimeDiffDays=2.
 	#pdb.set_trace()
-	DirsToWorkOn=GetModelDirsToWorkOn(MaxTimeDiffDays, VerboseFlag=VerboseFlag)
+	DirsToWorkOn=GetModelDirsToWorkOn(MaxTimeDiffDays, VerboseFlag=VerboseFlag, StateFile=args.statefile, 
+		UseStateFlag=not args.nostate, Jobs=args.jobs)
 	if ListModels is False:
 		for Dir in DirsToWorkOn:
 			sys.stdout.write(Dir+'\n')
@@ -21,55 +21,156 @@ import os
 import argparse
 import sys
 import uuid
+import re
 import socket
 
-def ModAerocomMain(Path, IncFile, VerboseFlag=False, DebugFlag=False):
-	if DebugFlag:
-		pdb.set_trace()
-	if os.path.isdir(Path):
-		FileName=os.path.join(Path,'aerocom_main.pro')
-		OutIncFile=''
-		OutFile=''
-		if os.path.isfile(FileName):
-			with open(FileName) as FHandle:
-				FileString=FHandle.read()
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.FileWriter import FileWriter, PERFILE
+
+#names in aerocom_main.pro that are made unique
+MainName='aerocom_main'
+IncName='IDL_includetemp'
+
+class AerocomMainTemplate:
+	"""aerocom_main.pro of an aerocom-tools directory, read once
+
+	The template is split at the names to replace when it is read, so
+	a specialisation is just a join of the parts.
+	"""
+
+	def __init__(self, Path, VerboseFlag=False, DebugFlag=False):
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		if not os.path.isdir(Path):
+			sys.stderr.write("Error: path does not exist: \n")
+			sys.stderr.write('Exiting.\n')
+			sys.exit(1)
+		self.Path=Path
+		self.FileName=os.path.join(Path,MainName+'.pro')
+		if not os.path.isfile(self.FileName):
+			sys.stderr.write("Error: file not found: "+self.FileName+" \n")
+			sys.stderr.write('Exiting.\n')
+			sys.exit(2)
+		with open(self.FileName) as FHandle:
+			FileString=FHandle.read()
+		#every odd element is one of the names to replace
+		self.Parts=re.split('('+MainName+'|'+IncName+')', FileString)
+
+	def Specialise(self, UUID):
+		"""content of the procedure for UUID"""
+		Names={MainName:MainName+'_'+UUID, IncName:IncName+'_'+UUID}
+		Parts=list(self.Parts)
+		for Index in range(1, len(Parts), 2):
+			Parts[Index]=Names[Parts[Index]]
+		return ''.join(Parts)
+
+	def Write(self, IncFile, Writer=None):
+		"""write the procedure and the include file link for a single job
+
+		returns the file names of both (relative to the tool dir)
+		"""
+		return self.WriteBatch([IncFile], Writer=Writer)[0]
+
+	def WriteBatch(self, IncFiles, Writer=None, SharedFlag=False):
+		"""write the procedures and include file links for a list of jobs
+
+		IncFiles holds the include file of each job. Returns a list with
+		the file names of the procedure and the link for each job.
+		With SharedFlag set, jobs with the same include file share one
+		procedure, so that just one file and one link is written per
+		include file.
+		Writer is the helpers.FileWriter to use; without one each file is
+		synced right away.
+		"""
+		if Writer is None:
+			Writer=FileWriter(PERFILE)
+		RetVal=[]
+		dict_Written={}
+		for IncFile in IncFiles:
+			if SharedFlag and IncFile in dict_Written:
+				RetVal.append(dict_Written[IncFile])
+				continue
 			#create a uuid and append the host name for easier removal later on
 			UUID='_'.join([str(uuid.uuid4()),socket.gethostname()]).replace('-','_')
 			#New procedure name
-			NewMainStr='aerocom_main_'+UUID
-			NewMainFile=NewMainStr+'.pro'
+			NewMainFile=MainName+'_'+UUID+'.pro'
 			#New include file name
-			NewIncStr='IDL_includetemp_'+UUID
-			NewIncFile=NewIncStr+'.pro'
-			FileString=FileString.replace('aerocom_main',NewMainStr)
-			FileString=FileString.replace('IDL_includetemp',NewIncStr)
-			OutFile=FileName.replace('aerocom_main',NewMainStr)
-			with open(OutFile,'w') as FHandle:
-				FHandle.write(FileString)
-				FHandle.flush()
-				os.fsync(FHandle.fileno())
+			NewIncFile=IncName+'_'+UUID+'.pro'
+			Writer.Write(os.path.join(self.Path, NewMainFile), self.Specialise(UUID))
+			#now link the include file to the target
+			Writer.Symlink(IncFile, os.path.join(self.Path, NewIncFile))
+			if self.VerboseFlag:
+				print(NewMainFile)
+			dict_Written[IncFile]=(NewMainFile, NewIncFile)
+			RetVal.append(dict_Written[IncFile])
 
+		if self.DebugFlag:
+			pdb.set_trace()
+		return RetVal
 
-			#now link the include file to the target
-			os.chdir(Path)
-			os.symlink(IncFile, NewIncFile)
-		else:
-			sys.stderr.write("Error: file not found: "+FileName+" \n")
-			sys.stderr.write('Exiting.\n')
-			sys.exit(2)
+	def Restore(self, Files, IncFile, Writer=None):
+		"""write the procedure and the link of Files (as returned by WriteBatch) again
+
+		just the missing ones are written, e.g. when a run is resumed after
+		the files of its first attempt were removed
+		"""
+		if Writer is None:
+			Writer=FileWriter(PERFILE)
+		NewMainFile, NewIncFile=Files
+		UUID=NewMainFile[len(MainName)+1:-len('.pro')]
+		if not os.path.isfile(os.path.join(self.Path, NewMainFile)):
+			Writer.Write(os.path.join(self.Path, NewMainFile), self.Specialise(UUID))
+		if not os.path.lexists(os.path.join(self.Path, NewIncFile)):
+			Writer.Symlink(IncFile, os.path.join(self.Path, NewIncFile))
+
+###################################################################################
+
+class MainFileCleaner:
+	"""remove the files written by AerocomMainTemplate once they are not needed anymore
 
-	else:
-		sys.stderr.write("Error: path does not exist: \n")
-		sys.stderr.write('Exiting.\n')
-		sys.exit(1)
+	Every job using a procedure / link pair is registered with Add(); when
+	a job has finished it calls Release(). The files are removed when the last
+	job using them has released them.
+	"""
 
+	def __init__(self, Path, VerboseFlag=False):
+		self.Path=Path
+		self.VerboseFlag=VerboseFlag
+		self.RefCounts={}
 
-	if VerboseFlag:
-		print(OutFile)
+	def Add(self, Files):
+		"""register a job using Files (the tuple returned by AerocomMainTemplate.Write)"""
+		self.RefCounts[Files]=self.RefCounts.get(Files, 0)+1
+
+	def Release(self, Files):
+		"""a job using Files has finished; remove them if it was the last one"""
+		self.RefCounts[Files]-=1
+		if self.RefCounts[Files] > 0:
+			return
+		del self.RefCounts[Files]
+		for FileName in Files:
+			try:
+				os.remove(os.path.join(self.Path, FileName))
+			except FileNotFoundError:
+				pass
+		if self.VerboseFlag:
+			sys.stderr.write('Removed '+', '.join(Files)+'\n')
+
+###################################################################################
+
+def ModAerocomMain(Path, IncFile, VerboseFlag=False, DebugFlag=False, Writer=None):
+	#make a copy of aerocom_main.pro unique to the include file IncFile
+	#returns the file name of the copy and of the link to the include file
+	#relative to Path
+	#Writer is the helpers.FileWriter to use; without one the file is synced right away
+	#Use AerocomMainTemplate to do this for many jobs; the template is then read only once
+	if DebugFlag:
+		pdb.set_trace()
+	Template=AerocomMainTemplate(Path, VerboseFlag=VerboseFlag)
+	OutFile, NewIncFile=Template.Write(IncFile, Writer=Writer)
 	if DebugFlag:
 		pdb.set_trace()
-
-	OutFile=os.path.basename(OutFile)
 
 	return OutFile, NewIncFile
 
@@ -83,21 +184,15 @@ if __name__ == '__main__':
 	''')
 	#parser.add_argument("mainfile", help="aerocom main filename to use as template")
 	parser.add_argument("aerocomdir", help="directory of the aerocom-tools (location of aerocom_main.pro)")
-	parser.add_argument("incfile", help="include file to link RELATIVE to aerocomdir, or with absolute path")
+	parser.add_argument("incfile", help="include file to link RELATIVE to aerocomdir, or with absolute path; several can be given", nargs='+')
 	#parser.add_argument("incfile", help="IDL include file to use as template")
 	parser.add_argument("-c","--commasep", help="return get a comma separated list",action='store_true')
 	args = parser.parse_args()
-	try:
-		OutFile, OutIncFile=ModAerocomMain(args.aerocomdir, args.incfile, VerboseFlag=False, DebugFlag=False)
-	except:
-		#this will never be called since we need only mandantory arguments
-		pass
+	Template=AerocomMainTemplate(args.aerocomdir)
+	Files=Template.WriteBatch(args.incfile)
 
-	try:
+	for OutFile, OutIncFile in Files:
 		if args.commasep:
 			sys.stdout.write(','.join([OutFile,OutIncFile])+'\n')
 		else:
 			sys.stdout.write('\n'.join([OutFile,OutIncFile])+'\n')
-	except NameError:
-		sys.exit(1)
-
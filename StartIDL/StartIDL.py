@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
 ################################################################
-# WriteIDLIncludeFile.py
+# StartIDL.py
 #
-# program to write an IDL include file for a given aerocom
-# variable
+# functions to start idl: single runs, a bounded number of runs
+# in parallel (IDLExecutor) or a pool of long running idl workers
 #
 #################################################################
 # Created 20170208 by Jan Griesfeller for Met Norway
@@ -15,6 +15,13 @@
 import pdb
 from multiprocessing import Process
 import os
+import sys
+import concurrent.futures
+
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.IDLWorkerPool import IDLWorkerPool
+from helpers.IDLScheduler import IDLScheduler
 
 
 def GetIDLLoc( VerboseFlag=False, DebugFlag=False):
@@ -103,50 +110,174 @@ def StartIDLSingleThread(MainProg, IDL=None, WorkDir=None, IncFile=None, Verbose
 
 ##############################################################
 
+class IDLExecutor:
+	"""bounded parallel executor for the idl runs
+
+	Runs commands (e.g. StartScreenWithLogging.sh calls) with at most
+	MaxNumOfTasks idl instances at once using helpers.IDLScheduler.
+	Submit() returns a concurrent.futures.Future per command; its result is
+	a dict with the keys Cmd, SessionName, ReturnCode, StartTime, EndTime,
+	WallTime (seconds) and Lost (True if the screen session of the command
+	was never seen, see helpers.IDLScheduler).
+	A future can be cancelled with its cancel() method as long as the
+	command has not been started; Cancel() can also kill a running one.
+	Run() blocks until all commands have finished; the futures' done
+	callbacks are called from within Run().
+	SlotManager (a helpers.SlotManager.SlotManager) adds a cluster wide
+	limit on top of MaxNumOfTasks, Admission (a helpers.Admission.AdmissionControl)
+	one based on the free memory and the load of the host.
+	"""
+
+	def __init__(self, MaxNumOfTasks, WorkDir=None, user=None, SlotManager=None, Admission=None,
+		VerboseFlag=False, DebugFlag=False):
+		self.Scheduler=IDLScheduler(MaxNumOfTasks, WorkDir=WorkDir, user=user, SlotManager=SlotManager,
+			Admission=Admission, VerboseFlag=VerboseFlag)
+		self.Futures=[]
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+
+	def Submit(self, Cmd, SessionName=None, Cost=None, OnStart=None):
+		"""queue a command; returns its future
+
+		Cost is the estimated memory use of the command (see helpers.Admission)
+		OnStart is called without arguments when the command is started
+		"""
+		Future=concurrent.futures.Future()
+		Job=self.Scheduler.Submit(Cmd, SessionName=SessionName, Cost=Cost,
+			OnStart=lambda Job: self._JobStart(Future, OnStart),
+			OnDone=self._JobDone)
+		Job['Future']=Future
+		Future.Job=Job
+		self.Futures.append(Future)
+		return Future
+
+	def _JobStart(self, Future, OnStart):
+		if not Future.set_running_or_notify_cancel():
+			return False
+		if OnStart is not None:
+			OnStart()
+		return True
+
+	def _JobDone(self, Job):
+		Future=Job['Future']
+		if Future.cancelled():
+			return
+		if Job['StartTime'] is None:
+			#cancelled via Cancel() before it was started
+			Future.cancel()
+			Future.set_running_or_notify_cancel()
+			return
+		RetVal={}
+		RetVal['Cmd']=Job['Cmd']
+		RetVal['SessionName']=Job['SessionName']
+		RetVal['ReturnCode']=Job['ReturnCode']
+		RetVal['Lost']=Job['Lost']
+		RetVal['StartTime']=Job['StartTime']
+		RetVal['EndTime']=Job['EndTime']
+		RetVal['WallTime']=Job['EndTime']-Job['StartTime']
+		RetVal['Killed']=Job['Cancelled']
+		Future.set_result(RetVal)
+
+	def Cancel(self, Future, KillFlag=False):
+		"""cancel the command of Future; with KillFlag also if it is running already
+
+		returns True if the command was cancelled
+		"""
+		if Future.cancel():
+			#not started yet; take it out of the queue right away
+			self.Scheduler.Cancel(Future.Job)
+			return True
+		return self.Scheduler.Cancel(Future.Job, KillFlag=KillFlag)
+
+	def CancelAll(self, KillFlag=False):
+		"""cancel all commands not started yet; with KillFlag the running ones as well"""
+		for Future in self.Futures:
+			self.Cancel(Future, KillFlag=KillFlag)
+
+	def Run(self):
+		"""run the queued commands; returns the futures of all commands"""
+		self.Scheduler.Run()
+		if self.DebugFlag:
+			pdb.set_trace()
+		return self.Futures
+
+##############################################################
+
 def StartIDLMultiThreaded(MainProg, WorkDir=None, IncFile=None, 
-	VerboseFlag=False, DebugFlag=False):
+	VerboseFlag=False, DebugFlag=False, MaxNumOfTasks=None, IDL=None):
 
 	#this will start idl multitreaded with the indicated # of instances
-	#at once
-	#once all idl instances have finished, their output is returned
+	#at once (default: half the # of cpus)
+	#each idl statement in MainProg is run in its own detached screen session
+	#once all idl instances have finished, a list with the result dict
+	#of each statement (see IDLExecutor) is returned
+	#None for the ones that were cancelled
 
 	import multiprocessing
+	import socket
 
-	IDL=GetIDLLoc()
+	if IDL == None: 
+		IDL=GetIDLLoc()
 	if VerboseFlag:
 		print('IDL:',IDL)
 
-	count = multiprocessing.cpu_count()
-	#pool = multiprocessing.Pool(processes=count)
-	RetData=[]
-	#print pool.map(StartIDLSingleThread, MainProg, IDL, WorkDir=WorkDir, )
-	#pool.apply_async(StartIDLSingleThread, MainProg[0], IDL, WorkDir=WorkDir, RetVal.append())
-	keywords={'WorkDir':WorkDir,'VerboseFlag':False,'DebugFlag':False}
+	if MaxNumOfTasks is None:
+		MaxNumOfTasks=max(1, multiprocessing.cpu_count()//2)
 
+	Executor=IDLExecutor(MaxNumOfTasks, WorkDir=WorkDir, VerboseFlag=VerboseFlag)
+	for Index, Cmd in enumerate(MainProg):
+		SessionName='_'.join(['StartIDL',socket.gethostname(),str(os.getpid()),str(Index)])
+		Executor.Submit(['screen', '-d', '-L', '-m', '-S', SessionName, IDL, '-e', Cmd])
 
-	Pool=multiprocessing.Pool(processes=4)
-	for Cmd in MainProg:
-		#process = multiprocessing.Process(target=StartIDLSingleThread, args=(Cmd,IDL,),
-			#kwargs=keywords)
-		#process.start()
-		result = Pool.apply_async(StartIDLSingleThread, (Cmd,IDL,), keywords)
-		RetData.append(result)
+	try:
+		Futures=Executor.Run()
+	except KeyboardInterrupt:
+		#do not start anything else, but leave the running idls alone
+		Executor.CancelAll()
+		raise
 
-	
+	RetVal=[]
+	for Future in Futures:
+		if Future.cancelled():
+			RetVal.append(None)
+		else:
+			RetVal.append(Future.result())
 
 	if DebugFlag:
 		pdb.set_trace()
-	
 
-	if VerboseFlag:
-		print(RetVal.stdout)
+	return RetVal
+
+##############################################################
+
+def StartIDLWorkerPool(MainProg, NumOfWorkers, SpoolDir, IDL=None, WorkDir=None, RunLogDir=None,
+	VerboseFlag=False, DebugFlag=False):
+
+	#run the idl statements in the list MainProg in NumOfWorkers idl instances
+	#that are started only once (see helpers/IDLWorkerPool.py)
+	#IDL can also be a list, e.g. to use StartIDL/StubIDL.py for testing
+	#with RunLogDir, the output of every statement is put into a runlog there
+	#returns the job dicts in the order the jobs have finished
+
+	if IDL == None: 
+		IDL=GetIDLLoc()
+	if not isinstance(IDL, list):
+		IDL=[IDL]
+
+	Pool=IDLWorkerPool(NumOfWorkers, SpoolDir, IDL, WorkDir=WorkDir, RunLogDir=RunLogDir, VerboseFlag=VerboseFlag)
+	for Cmd in MainProg:
+		Pool.Submit(Cmd)
+	try:
+		RetVal=Pool.Run()
+	finally:
+		Pool.Stop()
+
 	if DebugFlag:
 		pdb.set_trace()
 
 	return RetVal
 
 
-
 if __name__ == '__main__':
 	#MainProg='/home/jang/data/aerocom-tools/aerocom_main_testing'
 	#MainProg='aerocom_main_testing'
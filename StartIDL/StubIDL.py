@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+################################################################
+# StubIDL.py
+#
+# stand in for idl to test the idl worker pool (helpers/IDLWorkerPool.py)
+# without idl
+#
+# Understands just the driver call the pool passes with -e (-queue is
+# ignored) and then works the jobs of its worker directory like the idl
+# driver ata_worker does. A job is not executed but printed, then the
+# stub sleeps $STUBIDL_SLEEP seconds (default 0.1) and ends the output
+# of a successful job with 'total size' like the aerocom-tools do.
+# A statement containing FAIL is reported as failed, one containing
+# DIE makes the stub exit without reporting anything.
+#
+# usage: StubIDL.py [-queue] -e "<driver call>"
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import re
+import sys
+import time
+
+if __name__ == '__main__':
+	Args=[x for x in sys.argv[1:] if x != '-queue']
+	if len(Args) != 2 or Args[0] != '-e':
+		sys.stderr.write('usage: StubIDL.py [-queue] -e "<driver call>"\n')
+		sys.exit(1)
+	Match=re.search(r",'([^']*)'$", Args[1])
+	if Match is None:
+		sys.stderr.write('Error: not a driver call: '+Args[1]+'\n')
+		sys.exit(1)
+	WorkerDir=Match.group(1)
+	SleepTime=float(os.environ.get('STUBIDL_SLEEP', '0.1'))
+
+	while True:
+		JobFiles=sorted([x for x in os.listdir(WorkerDir) if x.endswith('.job')])
+		if len(JobFiles) == 0:
+			if os.path.exists(os.path.join(WorkerDir, 'STOP')):
+				break
+			time.sleep(0.2)
+			continue
+		Base=os.path.join(WorkerDir, JobFiles[0][:-4])
+		with open(Base+'.job') as InHandle:
+			Statement=InHandle.readline().strip()
+		os.rename(Base+'.job', Base+'.run')
+		sys.stdout.write(Statement+'\n')
+		sys.stdout.flush()
+		if 'DIE' in Statement:
+			sys.exit(1)
+		time.sleep(SleepTime)
+		Status=0 if 'FAIL' in Statement else 1
+		if Status == 1:
+			sys.stdout.write('total size 0\n')
+			sys.stdout.flush()
+		with open(Base+'.tmp', 'w') as OutHandle:
+			OutHandle.write(str(Status)+'\n')
+		os.rename(Base+'.tmp', Base+'.done')
+		os.remove(Base+'.run')
@@ -17,618 +17,104 @@ import pdb
 import argparse 
 import sys
 import os
+import functools
+import types
+import pickle
+import configparser
+import hashlib
+
+#the helpers package lives in the parent directory
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.FileWriter import FileWriter, PERFILE
+
+def GetFragmentFile():
+	#default location of the include file fragment catalogue:
+	#includefile_fragments.ini next to constants.ini
+	return os.path.join(os.path.dirname(os.path.realpath(__file__)),'..','includefile_fragments.ini')
+
+def GetFragmentCacheFile(FragmentFile):
+	#pickle cache of a fragment catalogue in the user's own directory; the
+	#install directory is shared and may not be writable
+	#one file per catalogue, so that several installs do not overwrite each other's cache
+	Name=hashlib.sha1(os.path.realpath(FragmentFile).encode()).hexdigest()[:12]
+	return os.path.join(os.path.expanduser('~'),'.aerocom-tool-automation','includefile_fragments_'+Name+'.pickle')
 
-def GetIDLIncludeFileText(Group, Variable, all=False):
-	#function to store and return parts of include files
-	#The dictionary holding the include file data is divided in several sections (sub dictionaries)
-	#-COMMON
-	# Holds the common part of the include file. All include files will get this part
-	# Note that these parameters might get overwritten later on
-	#
-	#-FLAGS
-	# Holds single flags that can be switched on via command line options
-	# e.g. NOSEND to switch off the transfer of the resulting images to the web server
-	#
-	#-VARS
-	# Holds the variable specific part of the include file
-	# Also defines variable groups
-	#
-	#-OBSNETWORKS
-	# defines the supported obs networks
-	# Note that these are only the obs networks that can be selected manually
-	# If you use the standard obs networks defined by the aerocom-tools, all are supported
-
-
-	#PLEASE NOTE THAT THE VARIABLE NAMES ARE ACCORDING TO THE AEROCOM PROTOCOL 
-	#AND NOT ACCORDING TO THE AEROCOM-TOOLS
-	
-	#
-	#the htap region names are left out in the common block,
-	#because they use puxel based filters that need to be
-	#in the model resolution
-	#If we want to include that, we need an automatism to calculate the pixel based filters in model 
-	#resolution
+####################################################################################	
+
+def ReadFragmentFile(FragmentFile):
+	#parse the fragment catalogue (see includefile_fragments.ini for the format)
+	#returns a dict of dicts: dict[Group][Variable]=part of the include file
+	ReadConfig=configparser.ConfigParser(interpolation=None, delimiters=('=',),
+		comment_prefixes=('#',), inline_comment_prefixes=None)
+	#variable names are case sensitive
+	ReadConfig.optionxform=str
+	with open(FragmentFile, encoding='utf-8') as InFile:
+		ReadConfig.read_file(InFile)
 
 	dict_IncludeFileData={}
-	#common block
-	#values might get overwritten later on
-	dict_IncludeFileData['COMMON']={}
-	dict_IncludeFileData['COMMON']['COMMON']= """
-		i_PlotMonthlyFlag=1
-		i_VerboseFlag=1
-		i_areaweightflag=1 
-		c_modelmonths=['01','02','03','04','05','06','07','08','09','10','11','12']
-		i_PlotZonalMeansFlag=1
-		i_PlotModelAERONETTimeSeriesFlag=1
-		i_PlotAERONETTimeseriesPlotArr=[iC_YM]
-		s_PlotTableFlag=['SCORE','SCATTERLOG','SCATTERDENSITY','HISTO','SITELOCATION','ZONALOBS','STATMAP-BIAS','STATMAP-R']
-		c_MicStationFilters=['NHEMISPHERE','SHEMISPHERE','CAMS50','WORLD','AUSTRALIA','NAFRICA','NAMERICA','SAMERICA','EUROPE','EASTASIA','ASIA','INDIA','CHINA','WORLD-wMOUNTAINS']
-		c_TimeSlots=[c_ModelMonths]
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=È || MY =3 || MYSeasons =11 
-		i_MakePNG=1
-	"""
-	############ supported special flags #############
-	dict_IncludeFileData['FLAGS']={}
-	dict_IncludeFileData['FLAGS']['NOSUBVARS']= """
-		i_ReadSubVarsFlag=0
-	"""
-	#for the next one needs to define the subvars in a separate section as well
-	dict_IncludeFileData['FLAGS']['SUBVARS']= """
-		i_ReadSubVarsFlag=1
-	"""
-	dict_IncludeFileData['FLAGS']['ADDSUBVARS']= """
-		i_ReadSubVarsFlag=1
-		c_SubVars=strarr(n_elements(c_modelvars),7)
-		c_SubVars[*,*]=['DUMMY']
-		; c_SubVars[0,0:6]=['OD550_SO4', 'OD550_DUST', 'OD550_BC', 'OD550_POM', 'OD550_SS','OD550_NO3','OD550_AERH2O']
-		c_SubVars[0,0:4]=['OD550_SO4', 'OD550_DUST', 'OD550_BC', 'OD550_POM', 'OD550_SS']
-	"""
-	dict_IncludeFileData['FLAGS']['FORECAST']="""
-		i_ReadSubVarsFlag=0
-		c_ObsNetworkDataType=['D']
-		i_PlotMonthlyFlag=1
-		i_VerboseFlag=1
-		i_areaweightflag=1 
-		c_modelmonths=['01','02','03','04','05','06','07','08','09','10','11','12']
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','SAMERICA','SAFRICA','EUROPE','ASIA','AUSTRALIA','INDIA','CHINA','WORLD-wMOUNTAINS']
-		c_TimeSlots=[c_ModelMonths]
-		i_MakePNG=1
-		i_SendFlag=1
-		i_ObsNetworktype=[iC_ObsNet_NONE]
-		i_PlotDailyMapFlag=1
-		i_PlotMapFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-"""
-	dict_IncludeFileData['FLAGS']['NOSEND']="""
-		i_SendFlag=0
-	"""
-	dict_IncludeFileData['FLAGS']['SEND']="""
-		i_SendFlag=1
-	"""
-	dict_IncludeFileData['FLAGS']['NOTIMESERIES']="""
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['FLAGS']['PLOTDAILYTIMESERIES']="""
-		i_PlotAERONETTimeseriesPlotArr=[iC_YM,iC_3MD]
-	"""
-	dict_IncludeFileData['FLAGS']['EXPORT']="""
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-		s_PlotTableFlag=['SITELOCATION']
-		i_WriteStationValues=3
-	"""
-	dict_IncludeFileData['FLAGS']['HTAPFILTERS']= """
-		c_MicStationFilters=['RBUhtap','MCAhtap','SAMhtap','MDEhtap','SAFhtap','NAFhtap','PANhtap', 'EAShtap', 'SAShtap', $
-		'EURhtap','OCNhtap','SEAhtap', 'LANDhtap','NAMhtap','ASIA','WORLD','NAFRICA','NAMERICA','SAMERICA',$
-		'EUROPE','EASTASIA','INDIA','CHINA','WORLD-wMOUNTAINS','NHEMISPHERE','SHEMISPHERE','CAMS50']
-	"""
-	dict_IncludeFileData['FLAGS']['HTAPFILTERSONLY']= """
-		c_MicStationFilters=['RBUhtap','MCAhtap','SAMhtap','MDEhtap','SAFhtap','NAFhtap','PANhtap', 'EAShtap', 'SAShtap', $
-		'EURhtap','OCNhtap','SEAhtap', 'LANDhtap','NAMhtap']
-	"""
-	dict_IncludeFileData['FLAGS']['AODTRENDONLY']="""
-		c_MicStationFilters=['AODTREND']
-	"""
-	dict_IncludeFileData['FLAGS']['AODTREND95ONLY']="""
-		c_MicStationFilters=['AODTREND95']
-	"""
-	dict_IncludeFileData['FLAGS']['AODTRENDS']="""
-		;c_MicStationFilters=['AODTREND95TO12','AODTREND','AODTREND95']
-		c_MicStationFilters=['AODTREND95TO12']
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	############ Variables #######################
-	dict_IncludeFileData['VARS']={}
-	#dict_IncludeFileData['VARS']['']="""
-		#c_ModelVars=['']
-	#"""
-	dict_IncludeFileData['VARS']['alertaer']="""
-		c_ModelVars=['ALERT_AER']
-	"""
-	dict_IncludeFileData['VARS']['alertdust']="""
-		c_ModelVars=['ALERT_AER']
-	"""
-	dict_IncludeFileData['VARS']['scatc550dryaer']="""
-		c_ModelVars=['SCATC550DRY_AER']
-		i_ObsNetworktype=[iC_ObsNet_EBASMultiColumn]
-	"""
-	dict_IncludeFileData['VARS']['ec3553daer']="""
-		c_ModelVars=['EC3553D_AER']
-		I_PLOTPROFILESFLAG=4
-		i_ReadSubVarsFlag=1
-		c_SubVars=strarr(n_elements(c_modelvars),1)
-		c_SubVars[*,*]=['DUMMY']
-		c_SubVars[0,0:0]=['Z3D'];,'EC5503DAER_DRY']
-	"""
-	dict_IncludeFileData['VARS']['ec5323daer']="""
-		c_ModelVars=['EC5323D_AER']
-		I_PLOTPROFILESFLAG=4
-		i_ReadSubVarsFlag=1
-		c_SubVars=strarr(n_elements(c_modelvars),1)
-		c_SubVars[*,*]=['DUMMY']
-		c_SubVars[0,0:0]=['Z3D'];,'EC5503DAER_DRY']
-	"""
-	dict_IncludeFileData['VARS']['od550aer']= """
-		c_ModelVars=['OD550_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['VARS']['od550csaer']= """
-		c_ModelVars=['OD550CS_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['VARS']['od550gt1aer']= """
-		c_ModelVars=['OD550GT1_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunSDADaily]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-	"""
-	dict_IncludeFileData['VARS']['od550lt1aer']= """
-		c_ModelVars=['OD550LT1_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunSDADaily]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-	"""
-	dict_IncludeFileData['VARS']['od550strataer']= """
-		c_ModelVars=['OD550STRAT_AER']
-	"""
-	dict_IncludeFileData['VARS']['od550dust']= """
-		c_ModelVars=['OD550_DUST']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunSDADaily]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-	"""
-	dict_IncludeFileData['VARS']['ang6787aer']= """
-		c_ModelVars=['ANG6787_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['VARS']['ang4487aer']= """
-		c_ModelVars=['ANG4487_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['VARS']['ang4487csaer']= """
-		c_ModelVars=['ANG4487CS_AER']
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['VARS']['od550bc']="""
-		c_ModelVars=['OD550_BC']
-	"""
-	dict_IncludeFileData['VARS']['od550no3']="""
-		c_ModelVars=['OD550_NO3']
-	"""
-	dict_IncludeFileData['VARS']['od550oa']="""
-		c_ModelVars=['OD550_OA']
-	"""
-	dict_IncludeFileData['VARS']['od550so4']="""
-		c_ModelVars=['OD550_SO4']
-	"""
-
-	dict_IncludeFileData['VARS']['wetdust']="""
-		c_ModelVars=['WET_DUST']
-	"""
-	dict_IncludeFileData['VARS']['wetso4']="""
-		c_ModelVars=['WET_SO4']
-	"""
-	dict_IncludeFileData['VARS']['wetbc']="""
-		c_ModelVars=['WET_BC']
-	"""
-	dict_IncludeFileData['VARS']['wetpom']="""
-		c_ModelVars=['WET_POM']
-	"""
-	dict_IncludeFileData['VARS']['wetss']="""
-		c_ModelVars=['WET_SS']
-	"""
-	dict_IncludeFileData['VARS']['wetoxn']="""
-		c_ModelVars=['WET_OXN']
-	"""
-	dict_IncludeFileData['VARS']['wetrdn']="""
-		c_ModelVars=['WET_RDN']
-	"""
-
-	dict_IncludeFileData['VARS']['emidust']="""
-		c_ModelVars=['EMI_DUST']
-	"""
-	dict_IncludeFileData['VARS']['emiso4']="""
-		c_ModelVars=['EMI_SO4']
-	"""
-	dict_IncludeFileData['VARS']['emiso2']="""
-		c_ModelVars=['EMI_SO2']
-	"""
-	dict_IncludeFileData['VARS']['emibc']="""
-		c_ModelVars=['EMI_BC']
-	"""
-	dict_IncludeFileData['VARS']['emipom']="""
-		c_ModelVars=['EMI_POM']
-	"""
-	dict_IncludeFileData['VARS']['emiss']="""
-		c_ModelVars=['EMI_SS']
-	"""
-	dict_IncludeFileData['VARS']['emino3']="""
-		c_ModelVars=['EMI_NO3']
-	"""
-	dict_IncludeFileData['VARS']['emioa']="""
-		c_ModelVars=['EMI_OA']
-	"""
-	dict_IncludeFileData['VARS']['eminox']="""
-		c_ModelVars=['EMI_NOX']
-	"""
-	dict_IncludeFileData['VARS']['emidms']="""
-		c_ModelVars=['EMI_DMS']
-	"""
-
-	dict_IncludeFileData['VARS']['drydust']="""
-		c_ModelVars=['DRY_DUST']
-	"""
-	dict_IncludeFileData['VARS']['dryso4']="""
-		c_ModelVars=['DRY_SO4']
-	"""
-	dict_IncludeFileData['VARS']['drybc']="""
-		c_ModelVars=['DRY_BC']
-	"""
-	dict_IncludeFileData['VARS']['drypom']="""
-		c_ModelVars=['DRY_POM']
-	"""
-	dict_IncludeFileData['VARS']['dryss']="""
-		c_ModelVars=['DRY_SS']
-	"""
-	dict_IncludeFileData['VARS']['depdust']="""
-		c_ModelVars=['DEP_DUST']
-		i_ObsNetworktype=[iC_ObsNet_None]
-	"""
-	dict_IncludeFileData['VARS']['depso4']="""
-		c_ModelVars=['DEP_SO4']
-	"""
-	dict_IncludeFileData['VARS']['depbc']="""
-		c_ModelVars=['DEP_BC']
-	"""
-	dict_IncludeFileData['VARS']['deppom']="""
-		c_ModelVars=['DEP_POM']
-	"""
-	dict_IncludeFileData['VARS']['depss']="""
-		c_ModelVars=['DEP_SS']
-	"""
-	dict_IncludeFileData['VARS']['depno3']="""
-		c_ModelVars=['DEP_NO3']
-	"""
-	dict_IncludeFileData['VARS']['depoa']="""
-		c_ModelVars=['DEP_OA']
-	"""
-###
-	dict_IncludeFileData['VARS']['seddust']="""
-		c_ModelVars=['SED_DUST']
-	"""
-	dict_IncludeFileData['VARS']['sedso4']="""
-		c_ModelVars=['SED_SO4']
-	"""
-	dict_IncludeFileData['VARS']['sedbc']="""
-		c_ModelVars=['SED_BC']
-	"""
-	dict_IncludeFileData['VARS']['sedpom']="""
-		c_ModelVars=['SED_POM']
-	"""
-	dict_IncludeFileData['VARS']['sedss']="""
-		c_ModelVars=['SED_SS']
-	"""
-###
-	dict_IncludeFileData['VARS']['loaddust']="""
-		c_ModelVars=['LOAD_DUST']
-	"""
-	dict_IncludeFileData['VARS']['loadso4']="""
-		c_ModelVars=['LOAD_SO4']
-	"""
-	dict_IncludeFileData['VARS']['loadbc']="""
-		c_ModelVars=['LOAD_BC']
-	"""
-	dict_IncludeFileData['VARS']['loadpom']="""
-		c_ModelVars=['LOAD_POM']
-	"""
-	dict_IncludeFileData['VARS']['loadss']="""
-		c_ModelVars=['LOAD_SS']
-	"""
-	dict_IncludeFileData['VARS']['loadno3']="""
-		c_ModelVars=['LOAD_NO3']
-	"""
-###
-###
-	dict_IncludeFileData['VARS']['sconcbc']="""
-		c_ModelVars=['SCONC_BC']
-	"""
-	dict_IncludeFileData['VARS']['sconcdust']="""
-		c_ModelVars=['SCONC_DUST']
-	"""
-	dict_IncludeFileData['VARS']['sconcnh3']="""
-		c_ModelVars=['SCONC_NH3']
-	"""
-	dict_IncludeFileData['VARS']['sconcnh4']="""
-		c_ModelVars=['SCONC_NH4']
-	"""
-	dict_IncludeFileData['VARS']['sconcno2']="""
-		c_ModelVars=['SCONC_NO2']
-	"""
-	dict_IncludeFileData['VARS']['sconcno3']="""
-		c_ModelVars=['SCONC_NO3']
-	"""
-	dict_IncludeFileData['VARS']['sconcpm10']="""
-		c_ModelVars=['SCONC_PM10']
-	"""
-	dict_IncludeFileData['VARS']['sconcpm25']="""
-		c_ModelVars=['SCONC_PM25']
-	"""
-	dict_IncludeFileData['VARS']['sconcpom']="""
-		c_ModelVars=['SCONC_POM']
-	"""
-	dict_IncludeFileData['VARS']['sconcso4']="""
-		c_ModelVars=['SCONC_SO4']
-	"""
-	dict_IncludeFileData['VARS']['sconcso2']="""
-		c_ModelVars=['SCONC_SO2']
-	"""
-	dict_IncludeFileData['VARS']['sconctno3']="""
-		c_ModelVars=['SCONC_TNO3']
-	"""
-	dict_IncludeFileData['VARS']['sconcss']="""
-		c_ModelVars=['SCONC_SS']
-	"""
-	dict_IncludeFileData['VARS']['sconcoa']="""
-		c_ModelVars=['SCONC_OA']
-	"""
-	dict_IncludeFileData['VARS']['vmro3']="""
-		c_ModelVars=['VMR_O3']
-	"""
-	dict_IncludeFileData['VARS']['vmro3max']="""
-		c_ModelVars=['VMR_O3MAX']
-	"""
-	dict_IncludeFileData['VARS']['vmrco']="""
-		c_ModelVars=['VMR_CO']
-	"""
-	dict_IncludeFileData['VARS']['vmrso2']="""
-		c_ModelVars=['SCONC_SO2']
-	"""
-	dict_IncludeFileData['VARS']['vmrurbo3']="""
-		c_ModelVars=['VMRURB_O3']
-	"""
-	dict_IncludeFileData['VARS']['vmrurbo3max']="""
-		c_ModelVars=['VMRURB_O3MAX']
-	"""
-	dict_IncludeFileData['VARS']['vmr3do3']="""
-		c_ModelVars=['VMR3D_O3']
-		i_ReadSubVarsFlag=1
-		c_SubVars=strarr(n_elements(c_modelvars),7)
-		c_SubVars[*,*]=['DUMMY']
-		c_SubVars[0,0]=['PMID']
-		c_ObsNetworkDataType=['D']
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-		I_PLOTPROFILESFLAG=4
-		i_ReadStationBasedModelData=1
-	"""
-	### mmr variables
-	dict_IncludeFileData['VARS']['mmrss']="""
-		c_ModelVars=['SCONC_SS']
-	"""
-	dict_IncludeFileData['VARS']['mmrdust']="""
-		c_ModelVars=['SCONC_DUST']
-	"""
-	dict_IncludeFileData['VARS']['mmroa']="""
-		c_ModelVars=['SCONC_OA']
-	"""
-	dict_IncludeFileData['VARS']['mmrbc']="""
-		c_ModelVars=['SCONC_BC']
-	"""
-	dict_IncludeFileData['VARS']['mmrno3']="""
-		c_ModelVars=['SCONC_NO3']
-	"""
-	dict_IncludeFileData['VARS']['mmrnh4']="""
-		c_ModelVars=['SCONC_NH4']
-	"""
-	dict_IncludeFileData['VARS']['vmrdms']="""
-		c_ModelVars=['VMR_DMS']
-	"""
-	dict_IncludeFileData['VARS']['mmrso4']="""
-		c_ModelVars=['SCONC_SO4']
-	"""
-	### mmr variables end
-	dict_IncludeFileData['VARS']['abs550aer']="""
-		c_ModelVars=['ABS550_AER']
-	"""
-	dict_IncludeFileData['VARS']['abs550aercs']="""
-		c_ModelVars=['ABS550CS_AER']
-	"""
-	dict_IncludeFileData['VARS']['abs550csaer']="""
-		c_ModelVars=['ABS550CS_AER']
-	"""
-	dict_IncludeFileData['VARS']['ssa440aer']="""
-		c_ModelVars=['SSA440_AER']
-	"""
-	dict_IncludeFileData['VARS']['ssa550aer']="""
-		c_ModelVars=['SSA550_AER']
-	"""
-	dict_IncludeFileData['VARS']['ssa670aer']="""
-		c_ModelVars=['SSA670_AER']
-	"""
-	dict_IncludeFileData['VARS']['ssa865aer']="""
-		c_ModelVars=['SSA865_AER']
-	"""
-	dict_IncludeFileData['VARS']['ssa1020aer']="""
-		c_ModelVars=['SSA1020_AER']
-	"""
-	dict_IncludeFileData['VARS']['zdust']="""
-		c_ModelVars=['Z_DUST']
-	"""
-	dict_IncludeFileData['VARS']['zaerosol']="""
-		c_ModelVars=['Z_AEROSOL']
-	"""
-	dict_IncludeFileData['VARS']['meteoprec']="""
-		c_ModelVars=['METEO_PREC']
-	"""
-	dict_IncludeFileData['VARS']['concprcpso4']="""
-		c_ModelVars=['CONCPRCP_SO4']
-	"""
-	dict_IncludeFileData['VARS']['concprcpno3']="""
-		c_ModelVars=['CONCPRCP_NO3']
-	"""
-	dict_IncludeFileData['VARS']['concprcpnh4']="""
-		c_ModelVars=['CONCPRCP_NH4']
-	"""
-	dict_IncludeFileData['VARS']['tcolno2']="""
-		c_ModelVars=['TCOL_NO2']
-	"""
-	#dict_IncludeFileData['VARS']['']="""
-		#c_ModelVars=['']
-	#"""
-	########### supported variable groups ################
-	dict_IncludeFileData['VARS']['ALL']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=['ALL']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-	"""
-	dict_IncludeFileData['VARS']['mapsannualod']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='D' 
-		c_ModelVars=[OD550_AER','OD550GT1_AER','OD550LT1_AER','ANG4487_AER','OD550_DUST','OD550_SO4','OD550_BC','OD550_POM','OD550_SS']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['mapsannual']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=['OD550_AER','OD550GT1_AER','OD550LT1_AER','ANG4487_AER','ABS550_AER','ABSC550_AER','SSA_BC','SSA_AER','ABS550_BC', $
-'SCONC_DUST','SCONC_SO4','SCONC_BC','SCONC_POM','SCONC_SS', 'SCONC_NO3', 'SCONC_NH3',$
-'LOAD_DUST','LOAD_SO4','LOAD_BC','LOAD_POM','LOAD_SS','LOAD_NO3', 'LOAD_NH3', $
-'OD550_DUST','OD550_SO4','OD550_BC','OD550_POM','OD550_SS']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['mapsbc']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=['ABS550_AER','ABSC550_AER','SSA_BC','SSA_AER','ABS550_BC', 'ABS550_DUST',$ 
-		 'SCONC_BC','EMI_BC','LOAD_BC','LOAD_DUST','EMI_DUST','SCONC_DUST',$
-		 'WET_BC','DEP_BC','OD550_BC','OD550_DUST','MABS550_BC','MABS550_AER', $
-		 'SWTOAAS_BCFFANT','SWTOAAS_BBANT','SWTOACS_BCFFANT','SWTOACS_BBANT']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['mapsdust']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=[c_ModelVars=['OD550_AER','OD550GT1_AER','OD550LT1_AER','ANG4487_AER','ABS550_AER', $
-			'SCONC_DUST','EMI_DUST','LOAD_DUST','WET_DUST','DRY_DUST','SED_DUST','DEP_DUST','OD550_DUST']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['mapsfluxes']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=['EMI_DUST','EMI_SO4','EMI_BC','EMI_POM','EMI_SS', 'EMI_SO2','EMI_DMS',$
-			'WET_DUST','WET_SO4','WET_BC','WET_POM','WET_SS', $
-			'DEP_DUST','DEP_SO4','DEP_BC','DEP_POM','DEP_SS', $
-			'DRY_DUST','DRY_SO4','DRY_BC','DRY_POM','DRY_SS', $
-			'SED_DUST','SED_SO4','SED_BC','SED_POM','SED_SS']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['mapsod']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','EUROPE','CWE1','DWE1','DWE2']
-		c_ModelVars=['OD550_AER','OD550_DUST','OD550_SO4','OD550_BC','OD550_OA','OD550_SS','OD550_NO3','OD550_SOA','OD550_NH4']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['maps']="""
-		i_areaweightflag=1
-		i_ObsNetworktype=[iC_ObsNet_None]
-		c_ModelDataType='M' 
-		c_MicStationFilters=['WORLD','NAFRICA','NAMERICA','EUROPE','EASTASIA']
-		c_ModelVars=['OD550_AER','OD550GT1_AER','OD550LT1_AER','ANG4487_AER','ABS550_AER','ABSC550_AER','SSA_BC','SSA_AER','ABS550_BC', $
-			'SCONC_DUST','SCONC_SO4','SCONC_BC','SCONC_POM','SCONC_SS', $
-			'LOAD_DUST','LOAD_SO4','LOAD_BC','LOAD_POM','LOAD_SS', $
-			'OD550_DUST','OD550_SO4','OD550_BC','OD550_POM','OD550_SS']
-		i_PlotMapFlag=11 ; none=0 || M=1 || Y=2 || MY=3
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-	"""
-	dict_IncludeFileData['VARS']['forcingmaps']="""
-		c_ModelVars=['SWTOAAS_ANT','SWTOAAS_BCFFANT','SWTOAAS_SO4ANT','SWTOAAS_OAFFANT','SWTOAAS_SOAANT',$
-		'SWTOAAS_BBANT','SWTOAAS_NO3ANT','SWTOACS_ANT','SWTOACS_BCFFANT','SWTOACS_SO4ANT',$
-		'SWTOACS_OAFFANT','SWTOACS_SOAANT','SWTOACS_BBANT','SWTOACS_NO3ANT']
-		c_ModelDataType='M' 
-		i_ObsNetworktype=[iC_ObsNet_None]
-		i_PlotZonalMeansFlag=0
-		i_PlotModelAERONETTimeSeriesFlag=0
-		s_PlotTableFlag=['']
-	"""
-
-	########### Supported Obs networks #####################
-	dict_IncludeFileData['OBSNETWORKS']={}
-	dict_IncludeFileData['OBSNETWORKS']['AERONETSun2.0']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunRaw20]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['AERONETSunNRT']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunNRT]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['EBASMC']= """
-		i_ObsNetworktype=[iC_ObsNet_EBASMultiColumn]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['EAAQeRep']= """
-		i_ObsNetworktype=[iC_ObsNet_AirbaseEEA]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['AeronetSunSDADaily']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunSDADaily]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['AeronetSunV3L15Daily']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L15Daily]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['AeronetSunV3L20Daily']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSunV3L20Daily]
-	"""
-	dict_IncludeFileData['OBSNETWORKS']['AeronetSDAV3L20Daily']= """
-		i_ObsNetworktype=[iC_ObsNet_AeronetSDAV3L20]
-	"""
+	for Group in ReadConfig.sections():
+		dict_IncludeFileData[Group]={}
+		for Variable in ReadConfig.options(Group):
+			Lines=ReadConfig.get(Group, Variable).strip('\n').split('\n')
+			dict_IncludeFileData[Group][Variable]='\n'+'\n'.join(['\t\t'+x for x in Lines])+'\n\t'
+	return dict_IncludeFileData
+
+####################################################################################	
+
+@functools.lru_cache(maxsize=None)
+def GetIncludeFileData(FragmentFile=None):
+	#function to return the parts of include files
+	#The parts live in the fragment catalogue includefile_fragments.ini
+	#(see there for the groups). The file is only read when the first
+	#part is needed; the parsed catalogue is kept in a pickle file (see
+	#GetFragmentCacheFile) which is renewed when the mtime or size of the
+	#catalogue changes.
+	#The returned mapping is read only since every caller gets the same object
+	if FragmentFile is None:
+		FragmentFile=GetFragmentFile()
+	try:
+		Stat=os.stat(FragmentFile)
+	except OSError:
+		sys.stderr.write('Error: include file fragment catalogue not found: '+FragmentFile+'\n')
+		sys.stderr.write('Exiting now.\n')
+		sys.exit(1)
+	CacheKey=[os.path.realpath(FragmentFile), Stat.st_mtime_ns, Stat.st_size]
+	CacheFile=GetFragmentCacheFile(FragmentFile)
+
+	dict_IncludeFileData=None
+	try:
+		with open(CacheFile,'rb') as InFile:
+			dict_Cache=pickle.load(InFile)
+		if dict_Cache['key'] == CacheKey:
+			dict_IncludeFileData=dict_Cache['data']
+	except (OSError, EOFError, ValueError, KeyError, TypeError, pickle.UnpicklingError):
+		#no or unusable cache file
+		pass
+
+	if dict_IncludeFileData is None:
+		dict_IncludeFileData=ReadFragmentFile(FragmentFile)
+		#write the cache atomically; not being able to write it is not an error
+		TmpFile=CacheFile+'.'+str(os.getpid())+'.tmp'
+		try:
+			os.makedirs(os.path.dirname(CacheFile), exist_ok=True)
+			with open(TmpFile,'wb') as OutFile:
+				pickle.dump({'key':CacheKey, 'data':dict_IncludeFileData}, OutFile, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(TmpFile, CacheFile)
+		except OSError:
+			try:
+				os.remove(TmpFile)
+			except OSError:
+				pass
+
+	return types.MappingProxyType({x:types.MappingProxyType(dict_IncludeFileData[x]) for x in dict_IncludeFileData})
+
+####################################################################################	
+
+def GetIDLIncludeFileText(Group, Variable, all=False):
+	#return a part of an include file (see includefile_fragments.ini for the groups)
+	#or all of them if all is True
+	dict_IncludeFileData=GetIncludeFileData()
+
 	#what we return might depend on the variables and some features at some point
 	#but keep it simple for now, but save space with the common block
 
@@ -641,10 +127,10 @@ def GetIDLIncludeFileText(Group, Variable, all=False):
 
 ####################################################################################	
 
-def WriteIDLIncludeFile(dict_Param, VerboseFlag=False, DebugFlag=False, ExitFlag=False):
+def GetIDLIncludeFileContent(dict_Param):
 	#In this procedure we put together the pieces the user wants to an IDL include file
+	#returns the content of the include file
 	
-	OutFile=dict_Param['IDLOutFile']
 	RetValArr=[]
 	#Handle specialities
 	#This is the standard:
@@ -755,11 +241,21 @@ def WriteIDLIncludeFile(dict_Param, VerboseFlag=False, DebugFlag=False, ExitFlag
 	#We might want to add some error messages in case the OutFile is not writable
 	RetValArr.append('')
 	RetVal='\n'.join(RetValArr)
-	OutHandle=open(OutFile, 'w')
-	BytesWritten=OutHandle.write(RetVal)
-	OutHandle.flush()
-	os.fsync(OutHandle.fileno())
 
+	return RetVal
+
+####################################################################################	
+
+def WriteIDLIncludeFile(dict_Param, VerboseFlag=False, DebugFlag=False, ExitFlag=False, Writer=None):
+	#write the IDL include file dict_Param['IDLOutFile'] 
+	#for the variable and flags given in dict_Param
+	#Writer is the helpers.FileWriter to use; without one the file is synced right away
+	
+	OutFile=dict_Param['IDLOutFile']
+	RetVal=GetIDLIncludeFileContent(dict_Param)
+	if Writer is None:
+		Writer=FileWriter(PERFILE)
+	Writer.Write(OutFile, RetVal)
 
 	if VerboseFlag:
 		print(RetVal)
@@ -770,7 +266,71 @@ def WriteIDLIncludeFile(dict_Param, VerboseFlag=False, DebugFlag=False, ExitFlag
 
 ####################################################################################
 
-def WriteModellistFile(OutFile, Models, Years, ObsYears, VerboseFlag=False, DebugFlag=False):
+#sub directory of the output directory holding the include files written by WriteIDLIncludeFiles
+IncludeStoreDir='includestore'
+
+def GetIncludeStoreFile(OutputDir, Content):
+	#name of the file holding Content in the include file store of OutputDir
+	#the name is made from the hash of the content
+	Hash=hashlib.sha1(Content.encode('utf-8')).hexdigest()
+	return os.path.join(OutputDir, IncludeStoreDir, Hash+'_include.pro')
+
+####################################################################################
+
+def WriteIDLIncludeFiles(List_Params, OutputDir, VerboseFlag=False, DebugFlag=False, Writer=None):
+	#batch mode of WriteIDLIncludeFile
+	#put together the include files for all parameter dicts in List_Params in memory
+	#and write each distinct content just once to the include file store
+	#<OutputDir>/includestore/<sha1 of the content>_include.pro
+	#Since the file name is given by the content, files already in the store
+	#are not written again.
+	#returns a list with the include file to use for each element of List_Params;
+	#None where no include file could be put together (e.g. unsupported variable)
+	#Writer is the helpers.FileWriter to use; without one each file is synced right away
+
+	StoreDir=os.path.join(OutputDir, IncludeStoreDir)
+	try:
+		os.mkdir(StoreDir)
+	except FileExistsError:
+		pass
+
+	if Writer is None:
+		Writer=FileWriter(PERFILE)
+
+	RetVal=[]
+	dict_Written={}
+	for dict_Param in List_Params:
+		try:
+			Content=GetIDLIncludeFileContent(dict_Param)
+		except SystemExit:
+			#the error has already been reported
+			RetVal.append(None)
+			continue
+
+		OutFile=GetIncludeStoreFile(OutputDir, Content)
+		RetVal.append(OutFile)
+		if OutFile in dict_Written:
+			continue
+		dict_Written[OutFile]=True
+		if os.path.isfile(OutFile):
+			continue
+
+		#the writer renames a temporary file, so a file in the store is always complete
+		Writer.Write(OutFile, Content)
+		if VerboseFlag:
+			sys.stderr.write('File "'+OutFile+'" written\n')
+
+	if VerboseFlag:
+		sys.stderr.write(str(len(dict_Written))+' distinct include file(s) for '+str(len(List_Params))+' parameter set(s)\n')
+	if DebugFlag:
+		pdb.set_trace()
+
+	return RetVal
+
+####################################################################################
+
+def WriteModellistFile(OutFile, Models, Years, ObsYears, VerboseFlag=False, DebugFlag=False, Writer=None):
+	#Writer is the helpers.FileWriter to use; without one the file is synced right away
 
 	DataArr=[]
 	DataArr.append("#file created by the aerocom automation tools")
@@ -783,11 +343,9 @@ def WriteModellistFile(OutFile, Models, Years, ObsYears, VerboseFlag=False, Debu
 	DataArr.append("")
 
 	RetVal='\n'.join(DataArr)
-	OutHandle=open(OutFile, 'w')
-
-	BytesWritten=OutHandle.write(RetVal)
-	OutHandle.flush()
-	os.fsync(OutHandle.fileno())
+	if Writer is None:
+		Writer=FileWriter(PERFILE)
+	Writer.Write(OutFile, RetVal)
 
 	if VerboseFlag:
 		print(RetVal)
@@ -27,16 +27,274 @@ import os
 import subprocess
 import getpass
 import multiprocessing
-from time import sleep
 import ModAerocomMain
+import StartIDL
 import datetime
 import socket
-import helpers.Taskinfo as Taskinfo
+import shutil
+import json
+import helpers.ModelInventory as ModelInventory
+import helpers.DirWalker as DirWalker
+import helpers.IDLSession as IDLSession
+import helpers.IDLWorkerPool as IDLWorkerPool
+from helpers.SlotManager import SlotManager
+from helpers.Admission import AdmissionControl, EstimateMemory, GB
+from helpers.FileWriter import FileWriter, Durabilities, DefaultDurability
+from helpers.JobCost import DurationHistory, EstimateDuration, LongestFirst
+from helpers.DurationDB import DurationDB, DefaultDBFile
+from helpers.ResultCache import ResultCache, ResultsDirName
+from helpers.RunJournal import RunJournal, ReadJournal, NewRunId, GetRunDir, ManifestName, QUEUED, STARTED, SUCCEEDED, FAILED, UNKNOWN
 import GetObsNetworkSupportedVars
+import ATAStats
 
 
 ###################################################################################
 
+def WritePlan(PlanFile, Entries, Writer):
+	#write the order the idl runs are started in with their estimates
+	#Entries: list of (duration [s], source of the estimate, memory [bytes] or None, name)
+	Lines=['#estimated duration [s]\tsource\testimated memory [GB]\trun\n']
+	for Duration, Source, Memory, Name in Entries:
+		if Memory is None:
+			c_Memory='-'
+		else:
+			c_Memory='{:.2f}'.format(Memory/GB)
+		Lines.append('{:.0f}\t{}\t{}\t{}\n'.format(Duration, Source, c_Memory, Name))
+	Writer.Write(PlanFile, ''.join(Lines))
+
+###################################################################################
+
+#how the runs of a manifest are done
+SESSIONS='sessions'
+WORKERS='workers'
+ManifestVersion=1
+
+def WriteManifest(ManifestFile, Header, Entries, Writer):
+	#write the runs planned to a job manifest (JSON lines) for --execute
+	#the 1st line is the Header dict, then one line per entry:
+	#an idl session (Mode sessions) or a single run (Mode workers)
+	Header=dict(Header)
+	Header['Manifest']=ManifestVersion
+	Header['NumOfEntries']=len(Entries)
+	Lines=[json.dumps(Header)+'\n']
+	for Entry in Entries:
+		Lines.append(json.dumps(Entry)+'\n')
+	Writer.Write(ManifestFile, ''.join(Lines))
+
+def ReadManifest(ManifestFile):
+	#read a job manifest written by WriteManifest
+	#returns the header dict and the list of entries
+	try:
+		with open(ManifestFile) as InHandle:
+			Header=json.loads(InHandle.readline())
+			Entries=[json.loads(x) for x in InHandle if x.strip() != '']
+	except (OSError, ValueError) as ErrorMessage:
+		sys.stderr.write('Error: could not read manifest '+ManifestFile+': '+str(ErrorMessage)+'\n')
+		sys.exit(2)
+	if Header.get('Manifest') != ManifestVersion or Header.get('NumOfEntries') != len(Entries):
+		sys.stderr.write('Error: '+ManifestFile+' is not a complete job manifest. Exiting\n')
+		sys.exit(2)
+	for Entry in Entries:
+		#json has no tuples; the cleaner uses them as keys
+		if Header['Mode'] == WORKERS:
+			Entry['Files']=tuple(Entry['Files'])
+		else:
+			Entry['Files']=[tuple(x) for x in Entry['Files']]
+	return Header, Entries
+
+###################################################################################
+
+def GetLaunchCmd(dict_Param, SessionName, IdlCmd):
+	#command starting IdlCmd in a detached screen session using the launcher script
+	return ['/bin/bash',dict_Param['SCRIPT'], '-d', '-L', '-m', '-S', SessionName, dict_Param['IDL'], '-queue', '-e' , IdlCmd]
+
+def RestoreFiles(Entries, Mode, dict_Param, Writer):
+	#write the aerocom_main copies and include file links of the manifest entries
+	#that are missing, e.g. those of runs that failed before
+	if dict_Param['DEBUG'] is True:
+		#nothing is run with --debug, so nothing is needed on disk
+		return
+	Template=ModAerocomMain.AerocomMainTemplate(dict_Param['ToolDir'])
+	for Entry in Entries:
+		if Mode == WORKERS:
+			Template.Restore(Entry['Files'], Entry['IncludeFile'], Writer=Writer)
+		else:
+			for Files, Run in zip(Entry['Files'], Entry['Runs']):
+				Template.Restore(Files, Run['IncludeFile'], Writer=Writer)
+	Writer.Commit()
+
+def StartJournal(Header, Entries, dict_Param, Writer):
+	#set up the directory of a new run with its manifest and journal
+	#returns the journal
+	RunId=NewRunId()
+	RunDir=GetRunDir(dict_Param['OutputDir'], RunId)
+	os.makedirs(RunDir)
+	WriteManifest(os.path.join(RunDir, ManifestName), Header, Entries, Writer)
+	Writer.Commit()
+	Journal=RunJournal(RunDir, VerboseFlag=dict_Param['VERBOSE'])
+	Journal.Record([x['Index'] for x in Entries], QUEUED)
+	sys.stderr.write('run id: '+RunId+' (continue an interrupted run with --resume '+RunId+')\n')
+	return Journal
+
+def CheckSession(Cmd, StartTime, LogIndex, dict_Param):
+	#decide if the runs of an idl session were successful
+	#LogIndex is the ATAStats.RunLogIndex of the runlog directory, None if there is none
+	#returns the journal state and the reason for a failure
+	Markers=[x['MarkerFile'] for x in Cmd['Runs']]
+	if None not in Markers:
+		#idl wrote a marker for every successful run
+		Missing=[x for x in Markers if not os.path.isdir(x)]
+		if len(Missing) == 0:
+			return SUCCEEDED, None
+		return FAILED, str(len(Missing))+' of '+str(len(Markers))+' runs without marker'
+	#the same check ATAStats does: the log of a successful run ends with total size
+	#allow for clocks differing a bit between the hosts
+	if LogIndex is None:
+		return UNKNOWN, 'no runlog directory'
+	LogFile=LogIndex.Find(Cmd['IdlCmd'], Since=StartTime-60., Hint=Cmd['SessionName'])
+	if LogFile is None:
+		return FAILED, 'no runlog found in '+dict_Param['JournalLogDir']
+	if ATAStats.RunSucceeded(LogFile):
+		return SUCCEEDED, None
+	return FAILED, 'see '+LogFile
+
+def RecordResults(Runs, Cache):
+	#note the success of Runs (dicts with the keys CacheKey, Model, Var, Year
+	#and IncludeFile) in the result cache
+	for Run in Runs:
+		#manifests written before there was a result cache have no keys, runs not to be cached a key None
+		if Run.get('CacheKey') is not None:
+			Cache.Add(Run['CacheKey'], Model=Run['Model'], Var=Run['Var'], Year=Run['Year'], IncludeFile=Run['IncludeFile'])
+
+def GetLimits(dict_Param):
+	#the cluster wide slots and the admission control to use; None for each not asked for
+	Slots=None
+	if 'SlotDir' in dict_Param:
+		Slots=SlotManager(dict_Param['SlotDir'], dict_Param['MaxGlobal'], MaxPerHost=dict_Param['MaxPerHost'],
+			LeaseTime=dict_Param['LeaseTime'], VerboseFlag=dict_Param['VERBOSE'])
+	Admission=None
+	if 'ADMISSION' in dict_Param:
+		Admission=AdmissionControl(MemReserve=dict_Param['MemReserve'], MaxLoad=dict_Param['MaxLoad'],
+			VerboseFlag=dict_Param['VERBOSE'])
+	return Slots, Admission
+
+def RunWorkers(Calls, dict_Param, NumOfWorkers, Cleaner, Journal=None, Cache=None):
+	#do the runs in Calls with NumOfWorkers idl instances started just once
+	#a run's marker is made when it was successful
+	#the states of the runs are recorded in Journal and the successes in Cache if given
+	#every run gets a runlog in the same place the screen sessions write theirs to
+	SpoolDir=os.path.join(dict_Param['OutputDir'],'spool_'+socket.gethostname()+'_'+str(os.getpid()))
+	#a run needs a slot and admission before it is handed to a worker
+	Slots, Admission=GetLimits(dict_Param)
+	Pool=IDLWorkerPool(NumOfWorkers, SpoolDir, [dict_Param['IDL']], WorkDir=dict_Param['ToolDir'],
+		RunLogDir=dict_Param.get('JournalLogDir'), SlotManager=Slots, Admission=Admission, VerboseFlag=dict_Param['VERBOSE'])
+
+	def WorkerJobStart(Job, Call):
+		if Journal is not None:
+			Journal.Record(Call['Index'], STARTED)
+
+	def WorkerJobDone(Job, Call):
+		if Job['Status'] == 1:
+			os.makedirs(Call['MarkerFile'], exist_ok=True)
+			if Cache is not None:
+				RecordResults([Call], Cache)
+		Cleaner.Release(Call['Files'])
+		if Journal is not None:
+			if Job['Status'] == 1:
+				Journal.Record(Call['Index'], SUCCEEDED)
+			else:
+				Journal.Record(Call['Index'], FAILED, Reason='see '+(Job['LogFile'] or 'the worker log'))
+
+	for Call in Calls:
+		if dict_Param['DEBUG'] is False:
+			Cleaner.Add(Call['Files'])
+			Pool.Submit(Call['IdlCmd'], OnDone=lambda Job, Call=Call: WorkerJobDone(Job, Call),
+				OnStart=lambda Job, Call=Call: WorkerJobStart(Job, Call),
+				Name='_'.join([Call['Model'],Call['Var'],Call['Year'],socket.gethostname()]), Cost=Call['Memory'])
+		else:
+			sys.stderr.write(Call['IdlCmd']+',cwd:'+dict_Param['ToolDir']+'\n')
+
+	if dict_Param['DEBUG'] is False and len(Calls) > 0:
+		try:
+			Finished=Pool.Run()
+		finally:
+			Pool.Stop()
+		Failed=[x for x in Finished if x['Status'] != 1]
+		if len(Failed) == 0:
+			shutil.rmtree(SpoolDir)
+		else:
+			sys.stderr.write(str(len(Failed))+' of '+str(len(Finished))+' runs failed. See the worker logs in '+SpoolDir+'\n')
+
+def RunSessions(CmdArr, dict_Param, MaxNumOfTasks, Cleaner, user, Journal=None, Cache=None):
+	#start the idl sessions in CmdArr with at most MaxNumOfTasks running at once
+	#the states of the sessions are recorded in Journal and the successful runs in Cache if given
+	Slots, Admission=GetLimits(dict_Param)
+	#the runlogs are looked up in there when a session without markers has finished
+	LogIndex=None
+	if 'JournalLogDir' in dict_Param and (Journal is not None or Cache is not None):
+		LogIndex=ATAStats.RunLogIndex(dict_Param['JournalLogDir'])
+	Executor=StartIDL.IDLExecutor(MaxNumOfTasks, WorkDir=dict_Param['ToolDir'], user=user, SlotManager=Slots,
+		Admission=Admission, VerboseFlag=dict_Param['VERBOSE'])
+
+	def SessionDone(Future, Cmd):
+		if not Future.cancelled() and Future.result()['Lost']:
+			#its idl may still be starting and reading the files; keep them
+			sys.stderr.write('Keeping '+', '.join([', '.join(x) for x in Cmd['Files']])+'\n')
+			if Journal is not None:
+				Journal.Record(Cmd['Index'], FAILED, Reason='screen session not found')
+			return
+		for Files in Cmd['Files']:
+			Cleaner.Release(Files)
+		if (Journal is None and Cache is None) or Future.cancelled():
+			return
+		Result=Future.result()
+		if Result['ReturnCode'] != 0:
+			State, Reason=FAILED, 'return code '+str(Result['ReturnCode'])
+		else:
+			State, Reason=CheckSession(Cmd, Result['StartTime'], LogIndex, dict_Param)
+		if Journal is not None:
+			if Reason is None:
+				Journal.Record(Cmd['Index'], State)
+			else:
+				Journal.Record(Cmd['Index'], State, Reason=Reason)
+		if Cache is not None:
+			if None not in [x['MarkerFile'] for x in Cmd['Runs']]:
+				#some runs of a failed session may have succeeded
+				RecordResults([x for x in Cmd['Runs'] if os.path.isdir(x['MarkerFile'])], Cache)
+			elif State == SUCCEEDED:
+				RecordResults(Cmd['Runs'], Cache)
+
+	#now run the commands
+	for Cmd in CmdArr:
+		cmd=GetLaunchCmd(dict_Param, Cmd['SessionName'], Cmd['IdlCmd'])
+		if dict_Param['DEBUG'] is False:
+			for Files in Cmd['Files']:
+				Cleaner.Add(Files)
+			OnStart=None
+			if Journal is not None:
+				OnStart=lambda Index=Cmd['Index']: Journal.Record(Index, STARTED)
+			Future=Executor.Submit(cmd, Cost=Cmd['Memory'], OnStart=OnStart)
+			Future.add_done_callback(lambda Future, Cmd=Cmd: SessionDone(Future, Cmd))
+		else:
+			sys.stderr.write('estimated duration: {:.0f}s ({}), memory: {:.2f}GB\n'.format(Cmd['Duration'], Cmd['Source'], Cmd['Memory']/GB))
+			sys.stderr.write(','.join([','.join(cmd),'cwd:'+dict_Param['ToolDir']])+'\n')
+			#pdb.set_trace()
+
+	#start the idls; a new one is started as soon as a running one exits
+	Futures=Executor.Run()
+
+	Results=[x.result() for x in Futures if not x.cancelled()]
+	Failed=[x for x in Results if x['ReturnCode'] != 0]
+	if len(Failed) > 0:
+		sys.stderr.write(str(len(Failed))+' of '+str(len(Results))+' commands failed:\n')
+		for Result in Failed:
+			sys.stderr.write(str(Result['SessionName'])+': return code '+str(Result['ReturnCode'])+'\n')
+	if dict_Param['VERBOSE'] is True:
+		for Result in Results:
+			sys.stderr.write(str(Result['SessionName'])+': {:.0f}s\n'.format(Result['WallTime']))
+
+###################################################################################
+
 
 if __name__ == '__main__':
 	import configparser
@@ -75,7 +333,7 @@ if __name__ == '__main__':
 	#command line interface using argparse
 	dict_Param={}
 	parser = argparse.ArgumentParser(description='aerocom-automation-tools\nProgram to automate aerocom-tool plotting based on just the model name\n\n')
-	parser.add_argument("model", help="model names to use; can be a comma separated list;use "+ObsOnlyModelName+" for observations only")
+	parser.add_argument("model", help="model names to use; can be a comma separated list;use "+ObsOnlyModelName+" for observations only; not used with --execute", nargs='?')
 	parser.add_argument("--variable", help="Run only a list of variables. List has to be comma seperated.")
 	parser.add_argument("--modelyear", help="model years to run; use 9999 for climatology, leave out for all years; comma separated list; Use this to limit the plotting of the OBSERVATION-ONLY model to certain years.")
 	parser.add_argument("--obsyear", help="observation years to run; use 9999 for climatology, leave out for same as model year")
@@ -100,10 +358,59 @@ if __name__ == '__main__':
 	parser.add_argument("--plotdailyts", help="also plot daily time series",action='store_true')
 	parser.add_argument("--addsubvars", help="add sub variables; works only for the variable od550aer atm.",action='store_true')
 	parser.add_argument("--notimeseries", help="switch off time series plotting",action='store_true')
+	parser.add_argument("--rebuild-index", help="rebuild the index of the model directories before searching for the models",action='store_true')
+	parser.add_argument("--jobs", help="# of directories to search in parallel when looking for the model directories. Default is {}.".format(DirWalker.DefaultJobs),type=int,default=DirWalker.DefaultJobs)
+	parser.add_argument("--durability", help="when to sync the files written before idl is started: per-file syncs every file, batch syncs all of them at once before idl is started, none leaves it to the operating system. Default is {}.".format(DefaultDurability),choices=Durabilities,default=DefaultDurability)
+	parser.add_argument("--years-per-session", help="run up to N years of a variable one after another in a single idl session; auto uses as many as possible while still using all --numcpu slots. A marker is written for every successful year.",metavar='N|auto',dest='yearspersession')
+	parser.add_argument("--group-vars", help="with --years-per-session: let different variables of a model share an idl session",action='store_true',dest='groupvars')
+	parser.add_argument("--failedonly", help="with --years-per-session or --workers: run only the years without a success marker from an earlier run",action='store_true')
+	parser.add_argument("--workers", help="start --numcpu idl instances once and feed them all runs one after another instead of starting idl for every run",action='store_true')
+	parser.add_argument("--slotdir", help="directory shared by all hosts for the cluster wide limit of idl runs. Default is SlotDir in the [slots] section of constants.ini; no cluster wide limit if that is empty.")
+	parser.add_argument("--maxglobal", help="cluster wide max # of idl runs of all users using --slotdir. Default is MaxGlobal from constants.ini.",type=int)
+	parser.add_argument("--maxperhost", help="max # of idl runs of all users using --slotdir per host. Default is MaxPerHost from constants.ini.",type=int)
+	parser.add_argument("--order", help="order to start the idl runs in: longest starts the runs expected to take longest first, found keeps the order the runs were found in. Default is longest.",choices=['longest','found'],default='longest')
+	parser.add_argument("--runlogdir", help="with --order longest: estimate the durations of the runs from the runlogs of earlier runs in this directory. Default is RunLogDir from constants.ini. Without it, the durations are estimated from the size of the model files.")
+	parser.add_argument("--durationdb", help="SQLite data base with the durations of earlier runs (see ATAStats --durationdb); new runs in --runlogdir are added to it first. Default is DurationDB from constants.ini or "+DefaultDBFile+".")
+	parser.add_argument("--plan-only", help="do everything but starting idl and write the runs to a job manifest (JSON lines) for --execute; the manifest is <outputdir>/manifest_<host>_<time>.jsonl unless given with --manifest. Its name is printed to stdout.",action='store_true',dest='plan_only')
+	parser.add_argument("--manifest", help="with --plan-only: file name of the job manifest",metavar='FILE')
+	parser.add_argument("--execute", help="just start the runs of a job manifest written by --plan-only, using the tool and output directory it was planned with",metavar='MANIFEST')
+	parser.add_argument("--resume", help="continue an interrupted run: start the runs of run RUNID that have not succeeded. The run id is printed when a run starts; the runs are kept in <outputdir>/runs.",metavar='RUNID')
+	parser.add_argument("--force", help="also start the runs whose include file, model files, obs year and aerocom-tools revision did not change since their last success",action='store_true')
+	parser.add_argument("--resultcache", help="directory of the result cache recording the successful runs. Default is ResultCacheDir from constants.ini or <outputdir>/"+ResultsDirName+".")
+	parser.add_argument("--admission", help="start a new idl run only if the host has enough free memory and cpu for it; the memory a run needs is estimated from the size of its model files. Use a higher --numcpu with this to pack more small runs.",action='store_true')
+	parser.add_argument("--memreserve", help="with --admission: memory in GB to keep free. Default is MemReserve from constants.ini.",type=float)
+	parser.add_argument("--maxload", help="with --admission: max load average. Default is MaxLoad from constants.ini or the # of cpus.",type=float)
 	#parser.add_argument("--", help="")
 
 	args = parser.parse_args()
 
+	if args.execute and args.resume:
+		parser.error('--execute and --resume can not be used together')
+	if args.execute or args.resume:
+		if args.model or args.plan_only:
+			parser.error('--execute and --resume can not be used with a model name or --plan-only')
+	if args.manifest and not args.plan_only:
+		parser.error('--manifest needs --plan-only')
+		if args.resume:
+			#the runs are kept in the output dir
+			if args.outputdir:
+				OutputDir=args.outputdir
+			elif args.tooldir or ToolDir:
+				OutputDir=os.path.join(args.tooldir or ToolDir,'batching',user)
+			else:
+				parser.error('--resume needs --tooldir or --outputdir to find the run')
+			RunDir=GetRunDir(OutputDir, args.resume)
+			Header, Entries=ReadManifest(os.path.join(RunDir, ManifestName))
+		else:
+			Header, Entries=ReadManifest(args.execute)
+		#the files written while planning are in the tool and output dir of the manifest
+		if not args.tooldir:
+			args.tooldir=Header['ToolDir']
+		if not args.outputdir:
+			args.outputdir=Header['OutputDir']
+	elif not args.model:
+		parser.error('the model name is required')
+
 	if args.numcpu:
 		dict_Param['NumCPU']=args.numcpu
 
@@ -225,10 +532,141 @@ if __name__ == '__main__':
 	if args.htapfiltersonly:
 		dict_Param['HTAPFILTERSONLY']=args.htapfiltersonly
 
+	if args.yearspersession:
+		if args.yearspersession == IDLSession.AUTO:
+			dict_Param['YearsPerSession']=IDLSession.AUTO
+		else:
+			try:
+				dict_Param['YearsPerSession']=int(args.yearspersession)
+			except ValueError:
+				dict_Param['YearsPerSession']=0
+			if dict_Param['YearsPerSession'] < 1:
+				sys.stderr.write('Error: --years-per-session needs a positive number or '+IDLSession.AUTO+'. Exiting\n')
+				sys.exit(2)
+		if args.workers:
+			sys.stderr.write('Error: --years-per-session and --workers can not be used together. Exiting\n')
+			sys.exit(2)
+	elif args.groupvars:
+		sys.stderr.write('Error: --group-vars needs --years-per-session. Exiting\n')
+		sys.exit(2)
+	elif args.failedonly and not args.workers:
+		sys.stderr.write('Error: --failedonly needs --years-per-session or --workers. Exiting\n')
+		sys.exit(2)
+
+	#cluster wide slots
+	if args.slotdir:
+		dict_Param['SlotDir']=args.slotdir
+	elif 'slots' in IniFileData and IniFileData['slots'].get('SlotDir', ''):
+		dict_Param['SlotDir']=IniFileData['slots']['SlotDir']
+	if 'SlotDir' in dict_Param:
+		if args.maxglobal:
+			dict_Param['MaxGlobal']=args.maxglobal
+		else:
+			dict_Param['MaxGlobal']=IniFileData.getint('slots', 'MaxGlobal')
+		if args.maxperhost:
+			dict_Param['MaxPerHost']=args.maxperhost
+		else:
+			dict_Param['MaxPerHost']=IniFileData.getint('slots', 'MaxPerHost')
+		dict_Param['LeaseTime']=IniFileData.getfloat('slots', 'LeaseTime')
+	elif args.maxglobal or args.maxperhost:
+		sys.stderr.write('Error: --maxglobal and --maxperhost need a slot directory. Exiting\n')
+		sys.exit(2)
+
+	#estimated durations of the runs
+	dict_Param['ORDER']=args.order
+	dict_Param['BaseSeconds']=IniFileData.getfloat('cost', 'BaseSeconds')
+	dict_Param['SecondsPerGB']=IniFileData.getfloat('cost', 'SecondsPerGB')
+	if args.runlogdir:
+		dict_Param['RunLogDir']=args.runlogdir
+	elif IniFileData['cost'].get('RunLogDir', ''):
+		dict_Param['RunLogDir']=IniFileData['cost']['RunLogDir']
+	if 'RunLogDir' in dict_Param and not os.path.isdir(dict_Param['RunLogDir']):
+		sys.stderr.write('Error: runlog directory '+dict_Param['RunLogDir']+' does not exist. Exiting\n')
+		sys.exit(2)
+	if args.durationdb:
+		dict_Param['DurationDB']=args.durationdb
+	elif IniFileData['cost'].get('DurationDB', ''):
+		dict_Param['DurationDB']=IniFileData['cost']['DurationDB']
+	else:
+		dict_Param['DurationDB']=DefaultDBFile
+
+	#the runlogs telling if a session was successful for the journal
+	if 'RunLogDir' in dict_Param:
+		dict_Param['JournalLogDir']=dict_Param['RunLogDir']
+	elif 'runlogs' in IniFileData and IniFileData['runlogs'].get('SessionLogDir', ''):
+		dict_Param['JournalLogDir']=IniFileData['runlogs']['SessionLogDir']
+	if 'JournalLogDir' in dict_Param and not os.path.isdir(dict_Param['JournalLogDir']):
+		sys.stderr.write('Warning: runlog directory '+dict_Param['JournalLogDir']+' does not exist; the state of sessions without success markers will be unknown\n')
+		del dict_Param['JournalLogDir']
+
+	#the successful runs for skipping the unchanged ones
+	if args.resultcache:
+		dict_Param['ResultCacheDir']=args.resultcache
+	elif IniFileData['cache'].get('ResultCacheDir', ''):
+		dict_Param['ResultCacheDir']=IniFileData['cache']['ResultCacheDir']
+	else:
+		dict_Param['ResultCacheDir']=os.path.join(dict_Param['OutputDir'], ResultsDirName)
+
+	#resource aware admission control
+	dict_Param['BaseMemory']=IniFileData.getfloat('admission', 'BaseMemory')*GB
+	dict_Param['SizeFactor']=IniFileData.getfloat('admission', 'SizeFactor')
+	if args.admission:
+		dict_Param['ADMISSION']=True
+		if args.memreserve is not None:
+			dict_Param['MemReserve']=args.memreserve*GB
+		else:
+			dict_Param['MemReserve']=IniFileData.getfloat('admission', 'MemReserve')*GB
+		if args.maxload is not None:
+			dict_Param['MaxLoad']=args.maxload
+		elif IniFileData['admission'].get('MaxLoad', ''):
+			dict_Param['MaxLoad']=IniFileData.getfloat('admission', 'MaxLoad')
+		else:
+			dict_Param['MaxLoad']=None
+	elif args.memreserve is not None or args.maxload is not None:
+		sys.stderr.write('Error: --memreserve and --maxload need --admission. Exiting\n')
+		sys.exit(2)
+
+	#common part
+	try:
+		MaxNumOfTasksToStart=dict_Param['NumCPU']
+	except KeyError: 
+		MaxNumOfTasksToStart=multiprocessing.cpu_count()/2
+
+	if args.execute or args.resume:
+		#just start the runs of the manifest written by --plan-only or an earlier run
+		if dict_Param['VERBOSE'] is True:
+			sys.stderr.write(str(len(Entries))+' '+Header['Mode']+' planned on '+Header['Host']+' at '+Header['Created']+'\n')
+		Writer=FileWriter(args.durability, VerboseFlag=dict_Param['VERBOSE'])
+		Journal=None
+		if args.resume:
+			States=ReadJournal(RunDir)
+			Done=[x for x in Entries if x['Index'] in States and States[x['Index']]['State'] == SUCCEEDED]
+			Entries=[x for x in Entries if x not in Done]
+			sys.stderr.write('resuming run '+os.path.basename(os.path.normpath(RunDir))+': '+str(len(Done))+' done, '
+				+str(len(Entries))+' to do\n')
+			if dict_Param['DEBUG'] is False:
+				Journal=RunJournal(RunDir, VerboseFlag=dict_Param['VERBOSE'])
+				Journal.Record([x['Index'] for x in Entries], QUEUED)
+		elif dict_Param['DEBUG'] is False:
+			Journal=StartJournal(Header, Entries, dict_Param, Writer)
+		#the files of runs that were done before are gone
+		RestoreFiles(Entries, Header['Mode'], dict_Param, Writer)
+		Cleaner=ModAerocomMain.MainFileCleaner(dict_Param['ToolDir'], VerboseFlag=dict_Param['VERBOSE'])
+		#the cache keys were computed when planning
+		Cache=ResultCache(dict_Param['ResultCacheDir'], VerboseFlag=dict_Param['VERBOSE'])
+		if Header['Mode'] == WORKERS:
+			RunWorkers(Entries, dict_Param, int(MaxNumOfTasksToStart), Cleaner, Journal=Journal, Cache=Cache)
+		else:
+			RunSessions(Entries, dict_Param, MaxNumOfTasksToStart, Cleaner, user, Journal=Journal, Cache=Cache)
+		sys.exit(0)
 
+	#all files needed by the idl jobs are written by this one
+	Writer=FileWriter(args.durability, VerboseFlag=dict_Param['VERBOSE'])
 
 	hostname=socket.gethostname()
-	CmdArr=[]
+	#the jobs to run: one per include file, each with the years to run
+	#the include files are written later on for all jobs at once
+	Jobs=[]
 	#handle the OBSERVATIONS-ONLY case
 	#if this model is part of the model list we switch to obs only mode
 	#no other models will be plotted for now
@@ -261,17 +699,10 @@ if __name__ == '__main__':
 							sys.stderr.write('Continuing with the other variables.\n')
 						continue
 
-					#now write the idl include file
-					#one per variable
-					dict_Param['IDLOutFile']=os.path.join(dict_Param['OutputDir'],ObsNetWork+'_'+Var+'_include.pro')
+					#one idl include file per variable
 					dict_Param['VarName']=Var
 					#Maybe we want to check if the variable is actually supported
 					ModellistFile=os.path.join(dict_Param['OutputDir'], ObsNetWork+'_'+Var+'.txt')
-					#write IDL include file
-					try:
-						WriteIDLIncludeFile.WriteIDLIncludeFile(dict_Param)
-					except SystemExit:
-						pass
 
 					#Get obs years from config file
 					try:
@@ -282,37 +713,21 @@ if __name__ == '__main__':
 					#pdb.set_trace()
 					Years=list(map(str,range(ObsStartYear,max_year)))
 
-					if dict_Param['VERBOSE'] == True:
-						sys.stderr.write('File "'+dict_Param['IDLOutFile']+'" written\n')
-						#sys.stderr.write('File "'+ModellistFile+'" written\n')
-					if dict_Param['PRINT'] == True:
-						sys.stdout.write(dict_Param['IDLOutFile']+'\n')
-						#sys.stdout.write(ModellistFile+'\n')
-
+					YearsToRun=[]
 					for Year in Years:
 						if args.modelyear:
 							if Year not in dict_Param['ModelYear']:
 								if dict_Param['VERBOSE'] is True:
 									sys.stderr.write('Year '+Year+' not in provided list of Years to run. Skipping that Year.\n')
 								continue
-								
-						if dict_Param['VERBOSE'] == True:
-							sys.stderr.write('Year: '+Year+'\n')
-
-						#Create an array with program calls for IDL
-						#pdb.set_trace()
-						OutFile, IncFile=ModAerocomMain.ModAerocomMain(dict_Param['ToolDir'], dict_Param['IDLOutFile'])
-						if not os.path.isfile(OutFile):
-							pdb.set_trace()
-						if not os.path.isfile(IncFile):
-							pdb.set_trace()
-						#IDL does not like the filename ending with '.pro', so remove that
-						OutFile=OutFile.replace('.pro','')
-						IdlCmd=OutFile+",modelin=['"+Model+"'],yearin=['"+Year+"'],datayearin='"+dict_Param['ObsYear']+"'"
-						SessionName='_'.join([Model,Var,Year,hostname])
-						cmd=['/bin/bash',dict_Param['SCRIPT'], '-d', '-L', '-m', '-S', SessionName, dict_Param['IDL'], '-queue', '-e' , IdlCmd]
-						#cmd=[dict_Param['SCRIPT'], '-d', '-L', '-m', dict_Param['IDL'], '-queue', '-e' , IdlCmd]
-						CmdArr.append(cmd)
+						YearsToRun.append(Year)
+
+					Job={}
+					Job['Model']=Model
+					Job['Var']=Var
+					Job['Years']=YearsToRun
+					Job['Param']=dict(dict_Param)
+					Jobs.append(Job)
 
 	else:
 		#model plotting mode
@@ -321,7 +736,7 @@ if __name__ == '__main__':
 		#message unless one model is present
 		#returns a list
 		ModelFolders=GetModelDir.GetModelDir(dict_Param['ModelName'],
-			c_ConfigFile=ConfigIni, VerboseFlag=False)
+			c_ConfigFile=ConfigIni, VerboseFlag=False, RebuildIndexFlag=args.rebuild_index, Jobs=args.jobs)
 
 		#get the supported variables list
 		dict_SupportStruct=WriteIDLIncludeFile.GetIDLIncludeFileText('nogroup','whatever', all=True)
@@ -332,7 +747,9 @@ if __name__ == '__main__':
 		for Model in ModelFolders:
 			#just the 1st model dir for now
 			Modeldir=os.path.join(ModelFolders[Model][0],'renamed')
-			VarsInModel=GetModelVars.GetModelVars(Modeldir)
+			#read the model directory just once
+			Inventory=ModelInventory(Modeldir)
+			VarsInModel=GetModelVars.GetModelVars(Modeldir, Inventory=Inventory)
 			if args.variable:
 				VarsToRun=dict_Vars.values()
 			else:
@@ -361,112 +778,249 @@ if __name__ == '__main__':
 					for ObsNetWork in dict_Param['ObsnetworksToRun']:
 						#determine variables
 						dict_Param['ObsNetworkName']=ObsNetWork
-						#now write the idl include file
-						#one per variable
-						dict_Param['IDLOutFile']=os.path.join(dict_Param['OutputDir'],Model+'_'+Var+'_'+ObsNetWork+'_include.pro')
+						#one idl include file per variable
 						dict_Param['VarName']=Var
 						#Maybe we want to check if the variable is actually supported
 						#ModellistFile=os.path.join(dict_Param['ToolDir'],'batching', Model+'_'+Var+'.txt')
 						ModellistFile=os.path.join(dict_Param['OutputDir'], Model+'_'+Var+'.txt')
-						#write IDL include file
-						try:
-							WriteIDLIncludeFile.WriteIDLIncludeFile(dict_Param)
-						except SystemExit:
-							pass
 				else:
-					#now write the idl include file
-					#one per variable
-					dict_Param['IDLOutFile']=os.path.join(dict_Param['OutputDir'],Model+'_'+Var+'_include.pro')
+					#one idl include file per variable
 					dict_Param['VarName']=Var
 					#Maybe we want to check if the variable is actually supported
 					#ModellistFile=os.path.join(dict_Param['ToolDir'],'batching', Model+'_'+Var+'.txt')
 					ModellistFile=os.path.join(dict_Param['OutputDir'], Model+'_'+Var+'.txt')
-					#write IDL include file
-					try:
-						WriteIDLIncludeFile.WriteIDLIncludeFile(dict_Param)
-					except SystemExit:
-						pass
+
+				Job={}
+				Job['Model']=Model
+				Job['Param']=dict(dict_Param)
 
 				#For the include file we have some 'pseudo variables' for special purposes like the
 				#dust forecast.
 				#The real variable name is actually everything before the underscore
 
 				Var=Var.split('_')[0]
-				Years=GetModelYears.GetModelYears(Modeldir, Variable=Var)
+				Years=GetModelYears.GetModelYears(Modeldir, Variable=Var, Inventory=Inventory)
 				#c_Years=','.join(Years)
 				#try:
 				#	WriteIDLIncludeFile.WriteModellistFile(ModellistFile, Model, c_Years, dict_Param['ObsYear'])
 				#except SystemExit:
 				#	pass
-					
-				if dict_Param['VERBOSE'] == True:
-					sys.stderr.write('File "'+dict_Param['IDLOutFile']+'" written\n')
-					#sys.stderr.write('File "'+ModellistFile+'" written\n')
-				if dict_Param['PRINT'] == True:
-					sys.stdout.write(dict_Param['IDLOutFile']+'\n')
-					#sys.stdout.write(ModellistFile+'\n')
 
+				YearsToRun=[]
 				for Year in Years:
 					if args.modelyear:
 						if Year not in dict_Param['ModelYear']:
 							if dict_Param['VERBOSE'] is True:
 								sys.stderr.write('Year '+Year+' not in provided list of Years to run. Skipping that Year.\n')
 							continue
-					if dict_Param['VERBOSE'] == True:
-						sys.stderr.write('Year: '+Year+'\n')
-
-					#Create an array with program calls for IDL
-					#pdb.set_trace()
-					OutFile, IncFile=ModAerocomMain.ModAerocomMain(dict_Param['ToolDir'], dict_Param['IDLOutFile'])
-					if not os.path.isfile(OutFile):
-						pdb.set_trace()
-					if not os.path.isfile(IncFile):
-						pdb.set_trace()
-					#IDL does not like the filename ending with '.pro', so remove that
-					OutFile=OutFile.replace('.pro','')
-					IdlCmd=OutFile+",modelin=['"+Model+"'],yearin=['"+Year+"'],datayearin='"+dict_Param['ObsYear']+"'"
-					SessionName='_'.join([Model,Var,Year,hostname])
-					cmd=['/bin/bash',dict_Param['SCRIPT'], '-d', '-L', '-m', '-S', SessionName, dict_Param['IDL'], '-queue', '-e' , IdlCmd]
-					#cmd=[dict_Param['SCRIPT'], '-d', '-L', '-m', dict_Param['IDL'], '-queue', '-e' , IdlCmd]
-					CmdArr.append(cmd)
-
-	#common part
-	try:
-		MaxNumOfTasksToStart=dict_Param['NumCPU']
-	except KeyError: 
-		MaxNumOfTasksToStart=multiprocessing.cpu_count()/2
-
-	taskinfo=Taskinfo('.*idl', user=user, RetNumber=True,)
+					YearsToRun.append(Year)
+
+				Job['Var']=Var
+				Job['Years']=YearsToRun
+				#size of the model data read by each run
+				Job['DataSize']={x:Inventory.GetSize(Var, x) for x in YearsToRun}
+				#the model files of each run for the result cache
+				Job['ModelFiles']={x:Inventory.GetFileStats(Var, x) for x in YearsToRun}
+				Jobs.append(Job)
+
+	#write the idl include files of all jobs at once
+	#jobs with the same include file content share a single file
+	IncludeFiles=WriteIDLIncludeFile.WriteIDLIncludeFiles([x['Param'] for x in Jobs], dict_Param['OutputDir'],
+		VerboseFlag=dict_Param['VERBOSE'], Writer=Writer)
+
+	#one (job, year) pair per idl run
+	Runs=[]
+	for Job, IncludeFile in zip(Jobs, IncludeFiles):
+		if IncludeFile is None:
+			#unsupported variable or obs network; already reported
+			continue
+		if dict_Param['PRINT'] == True:
+			sys.stdout.write(IncludeFile+'\n')
+			#sys.stdout.write(ModellistFile+'\n')
+		for Year in Job['Years']:
+			Runs.append((Job, Year, IncludeFile))
+
+	#skip the runs whose input did not change since their last success
+	Cache=ResultCache(dict_Param['ResultCacheDir'], ToolDir=dict_Param['ToolDir'], VerboseFlag=dict_Param['VERBOSE'])
+	RunsToDo=[]
+	for Job, Year, IncludeFile in Runs:
+		if Job['Model'] == ObsOnlyModelName:
+			#the observations plotted are found by the idl tools themselves, so a change
+			#of them can not be told here; these runs are never taken from the cache
+			Job.setdefault('CacheKeys', {})[Year]=None
+			RunsToDo.append((Job, Year, IncludeFile))
+			continue
+		Key=Cache.GetKey(IncludeFile, Job.get('ModelFiles', {}).get(Year, []), Job['Model'], Year, dict_Param['ObsYear'])
+		if Cache.Has(Key) and not args.force:
+			if dict_Param['VERBOSE'] is True:
+				sys.stderr.write('Model '+Job['Model']+', Var '+Job['Var']+', Year '+Year+' unchanged since its last success. Skipping.\n')
+			continue
+		Job.setdefault('CacheKeys', {})[Year]=Key
+		RunsToDo.append((Job, Year, IncludeFile))
+	NumCached=len(Runs)-len(RunsToDo)
+	if NumCached > 0:
+		sys.stderr.write('INFO: '+str(NumCached)+' run(s) skipped as nothing changed since their last success; use --force to start them anyway.\n')
+	Runs=RunsToDo
+
+	#success markers of the runs; only used when several runs share an idl session
+	#or the runs are done by idl workers
+	MarkerFiles=[None]*len(Runs)
+	if 'YearsPerSession' in dict_Param or args.workers:
+		MarkerDir=os.path.join(dict_Param['OutputDir'],'markers')
+		try:
+			os.mkdir(MarkerDir)
+		except FileExistsError:
+			pass
+		RunsToDo=[]
+		MarkerFiles=[]
+		for Job, Year, IncludeFile in Runs:
+			MarkerFile=IDLSession.GetMarkerFile(MarkerDir, Job['Model'], IncludeFile, Year, dict_Param['ObsYear'])
+			if os.path.isdir(MarkerFile):
+				if args.failedonly:
+					if dict_Param['VERBOSE'] is True:
+						sys.stderr.write('Model '+Job['Model']+', Var '+Job['Var']+', Year '+Year+' already done. Skipping.\n')
+					continue
+				#the run is repeated; its old marker must not tell otherwise
+				os.rmdir(MarkerFile)
+			RunsToDo.append((Job, Year, IncludeFile))
+			MarkerFiles.append(MarkerFile)
+		Runs=RunsToDo
+
+	#make the copies of aerocom_main.pro for all runs; the template is read just once
+	#the copy depends only on the include file (model and year are given on the
+	#idl command line), so all runs with the same include file share one
+	Template=ModAerocomMain.AerocomMainTemplate(dict_Param['ToolDir'])
+	MainFiles=Template.WriteBatch([x[2] for x in Runs], Writer=Writer, SharedFlag=True)
+	#the copies are removed once all runs using them have finished
+	Cleaner=ModAerocomMain.MainFileCleaner(dict_Param['ToolDir'], VerboseFlag=dict_Param['VERBOSE'])
+
+	#durations of earlier runs for the run time estimates
+	History=None
+	if 'RunLogDir' in dict_Param:
+		DB=ATAStats.UpdateDurationDB(dict_Param['RunLogDir'], DBFile=dict_Param['DurationDB'], AllUserFlag=True,
+			VerboseFlag=dict_Param['VERBOSE'])
+		History=DurationHistory.FromDB(DB)
+	elif os.path.isfile(dict_Param['DurationDB']):
+		History=DurationHistory.FromDB(DurationDB(dict_Param['DurationDB']))
+	if History is not None and dict_Param['VERBOSE'] is True:
+		sys.stderr.write('durations of '+str(len(History))+' model/variable combinations found in '+dict_Param['DurationDB']+'\n')
+
+	Calls=[]
+	for (Job, Year, IncludeFile), (OutFile, IncFile), MarkerFile in zip(Runs, MainFiles, MarkerFiles):
+		if dict_Param['VERBOSE'] == True:
+			sys.stderr.write('Model: '+Job['Model']+', Var: '+Job['Var']+', Year: '+Year+'\n')
+
+		#Create an array with program calls for IDL
+		#pdb.set_trace()
+		if not os.path.isfile(os.path.join(dict_Param['ToolDir'],OutFile)):
+			pdb.set_trace()
+		if not os.path.isfile(os.path.join(dict_Param['ToolDir'],IncFile)):
+			pdb.set_trace()
+		#IDL does not like the filename ending with '.pro', so remove that
+		IdlCmd=IDLSession.GetMainCall(OutFile.replace('.pro',''), Job['Model'], Year, dict_Param['ObsYear'])
+		Call={}
+		Call['Model']=Job['Model']
+		Call['Var']=Job['Var']
+		Call['Year']=Year
+		Call['IncludeFile']=IncludeFile
+		Call['Files']=(OutFile, IncFile)
+		Call['IdlCmd']=IdlCmd
+		Call['MarkerFile']=MarkerFile
+		Call['CacheKey']=Job['CacheKeys'][Year]
+		Call['Duration'], Call['Source']=EstimateDuration(Job['Model'], Job['Var'], Job.get('DataSize', {}).get(Year, 0),
+			History=History, BaseSeconds=dict_Param['BaseSeconds'], SecondsPerGB=dict_Param['SecondsPerGB'])
+		Call['Memory']=EstimateMemory(Job.get('DataSize', {}).get(Year, 0),
+			BaseMemory=dict_Param['BaseMemory'], SizeFactor=dict_Param['SizeFactor'])
+		Calls.append(Call)
+
+	#make sure all files are on disk before idl reads them
+	Writer.Commit()
 
 	if dict_Param['DEBUG'] is True:
 		sys.stderr.write('Parameters for subprocess.run:\n')
-	#now run the commands
-	if len(CmdArr) == 0:
+	if len(Calls) == 0 and NumCached == 0:
 		sys.stderr.write('INFO: No commands to run! Wrong variable name?\n')
-	for cmd in CmdArr:
-		if dict_Param['DEBUG'] is False:
-			while True:
-				NumOfIDLsRunning=Taskinfo('.*idl', user=user, RetNumber=True,)
-				sys.stderr.write('# of idls running for user '+user+': '+str(NumOfIDLsRunning)+'\n')
-				if NumOfIDLsRunning < MaxNumOfTasksToStart:
-					break
-				else:
-					sys.stderr.write('The max # of idl instances ('+str(MaxNumOfTasksToStart)+') for user '+user+' has been reached: '+str(datetime.datetime.now())+'\n')
-					sys.stderr.write('Waiting 60s from now to try again\n')
-					sleep(60)
-				
-			sys.stderr.write('Starting: '+' '.join(cmd)+'\n')
-			RetVal=subprocess.run(cmd, cwd=dict_Param['ToolDir'], check=True) 
-		else:
-			sys.stderr.write(','.join([','.join(cmd),'cwd:'+dict_Param['ToolDir']])+'\n')
-			#pdb.set_trace()
-
-
-
-
-
-		
-
-	
 
+	if args.workers:
+		#all runs are done by a fixed # of idl instances started just once
+		Mode=WORKERS
+		if dict_Param['ORDER'] == 'longest':
+			Calls=LongestFirst(Calls, lambda x: x['Duration'])
+		Entries=Calls
+		WritePlan(os.path.join(dict_Param['OutputDir'],'plan_'+hostname+'.txt'),
+			[(x['Duration'], x['Source'], x['Memory'], x['IdlCmd']) for x in Entries], Writer)
+	else:
+		Mode=SESSIONS
+		#put the runs into idl sessions
+		if 'YearsPerSession' in dict_Param:
+			RunsPerSession=dict_Param['YearsPerSession']
+			if RunsPerSession == IDLSession.AUTO:
+				RunsPerSession=IDLSession.GetAutoRunsPerSession(len(Calls), MaxNumOfTasksToStart)
+			if args.groupvars:
+				#the variables of a model can share a session
+				KeyFunc=lambda x: x['Model']
+			else:
+				KeyFunc=lambda x: (x['Model'], x['Var'])
+			Sessions=IDLSession.SplitIntoSessions(Calls, RunsPerSession, KeyFunc)
+		else:
+			Sessions=[[x] for x in Calls]
 
+		CmdArr=[]
+		for Session in Sessions:
+			if len(Session) == 1:
+				SessionName='_'.join([Session[0]['Model'],Session[0]['Var'],Session[0]['Year'],hostname])
+			else:
+				Vars=[]
+				for Call in Session:
+					if Call['Var'] not in Vars:
+						Vars.append(Call['Var'])
+				Years=sorted(set([x['Year'] for x in Session]))
+				SessionName='_'.join([Session[0]['Model'],'+'.join(Vars),Years[0]+'-'+Years[-1],hostname])
+			Cmd={}
+			Cmd['SessionName']=SessionName
+			Cmd['IdlCmd']=IDLSession.GetSessionCommand([(x['IdlCmd'], x['MarkerFile']) for x in Session])
+			Cmd['Files']=[x['Files'] for x in Session]
+			#the runs of a session are done one after another
+			Cmd['Duration']=sum([x['Duration'] for x in Session])
+			Cmd['Source']=','.join(sorted(set([x['Source'] for x in Session])))
+			Cmd['Memory']=max([x['Memory'] for x in Session])
+			Cmd['Runs']=[{x:y[x] for x in ['Model', 'Var', 'Year', 'IncludeFile', 'MarkerFile', 'CacheKey']} for y in Session]
+			CmdArr.append(Cmd)
+
+		if dict_Param['ORDER'] == 'longest':
+			CmdArr=LongestFirst(CmdArr, lambda x: x['Duration'])
+		WritePlan(os.path.join(dict_Param['OutputDir'],'plan_'+hostname+'.txt'),
+			[(x['Duration'], x['Source'], x['Memory'], x['SessionName']) for x in CmdArr], Writer)
+		Entries=CmdArr
+	#the position in the manifest identifies an entry in the journal
+	for Index, Entry in enumerate(Entries):
+		Entry['Index']=Index
+
+	Header={}
+	Header['Mode']=Mode
+	Header['ToolDir']=dict_Param['ToolDir']
+	Header['OutputDir']=dict_Param['OutputDir']
+	Header['Host']=hostname
+	Header['Created']=datetime.datetime.now().isoformat()
+
+	if args.plan_only:
+		#leave the files for the later --execute
+		if args.manifest:
+			ManifestFile=args.manifest
+		else:
+			ManifestFile=os.path.join(dict_Param['OutputDir'],
+				'manifest_'+hostname+'_'+datetime.datetime.now().strftime('%Y%m%d%H%M%S')+'.jsonl')
+		WriteManifest(ManifestFile, Header, Entries, Writer)
+		Writer.Commit()
+		sys.stdout.write(ManifestFile+'\n')
+		sys.exit(0)
+
+	#journal of the run for --resume
+	Journal=None
+	if dict_Param['DEBUG'] is False and len(Entries) > 0:
+		Journal=StartJournal(Header, Entries, dict_Param, Writer)
+
+	if Mode == WORKERS:
+		RunWorkers(Entries, dict_Param, int(MaxNumOfTasksToStart), Cleaner, Journal=Journal, Cache=Cache)
+	else:
+		RunSessions(Entries, dict_Param, MaxNumOfTasksToStart, Cleaner, user, Journal=Journal, Cache=Cache)
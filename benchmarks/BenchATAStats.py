@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+################################################################
+# BenchATAStats.py
+#
+# benchmark the analysis of a directory of runlogs by ATAStats
+# with a single process and with a process pool (ATAStats --jobs)
+#
+# The runlogs are synthetic: an idl command line, some of the lines
+# ATAStats looks for and filler lines in between. Every parallel
+# run is checked to give the same results as the serial one.
+#
+# usage: benchmarks/BenchATAStats.py [--logs 2000] [--lines 2000] [--jobs 1,2,4,8] [--repeat 3]
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import sys
+import argparse
+import random
+import tempfile
+import timeit
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),'..','ATAStats'))
+import ATAStats
+
+FillerLine='% Compiled module: AEROCOM_READ_MODEL_DATA_WITH_A_LONG_NAME.\n'
+
+def MakeRunLogs(RunLogDir, NumOfLogs, NumOfLines):
+	"""write NumOfLogs runlogs of about NumOfLines lines each to RunLogDir"""
+	Random=random.Random(1)
+	for Index in range(NumOfLogs):
+		LogFile=os.path.join(RunLogDir, 'run{:06d}_user{}_aerocom-tools.log'.format(Index, Index % 5))
+		#the sizes of real logs differ a lot
+		Lines=Random.randint(NumOfLines//10, NumOfLines*2)
+		with open(LogFile, 'w') as OutHandle:
+			OutHandle.write('Thu Mar 15 10:11:12 CET 2018\n')
+			OutHandle.write("IDL> aerocom_main_x,modelin=['Model{}'],yearin=['{}'],datayearin='0000'\n".format(
+				Index % 40, 2000+Index % 15))
+			OutHandle.write('ABOUT TO READ MODELS /lustre/storeB/project/aerocom/Model{}/renamed/\n'.format(Index % 40))
+			OutHandle.write('Searched: OD550_AER => VarInFile:  OD550AER / All vars to Read OD550_AER\n')
+			OutHandle.write('Reading file: aerocom3_Model_exp_od550aer_Column_2008_monthly.nc\n')
+			for Line in range(Lines):
+				OutHandle.write(FillerLine)
+				if Line % 500 == 0:
+					OutHandle.write('   mean original value {:g}\n'.format(Random.random()))
+			if Index % 7 == 0:
+				OutHandle.write('% Execution halted at: $MAIN$\n')
+			else:
+				OutHandle.write('total size 123456\n')
+
+def Analyse(RunLogDir, Jobs):
+	return ATAStats.ATAStats(RunLogDir, AllUserFlag=True, DoNothingFlag=True, Jobs=Jobs)
+
+###################################################################################
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='benchmark ATAStats with a single process and with a process pool\n\n')
+	parser.add_argument("--logs", help="# of runlogs. Defaults to 2000.", type=int, default=2000)
+	parser.add_argument("--lines", help="mean # of lines of a runlog. Defaults to 2000.", type=int, default=2000)
+	parser.add_argument("--jobs", help="comma separated list of the # of processes to use. Defaults to 1,2,4,8.", default='1,2,4,8')
+	parser.add_argument("--repeat", help="number of repetitions; the best one is reported. Defaults to 3.", type=int, default=3)
+	args = parser.parse_args()
+
+	JobsList=[int(x) for x in args.jobs.split(',')]
+	with tempfile.TemporaryDirectory() as RunLogDir:
+		MakeRunLogs(RunLogDir, args.logs, args.lines)
+		Size=sum([os.path.getsize(os.path.join(RunLogDir, x)) for x in os.listdir(RunLogDir)])
+		sys.stdout.write('{} runlogs, {:.0f} MB, {} cpu(s)\n'.format(args.logs, Size/1024.**2, multiprocessing.cpu_count()))
+
+		Serial=Analyse(RunLogDir, 1)
+		SerialTime=None
+		for Jobs in JobsList:
+			if Analyse(RunLogDir, Jobs) != Serial:
+				sys.stderr.write('Error: the results with {} processes differ from the serial ones\n'.format(Jobs))
+			Time=min(timeit.repeat(lambda: Analyse(RunLogDir, Jobs), number=1, repeat=args.repeat))
+			if SerialTime is None:
+				SerialTime=Time
+			sys.stdout.write('{:40s} {:8.2f} ms {:6.2f}x\n'.format('--jobs '+str(Jobs), Time*1000., SerialTime/Time))
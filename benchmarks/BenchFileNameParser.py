@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+################################################################
+# BenchFileNameParser.py
+#
+# micro benchmark of helpers.AerocomFileName against the string
+# splitting GetModelVars and GetModelYears used before
+#
+# usage: benchmarks/BenchFileNameParser.py [--files 50000]
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import sys
+import argparse
+import timeit
+import fnmatch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.AerocomFileName import ParseFileList
+
+def SyntheticListing(NumFiles):
+	"""return a synthetic directory listing with NumFiles file names of both conventions"""
+	Vars=['od550aer','od550dust','od550bc','od550so4','abs550aer','ang4487aer','sconcso4','sconcbc',
+		'wetso4','dryso4','emiso2','loaddust','ec5503daer','vmro3','concpm10','concpm25']
+	VertCodes=['Column','Surface','ModelLevel','ModelLevelAtStations']
+	Freqs=['monthly','daily','hourly']
+	RetVal=[]
+	i=0
+	while len(RetVal) < NumFiles:
+		Var=Vars[i % len(Vars)]
+		Year=str(1980+(i//len(Vars)) % 40)
+		Freq=Freqs[(i//(len(Vars)*40)) % len(Freqs)]
+		Model='Model{}-v{}.{}'.format(i % 7, i % 3, i % 5)
+		if i % 4 == 0:
+			RetVal.append('.'.join(['aerocom',Model,Freq,Var,Year,'nc']))
+		else:
+			VertCode=VertCodes[i % len(VertCodes)]
+			RetVal.append('_'.join(['aerocom3',Model,'AP3-CTRL',Var,VertCode,Year,Freq])+'.nc')
+		i+=1
+	return RetVal
+
+###################################################################################
+
+def SplitParse(FileNames):
+	#the string splitting of GetModelVars and GetModelYears before
+	#the introduction of helpers.AerocomFileName
+	Vars=[]
+	Years=[]
+	for file in FileNames:
+		if os.path.basename(file).count('_') >= 4:
+			c_DummyArr=file.split('_')
+			Vars.append(c_DummyArr[-4])
+			Years.append(c_DummyArr[-2])
+		elif os.path.basename(file).count('.') >= 4:
+			c_DummyArr=file.split('.')
+			Vars.append(c_DummyArr[-3])
+			Years.append(c_DummyArr[-2])
+	return Vars, Years
+
+def SplitYearsPerVar(FileNames, Vars):
+	#GetModelYears for every variable: one glob ('*Var*.nc') and split per variable
+	RetVal={}
+	for Var in Vars:
+		Files=fnmatch.filter(FileNames, '*'+Var+'*.nc')
+		RetVal[Var]=sorted(set(SplitParse(Files)[1]))
+	return RetVal
+
+def TableYearsPerVar(Table, Vars):
+	RetVal={}
+	for Var in Vars:
+		RetVal[Var]=Table.Unique('Year', Table.Select(Var=Var))
+	return RetVal
+
+###################################################################################
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='micro benchmark of the aerocom file name parser\n\n')
+	parser.add_argument("--files", help="number of file names in the synthetic listing. Defaults to 50000.", type=int, default=50000)
+	parser.add_argument("--repeat", help="number of repetitions; the best one is reported. Defaults to 5.", type=int, default=5)
+	args = parser.parse_args()
+
+	FileNames=SyntheticListing(args.files)
+	Table=ParseFileList(FileNames)
+	Vars=Table.Unique('Var')
+
+	Results=[]
+	Results.append(('parse listing, string splitting', lambda: SplitParse(FileNames)))
+	Results.append(('parse listing, AerocomFileName', lambda: ParseFileList(FileNames)))
+	Results.append(('years of all vars, glob + split per var', lambda: SplitYearsPerVar(FileNames, Vars)))
+	Results.append(('years of all vars, parsed table', lambda: TableYearsPerVar(Table, Vars)))
+	Results.append(('select one var and year, parsed table', lambda: Table.Select(Var='od550aer', Year='2010')))
+
+	sys.stdout.write('{} file names, {} variables\n'.format(len(FileNames), len(Vars)))
+	for Name, Func in Results:
+		Time=min(timeit.repeat(Func, number=1, repeat=args.repeat))
+		sys.stdout.write('{:45s} {:8.2f} ms\n'.format(Name, Time*1000.))
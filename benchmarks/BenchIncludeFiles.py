@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+################################################################
+# BenchIncludeFiles.py
+#
+# benchmark the generation of the IDL include files for all
+# variables supported by WriteIDLIncludeFile
+#
+# usage: benchmarks/BenchIncludeFiles.py [--repeat 5] [--write]
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import sys
+import argparse
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+import WriteIDLIncludeFile
+
+def GetParams(Var, OutputDir):
+	#parameters for the include file of a variable with some of the optional flags set
+	dict_Param={}
+	dict_Param['IDLOutFile']=os.path.join(OutputDir, Var+'_include.pro')
+	dict_Param['VarName']=Var
+	dict_Param['NOSEND']=True
+	dict_Param['PLOTDAILYTIMESERIES']=True
+	return dict_Param
+
+def RenderAllIncludeFiles(Vars, Uncached=False):
+	#put the include files for all variables together, without writing them
+	CachedFunc=WriteIDLIncludeFile.GetIncludeFileData
+	if Uncached:
+		#use the function without the in process cache; then every fragment
+		#lookup loads the whole fragment catalogue again
+		WriteIDLIncludeFile.GetIncludeFileData=CachedFunc.__wrapped__
+	try:
+		for Var in Vars:
+			WriteIDLIncludeFile.GetIDLIncludeFileContent(GetParams(Var, ''))
+	finally:
+		WriteIDLIncludeFile.GetIncludeFileData=CachedFunc
+
+def LoadCatalogue(FromCache=True):
+	#load the fragment catalogue once, as at program start
+	if FromCache:
+		WriteIDLIncludeFile.GetIncludeFileData.__wrapped__()
+	else:
+		WriteIDLIncludeFile.ReadFragmentFile(WriteIDLIncludeFile.GetFragmentFile())
+
+def WriteAllIncludeFiles(OutputDir, Vars):
+	for Var in Vars:
+		WriteIDLIncludeFile.WriteIDLIncludeFile(GetParams(Var, OutputDir))
+
+###################################################################################
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='benchmark the generation of the IDL include files for all supported variables\n\n')
+	parser.add_argument("--repeat", help="number of repetitions; the best one is reported. Defaults to 5.", type=int, default=5)
+	parser.add_argument("--write", help="also time writing the files to a temporary directory (dominated by the file system)", action='store_true')
+	args = parser.parse_args()
+
+	Vars=sorted(WriteIDLIncludeFile.GetIDLIncludeFileText('nogroup','whatever', all=True)['VARS'].keys())
+	sys.stdout.write('{} supported variables\n'.format(len(Vars)))
+	Results=[]
+	Results.append(('fragment catalogue parsed from ini file', lambda: LoadCatalogue(FromCache=False)))
+	Results.append(('fragment catalogue from pickle cache', lambda: LoadCatalogue()))
+	Results.append(('include file text, catalogue reloaded', lambda: RenderAllIncludeFiles(Vars, Uncached=True)))
+	Results.append(('include file text, fragments cached', lambda: RenderAllIncludeFiles(Vars)))
+	with tempfile.TemporaryDirectory() as OutputDir:
+		if args.write:
+			Results.append(('include files written', lambda: WriteAllIncludeFiles(OutputDir, Vars)))
+		for Name, Func in Results:
+			Time=min(timeit.repeat(Func, number=1, repeat=args.repeat))
+			sys.stdout.write('{:40s} {:8.2f} ms\n'.format(Name, Time*1000.))
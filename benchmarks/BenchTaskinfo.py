@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+################################################################
+# BenchTaskinfo.py
+#
+# benchmark counting the idl processes of a user on a busy host
+# using a synthetic /proc directory
+#
+# Compares helpers.Taskinfo.Taskinfo (psutil, pointed to the
+# synthetic /proc via psutil.PROCFS_PATH), TaskPids and the
+# incremental TaskCounter.
+# When run as root, the processes get different owners; otherwise
+# all of them belong to the current user.
+#
+# usage: benchmarks/BenchTaskinfo.py [--procs 5000] [--users 50] [--repeat 5]
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import sys
+import argparse
+import getpass
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)),'..'))
+from helpers.Taskinfo import Taskinfo, TaskPids, TaskCounter
+
+#ids of the synthetic users (besides the current one)
+FirstUid=20000
+
+def MakeProcDir(ProcDir, NumOfProcs, NumOfUsers):
+	"""fill ProcDir with NumOfProcs processes
+
+	every 10th process of the current user and every 50th of the other
+	users is an idl
+	"""
+	MyUid=os.getuid()
+	ChownFlag=MyUid == 0
+	with open(os.path.join(ProcDir, 'stat'), 'w') as OutHandle:
+		OutHandle.write('cpu  1 1 1 1 1 1 1 1 1 1\nbtime 1700000000\n')
+	NumOfIDLs=0
+	for Index in range(NumOfProcs):
+		Pid=str(1000+Index)
+		if Index % NumOfUsers == 0:
+			Uid=MyUid
+			Name='idl' if Index % (10*NumOfUsers) == 0 else 'bash'
+		else:
+			Uid=FirstUid+Index % NumOfUsers
+			Name='idl' if Index % 50 == 0 else 'python3'
+		if Uid == MyUid and Name == 'idl':
+			NumOfIDLs+=1
+		Dir=os.path.join(ProcDir, Pid)
+		os.mkdir(Dir)
+		with open(os.path.join(Dir, 'comm'), 'w') as OutHandle:
+			OutHandle.write(Name+'\n')
+		with open(os.path.join(Dir, 'cmdline'), 'w') as OutHandle:
+			OutHandle.write(Name+'\0-queue\0-e\0aerocom_main\0')
+		with open(os.path.join(Dir, 'stat'), 'w') as OutHandle:
+			OutHandle.write(Pid+' ('+Name+') S 1 '+Pid+' '+Pid+' 0 -1 4194560'+' 0'*13+' 100'+' 0'*30+'\n')
+		with open(os.path.join(Dir, 'status'), 'w') as OutHandle:
+			OutHandle.write('Name:\t'+Name+'\nState:\tS (sleeping)\nPid:\t'+Pid+'\nPPid:\t1\n'
+				+'Uid:\t{0}\t{0}\t{0}\t{0}\nGid:\t{0}\t{0}\t{0}\t{0}\n'.format(Uid))
+		if ChownFlag:
+			os.chown(Dir, Uid, Uid)
+	if not ChownFlag:
+		NumOfIDLs=len([x for x in range(NumOfProcs) if x % (10*NumOfUsers) == 0 or (x % NumOfUsers != 0 and x % 50 == 0)])
+	return NumOfIDLs
+
+###################################################################################
+
+if __name__ == '__main__':
+	import psutil
+
+	parser = argparse.ArgumentParser(description='benchmark counting the idl processes of a user in a synthetic /proc\n\n')
+	parser.add_argument("--procs", help="# of processes in the synthetic /proc. Defaults to 5000.", type=int, default=5000)
+	parser.add_argument("--users", help="# of users owning them. Defaults to 50.", type=int, default=50)
+	parser.add_argument("--repeat", help="number of repetitions; the best one is reported. Defaults to 5.", type=int, default=5)
+	args = parser.parse_args()
+
+	user=getpass.getuser()
+	with tempfile.TemporaryDirectory() as ProcDir:
+		Expected=MakeProcDir(ProcDir, args.procs, args.users)
+		sys.stdout.write('{} processes, {} idl(s) of user {}\n'.format(args.procs, Expected, user))
+		psutil.PROCFS_PATH=ProcDir
+
+		Counter=TaskCounter('.*idl', user=user, ProcDir=ProcDir)
+		Results=[]
+		Results.append(('Taskinfo (psutil)', lambda: len(Taskinfo('.*idl', user=user))))
+		Results.append(('TaskPids', lambda: len(TaskPids('.*idl', user=user, ProcDir=ProcDir))))
+		Results.append(('TaskCounter, repeated calls', lambda: Counter.Count()))
+		for Name, Func in Results:
+			Count=Func()
+			if Count != Expected:
+				sys.stderr.write('Error: '+Name+' counted '+str(Count)+' idls instead of '+str(Expected)+'\n')
+			Time=min(timeit.repeat(Func, number=1, repeat=args.repeat))
+			sys.stdout.write('{:40s} {:8.2f} ms\n'.format(Name, Time*1000.))
@@ -0,0 +1 @@
+../helpers/SlotManager.py
\ No newline at end of file
@@ -0,0 +1,110 @@
+################################################################
+# Admission.py
+#
+# resource aware admission control for the idl runs of the
+# aerocom-tool-automation software
+#
+# --numcpu just limits the # of idls running at once, but the memory
+# an idl run needs differs a lot between e.g. a monthly 1x1 degree column
+# variable and a daily 3D model level one. The admission control admits
+# a new run only while the host has free memory and cpu left, based on
+# a memory estimate for each run (see EstimateMemory).
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import time
+import multiprocessing
+
+GB=1024.**3
+#memory of an idl run with the aerocom tools without the model data
+DefaultBaseMemory=0.5*GB
+#memory per byte of model data read (the files are compressed and
+#idl keeps more than one copy of the fields)
+DefaultSizeFactor=4.
+#memory to keep free for everything else
+DefaultMemReserve=2.*GB
+
+def EstimateMemory(Size, BaseMemory=DefaultBaseMemory, SizeFactor=DefaultSizeFactor):
+	"""estimated peak memory in bytes of an idl run reading Size bytes of model data
+
+	Size is usually helpers.ModelInventory.GetSize for the variable and year
+	of the run, so the resolution, the vertical levels and the time frequency
+	of the variable are all accounted for by the file size.
+	"""
+	return BaseMemory+SizeFactor*Size
+
+###################################################################################
+
+class AdmissionControl:
+	"""admit a new idl run only while the host has headroom
+
+	A run with the estimated memory use Cost (bytes) is admitted if
+	- the available memory minus MemReserve covers Cost plus the estimates
+	  of the runs started during the last SettleTime seconds (these idls
+	  have usually not read their data yet, so their memory does not show
+	  up in the free memory yet)
+	- the 1 minute load average plus the # of runs started during the last
+	  SettleTime seconds is below MaxLoad (default: # of cpus)
+	If none of our own runs is running, a run is always admitted, so that a
+	run bigger than the host's free memory does not wait forever.
+	The scheduler should check again after PollTime seconds when a run was
+	not admitted.
+	"""
+
+	def __init__(self, MemReserve=DefaultMemReserve, MaxLoad=None, SettleTime=60., PollTime=10.,
+		VerboseFlag=False, DebugFlag=False):
+		self.MemReserve=MemReserve
+		if MaxLoad is None:
+			MaxLoad=float(multiprocessing.cpu_count())
+		self.MaxLoad=MaxLoad
+		self.SettleTime=SettleTime
+		self.PollTime=PollTime
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		#(start time, cost) of the runs started recently
+		self.Recent=[]
+
+	def Admit(self, Cost=None, NumRunning=0):
+		"""True if a run with the memory estimate Cost can be started now
+
+		NumRunning is the # of our own runs running at the moment
+		"""
+		import psutil
+
+		Now=time.time()
+		self.Recent=[x for x in self.Recent if Now-x[0] < self.SettleTime]
+		if NumRunning == 0:
+			return True
+		if Cost is None:
+			Cost=EstimateMemory(0)
+
+		Pending=sum([x[1] for x in self.Recent])
+		Available=psutil.virtual_memory().available-self.MemReserve
+		if Available < Cost+Pending:
+			if self.VerboseFlag:
+				sys.stderr.write('Not enough free memory for the next run: {:.1f}GB needed, {:.1f}GB available\n'.format(
+					(Cost+Pending)/GB, Available/GB))
+			return False
+
+		Load=os.getloadavg()[0]+len(self.Recent)
+		if Load >= self.MaxLoad:
+			if self.VerboseFlag:
+				sys.stderr.write('Load too high for the next run: {:.1f} (max {:.1f})\n'.format(Load, self.MaxLoad))
+			return False
+
+		return True
+
+	def Started(self, Cost=None):
+		"""note that a run with the memory estimate Cost was started"""
+		if Cost is None:
+			Cost=EstimateMemory(0)
+		self.Recent.append((time.time(), Cost))
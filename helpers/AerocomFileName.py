@@ -0,0 +1,171 @@
+################################################################
+# AerocomFileName.py
+#
+# parser for the file naming conventions of the aerocom data base
+#
+# aerocom3 convention:
+# aerocom3_<model>_<experiment>_<var>_<vertical code>_<year>_<frequency>.nc
+# e.g. aerocom3_CAM5.3-Oslo_AP3-CTRL2016-PD_od550aer_Column_2010_monthly.nc
+#
+# legacy convention (aerocom phase 2 and before):
+# aerocom.<model>.<frequency>.<var>.<year>.nc
+# e.g. aerocom.AATSR_ensemble.v2.6.daily.od550aer.2012.nc
+#
+# The fields are counted from the end of the file name, so model
+# names containing dots or underscores are fine.
+# A file name with 4 or more underscores is treated as aerocom3
+# file, otherwise one with 4 or more dots as a legacy file.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+import re
+
+Aerocom3Regexp=re.compile(r'^(?P<Head>.*)_(?P<Var>[^_]*)_(?P<VertCode>[^_]*)_(?P<Year>[^_]*)_(?P<Freq>[^_]*)\.nc$')
+LegacyRegexp=re.compile(r'^(?P<Head>.*)\.(?P<Freq>[^.]*)\.(?P<Var>[^.]*)\.(?P<Year>[^.]*)\.nc$')
+
+#values of the Convention column
+AEROCOM3='aerocom3'
+LEGACY='aerocom'
+
+Columns=['File', 'Convention', 'Model', 'Experiment', 'Var', 'VertCode', 'Year', 'Freq']
+
+def ParseFileName(FileName):
+	"""parse a single file name
+
+	returns a dict with the keys in Columns or None if the file name
+	follows none of the conventions.
+	"""
+	Table=ParseFileList([FileName])
+	if len(Table) == 0:
+		return None
+	return Table.Row(0)
+
+###################################################################################
+
+def ParseFileList(FileNames):
+	"""parse a list of file names (e.g. a directory listing) in one go
+
+	Directories in front of the file names are ignored.
+	Returns a FileNameTable holding the parsed names; names not following
+	one of the conventions are left out.
+	"""
+	Table=FileNameTable()
+	#bind everything used in the loop locally; this runs for every file
+	#of a directory listing
+	Aerocom3Match=Aerocom3Regexp.match
+	LegacyMatch=LegacyRegexp.match
+	basename=os.path.basename
+	File=Table.File.append
+	Convention=Table.Convention.append
+	Model=Table.Model.append
+	Experiment=Table.Experiment.append
+	Var=Table.Var.append
+	VertCode=Table.VertCode.append
+	Year=Table.Year.append
+	Freq=Table.Freq.append
+
+	for FileName in FileNames:
+		if '/' in FileName:
+			FileName=basename(FileName)
+		Match=Aerocom3Match(FileName)
+		if Match is not None:
+			Head, c_Var, c_VertCode, c_Year, c_Freq=Match.groups()
+			#<prefix>_<model>_<experiment>
+			c_Dummy, Sep, c_Rest=Head.partition('_')
+			c_Model, Sep, c_Experiment=c_Rest.rpartition('_')
+			Convention(AEROCOM3)
+			VertCode(c_VertCode)
+		else:
+			Match=LegacyMatch(FileName)
+			if Match is None:
+				continue
+			Head, c_Freq, c_Var, c_Year=Match.groups()
+			#<prefix>.<model>
+			c_Dummy, Sep, c_Model=Head.partition('.')
+			c_Experiment=''
+			Convention(LEGACY)
+			VertCode(None)
+		File(FileName)
+		Model(c_Model)
+		Experiment(c_Experiment)
+		Var(c_Var)
+		Year(c_Year)
+		Freq(c_Freq)
+
+	return Table
+
+###################################################################################
+
+class FileNameTable:
+	"""column wise table of parsed file names
+
+	Each entry in Columns is an attribute holding a list; row i of the
+	table is made of the i-th element of each of them.
+	"""
+
+	def __init__(self):
+		for Column in Columns:
+			setattr(self, Column, [])
+
+	def __len__(self):
+		return len(self.File)
+
+	def Row(self, Index):
+		"""return row Index as dict"""
+		return {x:getattr(self, x)[Index] for x in Columns}
+
+	def Select(self, **Conditions):
+		"""indices of the rows where all the given columns have the given value
+
+		e.g. Select(Var='od550aer', Year='2010')
+		A value can also be a set or a list of allowed values.
+		All conditions are checked in a single pass over the table.
+		"""
+		Checks=[]
+		for Column in Conditions:
+			Value=Conditions[Column]
+			if isinstance(Value, (set, frozenset, list, tuple)):
+				Checks.append((getattr(self, Column), frozenset(Value), True))
+			else:
+				Checks.append((getattr(self, Column), Value, False))
+
+		if len(Checks) == 0:
+			return list(range(len(self)))
+		if len(Checks) == 1:
+			ColumnData, Value, IsSet=Checks[0]
+			if IsSet:
+				return [i for i, x in enumerate(ColumnData) if x in Value]
+			return [i for i, x in enumerate(ColumnData) if x == Value]
+
+		RetVal=[]
+		for i in range(len(self)):
+			for ColumnData, Value, IsSet in Checks:
+				if IsSet:
+					if ColumnData[i] not in Value:
+						break
+				elif ColumnData[i] != Value:
+					break
+			else:
+				RetVal.append(i)
+		return RetVal
+
+	def Values(self, Column, Indices=None):
+		"""values of a column; only the rows in Indices if given"""
+		ColumnData=getattr(self, Column)
+		if Indices is None:
+			return list(ColumnData)
+		return [ColumnData[i] for i in Indices]
+
+	def Unique(self, Column, Indices=None):
+		"""sorted unique values of a column; only the rows in Indices if given
+
+		None (the vertical code of legacy files) is left out
+		"""
+		return sorted(set(self.Values(Column, Indices))-{None})
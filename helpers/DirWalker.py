@@ -0,0 +1,98 @@
+################################################################
+# DirWalker.py
+#
+# concurrent directory walking for the file system discovery
+# of the aerocom-tool-automation software
+#
+# On a parallel file system like lustre, the time of a directory
+# walk is dominated by the round trips to the metadata server,
+# not by the work done on our side. So we have several directory
+# listings in flight at the same time using a thread pool.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+#default # of threads used
+DefaultJobs=8
+
+def MapFolders(Func, Folders, Jobs=None):
+	"""return [Func(Folder) for Folder in Folders], computed with Jobs threads
+
+	The results are in the order of Folders.
+	"""
+	if Jobs is None:
+		Jobs=DefaultJobs
+	if Jobs <= 1 or len(Folders) <= 1:
+		return [Func(x) for x in Folders]
+	with ThreadPoolExecutor(max_workers=min(Jobs, len(Folders))) as Executor:
+		return list(Executor.map(Func, Folders))
+
+###################################################################################
+
+def ListSubDirs(Dir):
+	"""default ListFunc of ParallelWalk: all sub directories of Dir
+
+	like os.walk, symlinks to directories are not descended into
+	"""
+	with os.scandir(Dir) as Entries:
+		SubDirs=[x.name for x in Entries if x.is_dir(follow_symlinks=False)]
+	return SubDirs, None
+
+def ParallelWalk(Folders, ListFunc=ListSubDirs, Jobs=None):
+	"""walk the directory trees below Folders using Jobs threads
+
+	ListFunc(Dir) is called in the threads once for every directory and
+	returns a tuple (names of the sub directories to descend into, Data).
+	Data can be anything the caller wants to get back for Dir.
+	A directory for which ListFunc raises OSError is left out (like os.walk
+	does by default).
+
+	returns a list with one entry per folder in Folders (in the same order)
+	Each entry is a list of (Dir, Data) tuples in top down order with the
+	sub directories sorted by name, so that the result does not depend on
+	the order the directories were listed in.
+	"""
+	if Jobs is None:
+		Jobs=DefaultJobs
+
+	dict_Results={}
+	#walk every folder just once, even if listed more than once
+	UniqueFolders=list(dict.fromkeys(Folders))
+	with ThreadPoolExecutor(max_workers=max(1, Jobs)) as Executor:
+		Pending={}
+		for Folder in UniqueFolders:
+			Pending[Executor.submit(ListFunc, Folder)]=(Folder, Folder)
+		while len(Pending) > 0:
+			Done, NotDone=wait(Pending, return_when=FIRST_COMPLETED)
+			for Future in Done:
+				Folder, Dir=Pending.pop(Future)
+				try:
+					SubDirs, Data=Future.result()
+				except OSError:
+					continue
+				dict_Results.setdefault(Folder, {})[Dir]=(sorted(SubDirs), Data)
+				for SubDir in SubDirs:
+					FullDir=os.path.join(Dir, SubDir)
+					Pending[Executor.submit(ListFunc, FullDir)]=(Folder, FullDir)
+
+	RetVal=[]
+	for Folder in Folders:
+		Tree=dict_Results.get(Folder, {})
+		Walk=[]
+		DirsToAdd=[Folder] if Folder in Tree else []
+		while len(DirsToAdd) > 0:
+			Dir=DirsToAdd.pop()
+			SubDirs, Data=Tree[Dir]
+			Walk.append((Dir, Data))
+			DirsToAdd.extend([os.path.join(Dir, x) for x in reversed(SubDirs) if os.path.join(Dir, x) in Tree])
+		RetVal.append(Walk)
+
+	return RetVal
@@ -0,0 +1,132 @@
+################################################################
+# DurationDB.py
+#
+# local SQLite data base of the durations of the idl runs of the
+# aerocom-tool-automation software
+#
+# The durations are mined from the runlogs by ATAStats (see
+# ATAStats.GetRunDurations and ATAStats --durationdb) and are used
+# for the run time estimates of the scheduler (helpers.JobCost).
+# Keeping them also shows when the idl tools got slower over time.
+#
+# A run is identified by the name of its log file and its start
+# time, so a log moved to the success directory is not counted twice.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import math
+import sqlite3
+
+DefaultDBFile=os.path.join(os.path.expanduser('~'),'.aerocom-tool-automation','durations.sqlite')
+
+#columns that can be grouped by in Percentiles
+GroupColumns=['Model', 'Var', 'Freq', 'ModelYear']
+
+Schema='''create table if not exists runs (
+	LogName text not null,
+	StartTime real not null,
+	EndTime real not null,
+	Duration real not null,
+	Model text,
+	Var text,
+	Freq text,
+	ModelYear text,
+	Success integer not null,
+	primary key (LogName, StartTime))'''
+
+def Percentile(Values, Percent):
+	"""nearest rank percentile of a non empty list of numbers"""
+	Values=sorted(Values)
+	Rank=max(1, int(math.ceil(Percent/100.*len(Values))))
+	return Values[Rank-1]
+
+###################################################################################
+
+class DurationDB:
+	"""durations of idl runs in a SQLite file
+
+	The directory of DBFile is created if needed.
+	"""
+
+	def __init__(self, DBFile=DefaultDBFile, VerboseFlag=False, DebugFlag=False):
+		self.DBFile=DBFile
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		DBDir=os.path.dirname(os.path.abspath(DBFile))
+		os.makedirs(DBDir, exist_ok=True)
+		#the data base may live on a shared file system; wait for other writers
+		self.Connection=sqlite3.connect(DBFile, timeout=60.)
+		with self.Connection:
+			self.Connection.execute(Schema)
+
+	def Close(self):
+		self.Connection.close()
+
+	def Add(self, Runs):
+		"""add runs (dicts as returned by ATAStats.GetRunDurations)
+
+		runs already in the data base are replaced; returns the # of runs added
+		"""
+		Rows=[(os.path.basename(x['File']), x['Start'], x['End'], x['Duration'], x['Model'], x['Var'], x['Freq'],
+			x['ModelYear'], int(x['Success'])) for x in Runs]
+		with self.Connection:
+			self.Connection.executemany('insert or replace into runs '
+				+'(LogName, StartTime, EndTime, Duration, Model, Var, Freq, ModelYear, Success) values (?,?,?,?,?,?,?,?,?)', Rows)
+		return len(Rows)
+
+	def KnownLogs(self):
+		"""dict log name -> end time of the runs in the data base
+
+		used to read only new or changed runlogs
+		"""
+		return dict(self.Connection.execute('select LogName, max(EndTime) from runs group by LogName').fetchall())
+
+	def Durations(self, SuccessOnly=True, Since=None, **Conditions):
+		"""list of (Model, Var, Freq, ModelYear, StartTime, Duration) of the runs
+
+		Conditions select on the columns in GroupColumns, e.g. Model='CAM5.3-Oslo'
+		Since: only runs started after that time (seconds since the epoch)
+		"""
+		Where=[]
+		Values=[]
+		for Column in Conditions:
+			if Column not in GroupColumns:
+				raise ValueError('unknown column '+Column)
+			Where.append(Column+'=?')
+			Values.append(Conditions[Column])
+		if SuccessOnly:
+			Where.append('Success=1')
+		if Since is not None:
+			Where.append('StartTime>=?')
+			Values.append(Since)
+		Query='select Model, Var, Freq, ModelYear, StartTime, Duration from runs'
+		if len(Where) > 0:
+			Query+=' where '+' and '.join(Where)
+		return self.Connection.execute(Query+' order by StartTime', Values).fetchall()
+
+	def Percentiles(self, GroupBy=('Model', 'Var', 'Freq'), SuccessOnly=True, Since=None, **Conditions):
+		"""p50 and p95 of the durations in seconds per group
+
+		returns a dict with the tuple of the GroupBy values as key and a dict
+		with the keys N, P50 and P95 as value
+		"""
+		Indices=[GroupColumns.index(x) for x in GroupBy]
+		Groups={}
+		for Row in self.Durations(SuccessOnly=SuccessOnly, Since=Since, **Conditions):
+			Groups.setdefault(tuple([Row[x] for x in Indices]), []).append(Row[5])
+		RetVal={}
+		for Key in Groups:
+			RetVal[Key]={'N':len(Groups[Key]), 'P50':Percentile(Groups[Key], 50), 'P95':Percentile(Groups[Key], 95)}
+
+		if self.DebugFlag:
+			pdb.set_trace()
+
+		return RetVal
@@ -0,0 +1,162 @@
+################################################################
+# FileWriter.py
+#
+# shared writer for the files the aerocom-tool-automation software
+# creates before starting idl (include files, model list files,
+# the specialised aerocom_main.pro files and their links)
+#
+# Every file is written to a temporary file first and then renamed
+# to its final name, so that a file is either complete or not there.
+# When the files get written to disk is given by the durability:
+# per-file: each file is fsynced before it is renamed (one round trip
+#           to the file system per file)
+# batch:    nothing is synced while writing; Commit() syncs all file
+#           systems written to at once (syncfs), or if that is not
+#           available, fsyncs the files and their directories
+# none:     no syncing at all; the operating system writes the files
+#           whenever it likes
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import time
+
+PERFILE='per-file'
+BATCH='batch'
+NONE='none'
+Durabilities=[PERFILE, BATCH, NONE]
+DefaultDurability=BATCH
+
+def SyncFileSystem(Fd):
+	"""sync the file system the open file descriptor Fd is on (syncfs(2))
+
+	returns False if syncfs is not available
+	"""
+	import ctypes
+	import ctypes.util
+
+	try:
+		Libc=ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+		syncfs=Libc.syncfs
+	except (OSError, AttributeError):
+		return False
+	if syncfs(Fd) != 0:
+		Errno=ctypes.get_errno()
+		raise OSError(Errno, os.strerror(Errno))
+	return True
+
+###################################################################################
+
+class FileWriter:
+	"""write files atomically with a selectable durability
+
+	The time spent in file system calls is summed up in IOTime.
+	"""
+
+	def __init__(self, Durability=DefaultDurability, VerboseFlag=False, DebugFlag=False):
+		if Durability not in Durabilities:
+			sys.stderr.write('Error: unknown durability '+str(Durability)+'. Supported are '+', '.join(Durabilities)+'\n')
+			sys.exit(1)
+		self.Durability=Durability
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+
+		#files and directories written since the last Commit()
+		self.Pending=[]
+		self.PendingDirs=set()
+		self.NumOfFiles=0
+		self.NumOfSyncs=0
+		self.IOTime=0.
+
+	def Write(self, FileName, Content):
+		"""write the string Content to FileName"""
+		StartTime=time.perf_counter()
+		TmpFile=FileName+'.'+str(os.getpid())+'.tmp'
+		try:
+			with open(TmpFile, 'w') as OutHandle:
+				OutHandle.write(Content)
+				if self.Durability == PERFILE:
+					OutHandle.flush()
+					os.fsync(OutHandle.fileno())
+					self.NumOfSyncs+=1
+			os.replace(TmpFile, FileName)
+		except BaseException:
+			try:
+				os.remove(TmpFile)
+			except OSError:
+				pass
+			raise
+		self._Written(FileName)
+		self.IOTime+=time.perf_counter()-StartTime
+
+	def Symlink(self, Target, LinkName):
+		"""create the symbolic link LinkName pointing to Target"""
+		StartTime=time.perf_counter()
+		os.symlink(Target, LinkName)
+		self._Written(LinkName, IsLink=True)
+		self.IOTime+=time.perf_counter()-StartTime
+
+	def _Written(self, FileName, IsLink=False):
+		self.NumOfFiles+=1
+		if self.Durability == BATCH:
+			if not IsLink:
+				self.Pending.append(FileName)
+			self.PendingDirs.add(os.path.dirname(os.path.abspath(FileName)))
+
+	def Commit(self):
+		"""make the files written so far durable (durability batch only)"""
+		StartTime=time.perf_counter()
+		if self.Durability == BATCH and len(self.PendingDirs) > 0:
+			#one syncfs per file system written to
+			Devices=set()
+			for Dir in sorted(self.PendingDirs):
+				Fd=os.open(Dir, os.O_RDONLY)
+				try:
+					Device=os.fstat(Fd).st_dev
+					if Device in Devices:
+						continue
+					if SyncFileSystem(Fd):
+						Devices.add(Device)
+						self.NumOfSyncs+=1
+						continue
+					#no syncfs: sync the files and the directories one by one
+					for FileName in self.Pending:
+						if os.path.dirname(os.path.abspath(FileName)) == Dir:
+							self._FSync(FileName)
+					os.fsync(Fd)
+					self.NumOfSyncs+=1
+				finally:
+					os.close(Fd)
+		self.Pending=[]
+		self.PendingDirs=set()
+		self.IOTime+=time.perf_counter()-StartTime
+
+		if self.VerboseFlag:
+			self.Report()
+		if self.DebugFlag:
+			pdb.set_trace()
+
+	def _FSync(self, FileName):
+		try:
+			Fd=os.open(FileName, os.O_RDONLY)
+		except FileNotFoundError:
+			#removed in the mean time
+			return
+		try:
+			os.fsync(Fd)
+			self.NumOfSyncs+=1
+		finally:
+			os.close(Fd)
+
+	def Report(self):
+		"""write the I/O statistics to stderr"""
+		sys.stderr.write('{} file(s) written, {} sync(s), {:.3f}s spent in I/O (durability {})\n'.format(
+			self.NumOfFiles, self.NumOfSyncs, self.IOTime, self.Durability))
@@ -0,0 +1,356 @@
+################################################################
+# IDLScheduler.py
+#
+# event driven scheduler for the idl jobs started by the
+# aerocom-tool-automation software
+#
+# The jobs are started via StartScreenWithLogging.sh which
+# starts a detached gnu screen session. The scheduler remembers
+# the screen session processes it started itself and gets notified
+# by the kernel (pidfd) when one of them exits. The next queued
+# command is then started right away.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import time
+import datetime
+import getpass
+import selectors
+import subprocess
+from collections import deque
+
+from .Taskinfo import TaskCounter
+
+def FindSessionProcesses(SessionName, user=None):
+	"""find the gnu screen processes belonging to a screen session
+
+	returns a list of psutil.Process objects
+	"""
+	import psutil
+
+	RetVal=[]
+	for proc in psutil.process_iter(attrs=['name', 'cmdline', 'username']):
+		pinfo=proc.info
+		if pinfo['name'] is None or pinfo['name'].lower() != 'screen':
+			continue
+		if user is not None and pinfo['username'] != user:
+			continue
+		if pinfo['cmdline'] is not None and SessionName in pinfo['cmdline']:
+			RetVal.append(proc)
+
+	return RetVal
+
+###################################################################################
+
+class IDLScheduler:
+	"""run a list of commands with at most MaxNumOfTasks idl instances running
+
+	Each job is tracked via the pids of the processes started for it:
+	- the launcher process (the StartScreenWithLogging.sh script)
+	- the screen session the launcher started (found by its session name)
+	A job is finished when all of them have exited. If the screen session
+	does not show up within SessionTimeout seconds after the launcher has
+	exited, the job is finished with ReturnCode -1 and Lost set: its idl
+	may still be starting, so the files it reads must not be removed. Exits are noticed
+	via pidfds (Linux >= 5.3) in a selector, so a free slot is used as soon
+	as it becomes available.
+	If pidfds are not available, the processes are polled every PollInterval
+	seconds instead.
+
+	idl instances of the user not started by this scheduler (e.g. from another
+	run) are counted against MaxNumOfTasks as well; since we get no event
+	when these exit, they are checked every PollTime seconds.
+
+	With a helpers.SlotManager.SlotManager, every job needs a cluster wide
+	slot as well before it is started; the slot is given back when the job
+	has finished. Without a free slot, it is tried again every SlotPollTime
+	seconds. The leases of the running jobs are renewed while waiting.
+
+	With a helpers.Admission.AdmissionControl, a job is only started if the
+	host has enough free memory and cpu for its Cost (estimated memory in
+	bytes, see Submit); otherwise this is checked again after the
+	admission control's PollTime.
+	"""
+
+	def __init__(self, MaxNumOfTasks, WorkDir=None, user=None, PollTime=60., PollInterval=0.5,
+		SlotManager=None, SlotPollTime=10., Admission=None, SessionTimeout=30., VerboseFlag=False, DebugFlag=False):
+		self.MaxNumOfTasks=MaxNumOfTasks
+		self.WorkDir=WorkDir
+		if user is None:
+			user=getpass.getuser()
+		self.user=user
+		self.PollTime=PollTime
+		self.PollInterval=PollInterval
+		self.SlotManager=SlotManager
+		self.SlotPollTime=SlotPollTime
+		self.Admission=Admission
+		self.SessionTimeout=SessionTimeout
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+
+		self.Queue=deque()
+		self.Running=[]
+		self.Finished=[]
+		self.Selector=selectors.DefaultSelector()
+		self.UsePidfd=hasattr(os, 'pidfd_open')
+		#counts the idls of the user; keeps what it knows between the calls
+		self.IDLCounter=TaskCounter('.*idl', user=user)
+
+	def Submit(self, Cmd, SessionName=None, OnDone=None, OnStart=None, Cost=None):
+		"""queue a command; returns the job dict
+
+		OnDone is called with the job dict once the job has finished
+		OnStart is called with the job dict right before the job is started;
+		if it returns False, the job is cancelled instead
+		Cost is the estimated memory use for the admission control
+		"""
+		if SessionName is None and '-S' in Cmd:
+			SessionName=Cmd[Cmd.index('-S')+1]
+		Job={}
+		Job['Cmd']=Cmd
+		Job['SessionName']=SessionName
+		Job['OnDone']=OnDone
+		Job['OnStart']=OnStart
+		Job['Cancelled']=False
+		Job['Lost']=False
+		Job['SessionDeadline']=None
+		Job['Cost']=Cost
+		Job['Slot']=None
+		Job['Launcher']=None
+		Job['Pids']=set()
+		Job['Fds']={}
+		Job['ReturnCode']=None
+		Job['StartTime']=None
+		Job['EndTime']=None
+		self.Queue.append(Job)
+		return Job
+
+	def Run(self):
+		"""start the queued jobs and return once all of them have finished"""
+		while len(self.Queue) > 0 or len(self.Running) > 0:
+			PollTime=self.PollTime
+			while len(self.Queue) > 0:
+				NumOfIDLsRunning=self.NumOfIDLsRunning()
+				if NumOfIDLsRunning >= self.MaxNumOfTasks:
+					if self.VerboseFlag:
+						sys.stderr.write('The max # of idl instances ('+str(self.MaxNumOfTasks)+') for user '+self.user+' has been reached: '+str(datetime.datetime.now())+'\n')
+					break
+				Job=self.Queue[0]
+				if self.Admission is not None:
+					if not self.Admission.Admit(Job['Cost'], NumRunning=len(self.Running)):
+						PollTime=min(PollTime, self.Admission.PollTime)
+						break
+				if self.SlotManager is not None:
+					Job['Slot']=self.SlotManager.Acquire(str(Job['SessionName']))
+					if Job['Slot'] is None:
+						if self.VerboseFlag:
+							sys.stderr.write('No free cluster wide idl slot: '+str(datetime.datetime.now())+'\n')
+						PollTime=min(PollTime, self.SlotPollTime)
+						break
+				self._StartJob(self.Queue.popleft())
+
+			if self.SlotManager is not None:
+				self.SlotManager.Renew()
+				PollTime=min(PollTime, self.SlotManager.LeaseTime/3.)
+			Searching=[x for x in self.Running if x['SessionDeadline'] is not None]
+			if len(Searching) > 0:
+				#no event when a screen session shows up
+				PollTime=min(PollTime, self.PollInterval)
+			if len(self.Running) > 0:
+				#our own jobs will notify us when they exit
+				#wake up at PollTime in case another program's idls are blocking the slots
+				self._WaitForExit(PollTime)
+				for Job in [x for x in Searching if x in self.Running and x['SessionDeadline'] is not None]:
+					self._CheckJob(Job)
+			elif len(self.Queue) > 0:
+				#all slots are taken by idls we did not start ourselves
+				sys.stderr.write('Waiting '+str(PollTime)+'s from now to try again\n')
+				time.sleep(PollTime)
+
+		if self.DebugFlag:
+			pdb.set_trace()
+
+		return self.Finished
+
+	def NumOfIDLsRunning(self):
+		"""# of idl slots in use: our own jobs plus the idls started by someone else"""
+		OwnPids=set()
+		for Job in self.Running:
+			OwnPids.update(self._Descendants(Job))
+		Foreign=[x for x in self.IDLCounter.Pids() if x not in OwnPids]
+		RetVal=len(self.Running)+len(Foreign)
+		if self.VerboseFlag:
+			sys.stderr.write('# of idls running for user '+self.user+': '+str(RetVal)+'\n')
+		return RetVal
+
+	def _Descendants(self, Job):
+		import psutil
+
+		RetVal=set()
+		for Pid in Job['Pids']:
+			try:
+				RetVal.update([x.pid for x in psutil.Process(Pid).children(recursive=True)])
+			except psutil.NoSuchProcess:
+				pass
+		return RetVal
+
+	def Cancel(self, Job, KillFlag=False):
+		"""cancel a job
+
+		A queued job is removed from the queue. A running job is only
+		stopped if KillFlag is set; its screen session is then terminated.
+		Returns True if the job was cancelled.
+		"""
+		import psutil
+
+		if Job in self.Queue:
+			self.Queue.remove(Job)
+			Job['Cancelled']=True
+			self._JobDone(Job)
+			return True
+		if Job in self.Running and KillFlag:
+			Job['Cancelled']=True
+			sys.stderr.write('Killing: '+str(Job['SessionName'])+'\n')
+			for Pid in self._Descendants(Job) | Job['Pids']:
+				try:
+					psutil.Process(Pid).terminate()
+				except psutil.NoSuchProcess:
+					pass
+			return True
+		return False
+
+	def _StartJob(self, Job):
+		if Job['OnStart'] is not None and Job['OnStart'](Job) is False:
+			Job['Cancelled']=True
+			self._JobDone(Job)
+			return
+		sys.stderr.write('Starting: '+' '.join(Job['Cmd'])+'\n')
+		Job['StartTime']=time.time()
+		if self.Admission is not None:
+			self.Admission.Started(Job['Cost'])
+		try:
+			Job['Launcher']=subprocess.Popen(Job['Cmd'], cwd=self.WorkDir)
+		except OSError as ErrorMessage:
+			sys.stderr.write('Error: could not start command: '+str(ErrorMessage)+'\n')
+			Job['ReturnCode']=-1
+			self._JobDone(Job)
+			return
+		self.Running.append(Job)
+		self._Watch(Job, Job['Launcher'].pid)
+
+	def _Watch(self, Job, Pid):
+		"""register a pid of a job to get notified when it exits"""
+		Job['Pids'].add(Pid)
+		if self.UsePidfd is False:
+			return
+		try:
+			Fd=os.pidfd_open(Pid)
+		except ProcessLookupError:
+			#already gone
+			Job['Pids'].discard(Pid)
+			return
+		except OSError:
+			#kernel without pidfd support
+			self.UsePidfd=False
+			return
+		Job['Fds'][Fd]=Pid
+		self.Selector.register(Fd, selectors.EVENT_READ, Job)
+
+	def _Unwatch(self, Job, Pid):
+		Job['Pids'].discard(Pid)
+		for Fd in [x for x in Job['Fds'] if Job['Fds'][x] == Pid]:
+			self.Selector.unregister(Fd)
+			os.close(Fd)
+			del Job['Fds'][Fd]
+
+	def _WaitForExit(self, Timeout):
+		"""block until at least one watched process has exited or Timeout is reached"""
+		if self.UsePidfd:
+			Events=self.Selector.select(timeout=Timeout)
+			Jobs=[]
+			for Key, Mask in Events:
+				Job=Key.data
+				Pid=Job['Fds'][Key.fd]
+				if Pid != Job['Launcher'].pid:
+					#the launcher is still needed to get its return code
+					self._Unwatch(Job, Pid)
+				if Job not in Jobs:
+					Jobs.append(Job)
+			for Job in Jobs:
+				self._CheckJob(Job)
+		else:
+			EndTime=time.time()+Timeout
+			NumRunning=len(self.Running)
+			while len(self.Running) == NumRunning and time.time() < EndTime:
+				for Job in list(self.Running):
+					self._CheckJob(Job)
+				if len(self.Running) == NumRunning:
+					time.sleep(self.PollInterval)
+
+	def _CheckJob(self, Job):
+		"""update the process state of a job and finish it if nothing is left"""
+		import psutil
+
+		Launcher=Job['Launcher']
+		if Launcher.pid in Job['Pids'] and Launcher.poll() is not None:
+			self._Unwatch(Job, Launcher.pid)
+			Job['ReturnCode']=Launcher.returncode
+			if Launcher.returncode != 0:
+				sys.stderr.write('Error: command returned '+str(Launcher.returncode)+': '+' '.join(Job['Cmd'])+'\n')
+			elif Job['SessionName'] is not None:
+				#the launcher detached the screen session; follow that one now
+				Job['SessionDeadline']=time.time()+self.SessionTimeout
+
+		if Job['SessionDeadline'] is not None:
+			Procs=FindSessionProcesses(Job['SessionName'], user=self.user)
+			if len(Procs) > 0:
+				Job['SessionDeadline']=None
+				for proc in Procs:
+					self._Watch(Job, proc.pid)
+			elif time.time() < Job['SessionDeadline']:
+				#the session might need a moment to show up in the process table
+				#looked for again in the next round of Run
+				return
+			else:
+				sys.stderr.write('Error: screen session '+Job['SessionName']+' not found {:.0f}s after it was started: '.format(self.SessionTimeout)
+					+' '.join(Job['Cmd'])+'\n')
+				Job['SessionDeadline']=None
+				Job['Lost']=True
+				Job['ReturnCode']=-1
+
+		#processes without a pidfd have to be checked by hand
+		WatchedPids=Job['Fds'].values()
+		for Pid in [x for x in Job['Pids'] if x != Launcher.pid and x not in WatchedPids]:
+			try:
+				if psutil.Process(Pid).status() != psutil.STATUS_ZOMBIE:
+					continue
+			except psutil.NoSuchProcess:
+				pass
+			self._Unwatch(Job, Pid)
+
+		if len(Job['Pids']) == 0:
+			self.Running.remove(Job)
+			self._JobDone(Job)
+
+	def _JobDone(self, Job):
+		Job['EndTime']=time.time()
+		if Job['Slot'] is not None:
+			self.SlotManager.Release(Job['Slot'])
+			Job['Slot']=None
+		self.Finished.append(Job)
+		if self.VerboseFlag:
+			if Job['StartTime'] is None:
+				sys.stderr.write('Cancelled: '+str(Job['SessionName'])+'\n')
+			else:
+				sys.stderr.write('Finished: '+str(Job['SessionName'])+' after {:.0f}s'.format(Job['EndTime']-Job['StartTime'])+'\n')
+		if Job['OnDone'] is not None:
+			Job['OnDone'](Job)
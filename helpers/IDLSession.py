@@ -0,0 +1,75 @@
+################################################################
+# IDLSession.py
+#
+# put together the idl command line of a session running one
+# or several (model, year) runs of the aerocom-tools
+#
+# A session running a single run calls the specialised aerocom_main
+# procedure directly, like it has always been done.
+# A session running several runs calls them one after another via
+# execute() in a single idl interpreter, so that the idl start up
+# is paid only once. A failing run does not stop the ones after it.
+# After each successful run a marker (an empty directory) is created,
+# so that just the failed runs can be repeated later on.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import os
+
+#value of --years-per-session to choose the # of runs per session automatically
+AUTO='auto'
+
+def GetMainCall(MainProc, Model, Year, ObsYear):
+	"""idl statement calling the specialised aerocom_main procedure MainProc for a run"""
+	return MainProc+",modelin=['"+Model+"'],yearin=['"+Year+"'],datayearin='"+ObsYear+"'"
+
+def GetMarkerFile(MarkerDir, Model, IncludeFile, Year, ObsYear):
+	"""marker of a successful run
+
+	The name contains the name of the include file (which is made from the
+	hash of its content), so a marker is only valid for the same include file.
+	"""
+	IncName=os.path.basename(IncludeFile).replace('.pro','')
+	return os.path.join(MarkerDir, '_'.join([Model, IncName, Year, ObsYear])+'.done')
+
+def GetSessionCommand(Calls):
+	"""idl statement(s) for the -e switch
+
+	Calls is a list of (idl statement, marker file) pairs
+	"""
+	if len(Calls) == 1 and Calls[0][1] is None:
+		return Calls[0][0]
+	Statements=[]
+	for Call, MarkerFile in Calls:
+		#execute() returns 0 if the call failed instead of stopping idl
+		Statements.append('if execute("'+Call+'") then file_mkdir,\''+MarkerFile+'\'')
+	return ' & '.join(Statements)
+
+def GetAutoRunsPerSession(NumOfRuns, MaxNumOfTasks):
+	"""# of runs per session for --years-per-session auto
+
+	as many runs per session as possible while still using all idl slots
+	"""
+	return max(1, int(NumOfRuns // max(1, MaxNumOfTasks)))
+
+def SplitIntoSessions(Runs, RunsPerSession, KeyFunc):
+	"""split a list of runs into sessions of at most RunsPerSession runs
+
+	Only runs with the same KeyFunc(run) are put into the same session.
+	Returns a list of lists of runs.
+	"""
+	dict_Groups={}
+	for Run in Runs:
+		dict_Groups.setdefault(KeyFunc(Run), []).append(Run)
+	RetVal=[]
+	for Key in dict_Groups:
+		Group=dict_Groups[Key]
+		for Index in range(0, len(Group), RunsPerSession):
+			RetVal.append(Group[Index:Index+RunsPerSession])
+	return RetVal
@@ -0,0 +1,308 @@
+################################################################
+# IDLWorkerPool.py
+#
+# pool of long running idl interpreters fed with idl statements
+# through a spool directory
+#
+# Every worker is an idl started once with the driver procedure
+# ata_worker (see DriverCode below) and has its own directory in
+# the spool directory. A job is handed to an idle worker by writing
+# the idl statement to <worker dir>/<job id>.job. The worker renames
+# it to <job id>.run, executes the statement and writes its status
+# (1: success, 0: error) to <job id>.done. The worker stops when the
+# file STOP appears in its directory.
+# This way idl is started (and a licence is taken) just once per
+# worker instead of once per job.
+# The output of a worker goes to <worker dir>.log. If a runlog directory
+# is given, the part of it belonging to a job is copied to a runlog of
+# its own there, named like the runlogs of the screen sessions
+# (<name>_<user>_aerocom-tools.log), so that ATAStats sees the runs.
+#
+# For testing, StartIDL/StubIDL.py can be used instead of idl.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import time
+import getpass
+import datetime
+import subprocess
+from collections import deque
+
+DriverName='ata_worker'
+StopFile='STOP'
+
+DriverCode='''pro ata_worker, WorkerDir
+; worker of the aerocom-tool-automation software
+; runs the idl statements put into WorkerDir as <id>.job files and reports
+; the outcome in <id>.done; stops once the file STOP shows up
+; written by helpers/IDLWorkerPool.py; do not edit
+	while 1 do begin
+		JobFiles=file_search(WorkerDir+'/*.job', count=NumOfJobs)
+		if NumOfJobs gt 0 then begin
+			JobFile=(JobFiles[sort(JobFiles)])[0]
+			Base=strmid(JobFile,0,strlen(JobFile)-4)
+			Statement=''
+			openr,lun,JobFile,/get_lun
+			readf,lun,Statement
+			free_lun,lun
+			file_move,JobFile,Base+'.run'
+			Status=execute(Statement)
+			;files left open by a failed job
+			close,/all
+			;all output of the job has to be in the log before it is reported done
+			flush,-1
+			openw,lun,Base+'.tmp',/get_lun
+			printf,lun,Status
+			free_lun,lun
+			file_move,Base+'.tmp',Base+'.done'
+			file_delete,Base+'.run'
+		endif else begin
+			if file_test(WorkerDir+'/STOP') then break
+			wait,0.2
+		endelse
+	endwhile
+end
+'''
+
+def GetDriverCall(SpoolDir, WorkerDir):
+	"""idl statement (for the -e switch) starting the driver for WorkerDir"""
+	return "!path='"+SpoolDir+"'+path_sep(/search_path)+!path & "+DriverName+",'"+WorkerDir+"'"
+
+###################################################################################
+
+class IDLWorkerPool:
+	"""run idl statements in NumOfWorkers long running idl interpreters
+
+	Interpreter is the command starting idl (a list); -queue and the driver
+	call as -e argument are appended. The interpreters are started with
+	WorkDir as working directory. With RunLogDir, every job gets a runlog
+	there (see above). Each worker gets one job at a time, so the jobs are
+	run in the order they were submitted as workers become free.
+	A worker that dies is restarted; the job it was running is counted as
+	failed.
+
+	With a helpers.SlotManager.SlotManager, a job needs a cluster wide slot
+	before it is handed to a worker, and gives it back when it has finished.
+	With a helpers.Admission.AdmissionControl, a job is only handed out if
+	the host has enough free memory and cpu for its Cost (see Submit).
+	Until then no job is handed out; this is tried again after SlotPollTime
+	or the admission control's PollTime seconds.
+	"""
+
+	def __init__(self, NumOfWorkers, SpoolDir, Interpreter, WorkDir=None, RunLogDir=None, PollInterval=0.2,
+		SlotManager=None, SlotPollTime=10., Admission=None, VerboseFlag=False, DebugFlag=False):
+		self.NumOfWorkers=NumOfWorkers
+		self.SpoolDir=os.path.abspath(SpoolDir)
+		self.Interpreter=Interpreter
+		self.WorkDir=WorkDir
+		self.RunLogDir=RunLogDir
+		self.user=getpass.getuser()
+		self.PollInterval=PollInterval
+		self.SlotManager=SlotManager
+		self.SlotPollTime=SlotPollTime
+		self.Admission=Admission
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+
+		self.Queue=deque()
+		self.Finished=[]
+		self.Workers=[]
+		self.NumOfJobs=0
+
+	def Submit(self, Statement, OnDone=None, OnStart=None, Name=None, Cost=None):
+		"""queue an idl statement; returns the job dict
+
+		OnDone is called with the job dict once the job has finished,
+		OnStart when it is handed to a worker
+		Name is the start of the name of the job's runlog; defaults to the job id
+		Cost is the estimated memory use for the admission control
+		"""
+		Job={}
+		Job['Id']='{:06d}'.format(self.NumOfJobs)
+		Job['Statement']=Statement
+		Job['Name']=Name if Name is not None else 'job'+Job['Id']
+		Job['LogFile']=None
+		Job['LogOffset']=0
+		Job['Cost']=Cost
+		Job['Slot']=None
+		Job['OnDone']=OnDone
+		Job['OnStart']=OnStart
+		Job['Worker']=None
+		Job['Status']=None
+		Job['StartTime']=None
+		Job['EndTime']=None
+		self.NumOfJobs+=1
+		self.Queue.append(Job)
+		return Job
+
+	def Start(self):
+		"""write the driver and start the workers"""
+		os.makedirs(self.SpoolDir, exist_ok=True)
+		if self.RunLogDir is not None:
+			os.makedirs(self.RunLogDir, exist_ok=True)
+		with open(os.path.join(self.SpoolDir, DriverName+'.pro'), 'w') as OutHandle:
+			OutHandle.write(DriverCode)
+		for Index in range(self.NumOfWorkers):
+			Worker={}
+			Worker['Index']=Index
+			Worker['Dir']=os.path.join(self.SpoolDir, 'worker{:03d}'.format(Index))
+			Worker['Job']=None
+			Worker['Process']=None
+			os.makedirs(Worker['Dir'], exist_ok=True)
+			self._StartWorker(Worker)
+			self.Workers.append(Worker)
+
+	def _StartWorker(self, Worker):
+		Cmd=list(self.Interpreter)+['-queue', '-e', GetDriverCall(self.SpoolDir, Worker['Dir'])]
+		if self.VerboseFlag:
+			sys.stderr.write('Starting worker '+str(Worker['Index'])+': '+' '.join(Cmd)+'\n')
+		with open(Worker['Dir']+'.log', 'a') as LogHandle:
+			Worker['Process']=subprocess.Popen(Cmd, cwd=self.WorkDir, stdin=subprocess.DEVNULL,
+				stdout=LogHandle, stderr=subprocess.STDOUT)
+
+	def Run(self):
+		"""run the queued jobs and return once all of them have finished"""
+		if len(self.Workers) == 0:
+			self.Start()
+		#no job is handed out before this time
+		NextTry=0.
+		LastRenew=time.time()
+		while len(self.Queue) > 0 or any([x['Job'] is not None for x in self.Workers]):
+			for Worker in self.Workers:
+				if Worker['Job'] is not None:
+					self._CheckWorker(Worker)
+				if Worker['Job'] is None and len(self.Queue) > 0 and time.time() >= NextTry:
+					WaitTime=self._Admit(self.Queue[0])
+					if WaitTime is not None:
+						NextTry=time.time()+WaitTime
+						continue
+					self._Assign(Worker, self.Queue.popleft())
+			if self.SlotManager is not None and time.time()-LastRenew >= self.SlotManager.LeaseTime/3.:
+				self.SlotManager.Renew()
+				LastRenew=time.time()
+			time.sleep(self.PollInterval)
+
+		if self.DebugFlag:
+			pdb.set_trace()
+
+		return self.Finished
+
+	def NumBusy(self):
+		"""# of workers running a job"""
+		return len([x for x in self.Workers if x['Job'] is not None])
+
+	def _Admit(self, Job):
+		"""take what Job needs to be handed out
+
+		returns None if it can be handed out now, else the seconds to wait
+		before trying again
+		"""
+		if self.Admission is not None:
+			if not self.Admission.Admit(Job['Cost'], NumRunning=self.NumBusy()):
+				return self.Admission.PollTime
+		if self.SlotManager is not None:
+			Job['Slot']=self.SlotManager.Acquire(Job['Name'])
+			if Job['Slot'] is None:
+				if self.VerboseFlag:
+					sys.stderr.write('No free cluster wide idl slot: '+str(datetime.datetime.now())+'\n')
+				return self.SlotPollTime
+		return None
+
+	def _Assign(self, Worker, Job):
+		if Worker['Process'].poll() is not None:
+			self._StartWorker(Worker)
+		if self.VerboseFlag:
+			sys.stderr.write('Worker '+str(Worker['Index'])+': '+Job['Statement']+'\n')
+		if self.RunLogDir is not None:
+			#the output of the job starts at the current end of the worker log
+			Job['LogFile']=os.path.join(self.RunLogDir, Job['Name']+'_'+self.user+'_aerocom-tools.log')
+			Job['LogOffset']=os.path.getsize(Worker['Dir']+'.log')
+			with open(Job['LogFile'], 'w') as OutHandle:
+				OutHandle.write(time.strftime('%a %b %d %H:%M:%S %Z %Y')+'\n')
+				OutHandle.write('IDL> '+Job['Statement']+'\n')
+		JobFile=os.path.join(Worker['Dir'], Job['Id']+'.job')
+		#the worker must never see a partly written job file
+		with open(JobFile+'.tmp', 'w') as OutHandle:
+			OutHandle.write(Job['Statement']+'\n')
+		os.replace(JobFile+'.tmp', JobFile)
+		Job['Worker']=Worker['Index']
+		Job['StartTime']=time.time()
+		if self.Admission is not None:
+			self.Admission.Started(Job['Cost'])
+		Worker['Job']=Job
+		if Job['OnStart'] is not None:
+			Job['OnStart'](Job)
+
+	def _CheckWorker(self, Worker):
+		Job=Worker['Job']
+		DoneFile=os.path.join(Worker['Dir'], Job['Id']+'.done')
+		try:
+			with open(DoneFile) as InHandle:
+				Job['Status']=int(InHandle.read().strip())
+			os.remove(DoneFile)
+		except FileNotFoundError:
+			if Worker['Process'].poll() is None:
+				#still running
+				return
+			sys.stderr.write('Error: worker '+str(Worker['Index'])+' died with return code '+str(Worker['Process'].returncode)+' while running: '+Job['Statement']+'\n')
+			Job['Status']=0
+			for Extension in ['.job', '.run']:
+				try:
+					os.remove(os.path.join(Worker['Dir'], Job['Id']+Extension))
+				except FileNotFoundError:
+					pass
+		Worker['Job']=None
+		Job['EndTime']=time.time()
+		self._ReleaseSlot(Job)
+		if Job['LogFile'] is not None:
+			self._CopyLog(Worker, Job)
+		self.Finished.append(Job)
+		if Job['Status'] != 1:
+			sys.stderr.write('Error: job failed: '+Job['Statement']+'\n')
+		if self.VerboseFlag:
+			sys.stderr.write('Finished job '+Job['Id']+' after {:.0f}s'.format(Job['EndTime']-Job['StartTime'])+'\n')
+		if Job['OnDone'] is not None:
+			Job['OnDone'](Job)
+
+	def _ReleaseSlot(self, Job):
+		if Job['Slot'] is not None:
+			self.SlotManager.Release(Job['Slot'])
+			Job['Slot']=None
+
+	def _CopyLog(self, Worker, Job):
+		"""append the output of a finished job in the worker log to its runlog"""
+		with open(Worker['Dir']+'.log', 'rb') as InHandle, open(Job['LogFile'], 'ab') as OutHandle:
+			InHandle.seek(Job['LogOffset'])
+			while True:
+				Block=InHandle.read(1024*1024)
+				if len(Block) == 0:
+					break
+				OutHandle.write(Block)
+
+	def Stop(self, Timeout=60.):
+		"""tell the workers to stop and wait for them
+
+		workers still running after Timeout seconds are killed
+		"""
+		for Worker in self.Workers:
+			open(os.path.join(Worker['Dir'], StopFile), 'w').close()
+			#jobs still running when Run was interrupted
+			if Worker['Job'] is not None:
+				self._ReleaseSlot(Worker['Job'])
+		EndTime=time.time()+Timeout
+		for Worker in self.Workers:
+			try:
+				Worker['Process'].wait(timeout=max(0., EndTime-time.time()))
+			except subprocess.TimeoutExpired:
+				sys.stderr.write('Error: worker '+str(Worker['Index'])+' did not stop. Killing it.\n')
+				Worker['Process'].kill()
+				Worker['Process'].wait()
@@ -0,0 +1,86 @@
+################################################################
+# JobCost.py
+#
+# estimate the run time of the idl runs of the aerocom-tool-automation
+# software to start the longest ones first
+#
+# The runs are started in the order they were found (model, variable,
+# year). If the slowest variables come last, the whole run ends with
+# a long tail on a single cpu. Starting the longest runs first (LPT
+# scheduling) avoids that: the short ones then fill the gaps at the end.
+#
+# A run's duration is estimated from the durations of earlier runs
+# (see ATAStats.GetRunDurations and helpers.DurationDB) or, if there
+# are none, from the size of the model files it reads.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+
+GB=1024.**3
+#estimate without history: BaseSeconds+SecondsPerGB*<size of the model files in GB>
+DefaultBaseSeconds=120.
+DefaultSecondsPerGB=600.
+
+#where an estimate comes from
+HISTORY_MODEL='history:model'
+HISTORY_VAR='history:var'
+SIZE='size'
+
+class DurationHistory:
+	"""median durations of earlier runs by (model, variable) and by variable
+
+	made from the durations kept in a helpers.DurationDB.DurationDB with FromDB
+	"""
+
+	def __init__(self):
+		self.ByModelVar={}
+		self.ByVar={}
+
+	@classmethod
+	def FromDB(cls, DB):
+		"""history with the p50 durations from a helpers.DurationDB.DurationDB"""
+		History=cls()
+		Stats=DB.Percentiles(GroupBy=('Model', 'Var'))
+		History.ByModelVar={x:Stats[x]['P50'] for x in Stats if x[1] is not None}
+		Stats=DB.Percentiles(GroupBy=('Var',))
+		History.ByVar={x[0]:Stats[x]['P50'] for x in Stats if x[0] is not None}
+		return History
+
+	def __len__(self):
+		return len(self.ByModelVar)
+
+	def Get(self, Model, Var):
+		"""(duration, source) of the runs of Model and Var; (None, None) if there are none
+
+		runs of other models with the same variable are used if needed
+		"""
+		if (Model, Var) in self.ByModelVar:
+			return self.ByModelVar[(Model, Var)], HISTORY_MODEL
+		if Var in self.ByVar:
+			return self.ByVar[Var], HISTORY_VAR
+		return None, None
+
+###################################################################################
+
+def EstimateDuration(Model, Var, DataSize, History=None, BaseSeconds=DefaultBaseSeconds,
+	SecondsPerGB=DefaultSecondsPerGB):
+	"""(estimated duration in seconds, source of the estimate) of a run
+
+	DataSize is the size in bytes of the model files the run reads
+	"""
+	if History is not None:
+		Duration, Source=History.Get(Model, Var)
+		if Duration is not None:
+			return Duration, Source
+	return BaseSeconds+SecondsPerGB*DataSize/GB, SIZE
+
+def LongestFirst(Items, Cost):
+	"""Items sorted by Cost(Item), the biggest first; equal ones keep their order"""
+	return sorted(Items, key=Cost, reverse=True)
@@ -0,0 +1,129 @@
+################################################################
+# ModelInventory.py
+#
+# list a model directory once and answer the questions about
+# the variables, years and frequencies it contains from memory
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+
+from .AerocomFileName import ParseFileList
+
+class ModelInventory:
+	"""table of the data files of a model directory
+
+	The directory is read once with os.scandir and the file names are parsed
+	by helpers.AerocomFileName into a column wise table (see there for the
+	supported file naming conventions).
+	In addition to the parsed columns, the column ListVar holds the variable
+	name as returned by GetVars (None if the variable is not listed).
+	"""
+
+	#vertical codes of the aerocom3 convention whose variables are returned by GetVars
+	DataTypesToList=['surface','column','modellevel']
+
+	def __init__(self, ModelFolder, VerboseFlag=False, DebugFlag=False):
+		self.ModelFolder=ModelFolder
+		if not os.path.isdir(ModelFolder):
+			sys.stderr.write("Error: Model folder does not exist: \n")
+			sys.stderr.write(ModelFolder+"\n")
+			sys.stderr.write('Exiting.\n')
+			sys.exit(3)
+
+		with os.scandir(ModelFolder) as Entries:
+			#like glob('*.nc'): no hidden files
+			FileNames=[x.name for x in Entries if x.name.endswith('.nc') and not x.name.startswith('.')]
+		self.Table=ParseFileList(FileNames)
+		self.Table.ListVar=[self.ListName(x, y) for x, y in zip(self.Table.Var, self.Table.VertCode)]
+		#os.stat results of the files; only stat'ed when asked for
+		self.Stats={}
+
+		if VerboseFlag:
+			print(self.Table.File)
+		if DebugFlag:
+			pdb.set_trace()
+
+	@classmethod
+	def ListName(cls, Var, VertCode):
+		"""name of a variable as returned by GetVars; None if it is not listed"""
+		if VertCode is None:
+			return Var
+		# include vars for the surface
+		if VertCode.lower() in cls.DataTypesToList:
+			return Var
+		#also include 3d vars that provide station based data
+		#and contain the string vmr
+		#in this case the variable name has to slightly changed to the aerocom phase 2 naming
+		elif VertCode.lower() == 'modellevelatstations':
+			if 'vmr' in Var:
+				return Var.replace('vmr','vmr3d')
+		return None
+
+	def _Select(self, Variable=None, Year=None):
+		Conditions={}
+		if Year is not None:
+			Conditions['Year']=Year
+		if Variable is None:
+			return self.Table.Select(**Conditions)
+		#a variable can be given with its name in the file or the one from GetVars
+		Indices=self.Table.Select(Var=Variable, **Conditions)
+		Indices+=[x for x in self.Table.Select(ListVar=Variable, **Conditions) if self.Table.Var[x] != Variable]
+		return sorted(Indices)
+
+	def GetVars(self):
+		"""sorted list of the unique variables"""
+		return self.Table.Unique('ListVar')
+
+	def GetYears(self, Variable=None):
+		"""sorted list of the unique years; all variables if Variable is None"""
+		return self.Table.Unique('Year', self._Select(Variable))
+
+	def GetFrequencies(self, Variable=None):
+		"""sorted list of the unique time frequencies; all variables if Variable is None"""
+		return self.Table.Unique('Freq', self._Select(Variable))
+
+	def GetFiles(self, Variable=None, Year=None):
+		"""file names (without path) for a variable and/or a year"""
+		return self.Table.Values('File', self._Select(Variable, Year))
+
+	def _Stat(self, FileName):
+		#None if the file is gone
+		if FileName not in self.Stats:
+			try:
+				self.Stats[FileName]=os.stat(os.path.join(self.ModelFolder, FileName))
+			except OSError:
+				self.Stats[FileName]=None
+		return self.Stats[FileName]
+
+	def GetSize(self, Variable=None, Year=None):
+		"""total size in bytes of the files for a variable and/or a year
+
+		the files are stat'ed on the first request only
+		"""
+		RetVal=0
+		for FileName in self.GetFiles(Variable, Year):
+			Stat=self._Stat(FileName)
+			if Stat is not None:
+				RetVal+=Stat.st_size
+		return RetVal
+
+	def GetFileStats(self, Variable=None, Year=None):
+		"""list of (file name, size, modification time) of the files for a variable and/or a year
+
+		the files are stat'ed on the first request only
+		"""
+		RetVal=[]
+		for FileName in self.GetFiles(Variable, Year):
+			Stat=self._Stat(FileName)
+			if Stat is not None:
+				RetVal.append((FileName, Stat.st_size, Stat.st_mtime))
+		return RetVal
@@ -0,0 +1,31 @@
+################################################################
+# ReadIniFile.py
+#
+# read the parameters of the aerocom-tool-automation software
+# from an ini file (see constants.ini)
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import configparser
+
+def ReadFoldersToSearchIn(c_ConfigFile):
+	"""return the list of directories to search for model data in
+
+	These are given in the [folders] section:
+	[folders]
+	BASEDIR=/lustre/storeB/project/aerocom/
+	dir=${BASEDIR}aerocom-users-database/ECMWF/,
+	  ${BASEDIR}aerocom1/,
+	  ${BASEDIR}aerocom2/
+	${BASEDIR} is replaced with the string assigned to BASEDIR
+	"""
+	ReadConfig = configparser.ConfigParser()
+	ReadConfig.read(c_ConfigFile)
+	BaseDir=ReadConfig['folders']['BASEDIR']
+	return ReadConfig['folders']['dir'].replace('${BASEDIR}',BaseDir).replace('\n','').split(',')
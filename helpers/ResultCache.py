@@ -0,0 +1,125 @@
+################################################################
+# ResultCache.py
+#
+# content addressed cache of the successful idl runs of the
+# aerocom-tool-automation software, to skip the runs whose input
+# has not changed since their last success
+#
+# The key of a run is the sha1 hash of
+# - the content of its idl include file
+# - the names, sizes and modification times of the model files it reads
+# - the model, the model year and the obs year
+# - the revision of the aerocom-tools (see GetToolsRevision)
+# A success is recorded as the file <CacheDir>/<key[:2]>/<key>.json
+# holding some information about the run for humans.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import subprocess
+
+ResultsDirName='results'
+#files in the tool dir written by the aerocom-tool-automation itself
+GeneratedPrefixes=['aerocom_main_', 'IDL_includetemp_']
+
+def GetToolsRevision(ToolDir):
+	"""revision of the aerocom-tools in ToolDir
+
+	the git commit if ToolDir is a git work tree (with a hash of the changes if
+	there are uncommitted ones), else a hash of the names, sizes and modification
+	times of the idl files in ToolDir
+	"""
+	try:
+		Revision=subprocess.run(['git', '-C', ToolDir, 'rev-parse', 'HEAD'], stdout=subprocess.PIPE,
+			stderr=subprocess.DEVNULL, check=True, universal_newlines=True).stdout.strip()
+		Diff=subprocess.run(['git', '-C', ToolDir, 'diff', 'HEAD'], stdout=subprocess.PIPE,
+			stderr=subprocess.DEVNULL, check=True).stdout
+		if len(Diff) > 0:
+			Revision+='+'+hashlib.sha1(Diff).hexdigest()
+		return Revision
+	except (OSError, subprocess.CalledProcessError):
+		pass
+
+	Hash=hashlib.sha1()
+	with os.scandir(ToolDir) as Entries:
+		Files=sorted([x for x in Entries if x.name.endswith('.pro') and x.is_file()], key=lambda x: x.name)
+	for Entry in Files:
+		if any([Entry.name.startswith(x) for x in GeneratedPrefixes]):
+			continue
+		Stat=Entry.stat()
+		Hash.update('{} {} {}\n'.format(Entry.name, Stat.st_size, Stat.st_mtime).encode())
+	return 'files:'+Hash.hexdigest()
+
+def GetKey(IncludeContent, ModelFiles, Model, Year, ObsYear, ToolsRevision):
+	"""cache key of a run
+
+	IncludeContent: content of the include file (bytes)
+	ModelFiles: list of (file name, size, modification time) of the model files
+	"""
+	Hash=hashlib.sha1(IncludeContent)
+	Hash.update(json.dumps([sorted(ModelFiles), Model, Year, ObsYear, ToolsRevision]).encode())
+	return Hash.hexdigest()
+
+###################################################################################
+
+class ResultCache:
+	"""recorded successes of idl runs by their cache key"""
+
+	def __init__(self, CacheDir, ToolDir=None, VerboseFlag=False, DebugFlag=False):
+		self.CacheDir=CacheDir
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		self.ToolsRevision=None
+		if ToolDir is not None:
+			self.ToolsRevision=GetToolsRevision(ToolDir)
+			if VerboseFlag:
+				sys.stderr.write('aerocom-tools revision: '+self.ToolsRevision+'\n')
+		#include file contents by file name; many runs share an include file
+		self.IncludeContents={}
+		os.makedirs(CacheDir, exist_ok=True)
+
+	def _File(self, Key):
+		return os.path.join(self.CacheDir, Key[:2], Key+'.json')
+
+	def GetKey(self, IncludeFile, ModelFiles, Model, Year, ObsYear):
+		"""cache key of a run with the include file IncludeFile (see GetKey)"""
+		if IncludeFile not in self.IncludeContents:
+			with open(IncludeFile, 'rb') as InHandle:
+				self.IncludeContents[IncludeFile]=InHandle.read()
+		return GetKey(self.IncludeContents[IncludeFile], ModelFiles, Model, Year, ObsYear, self.ToolsRevision)
+
+	def Has(self, Key):
+		"""True if a success was recorded for Key"""
+		return os.path.isfile(self._File(Key))
+
+	def Get(self, Key):
+		"""the information recorded for Key; None if there is none"""
+		try:
+			with open(self._File(Key)) as InHandle:
+				return json.load(InHandle)
+		except (OSError, ValueError):
+			return None
+
+	def Add(self, Key, **Info):
+		"""record the success of the run with Key; Info is stored with it"""
+		Info['Time']=time.time()
+		Info['Host']=socket.gethostname()
+		CacheFile=self._File(Key)
+		os.makedirs(os.path.dirname(CacheFile), exist_ok=True)
+		#rename a temporary file so that a record is always complete
+		TmpFile=CacheFile+'.'+socket.gethostname()+'_'+str(os.getpid())+'.tmp'
+		with open(TmpFile, 'w') as OutHandle:
+			json.dump(Info, OutHandle)
+		os.replace(TmpFile, CacheFile)
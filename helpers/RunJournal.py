@@ -0,0 +1,100 @@
+################################################################
+# RunJournal.py
+#
+# durable journal of the idl runs of the aerocom-tool-automation
+# software, to resume a run after the program died
+#
+# Every run gets a directory <outputdir>/runs/<run id> with the job
+# manifest of the run (see WriteManifest in aerocom-tool-automation.py)
+# and the journal: a JSON line per state change of a manifest entry
+# (queued, started, succeeded, failed, unknown: finished, but whether
+# it was successful could not be told). Each line is synced to disk
+# before the program goes on, so the journal survives a node crash;
+# a line cut off by the crash is ignored when the journal is read.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import json
+import time
+import socket
+import datetime
+
+QUEUED='queued'
+STARTED='started'
+SUCCEEDED='succeeded'
+FAILED='failed'
+UNKNOWN='unknown'
+
+RunsDirName='runs'
+ManifestName='manifest.jsonl'
+JournalName='journal.jsonl'
+
+def NewRunId():
+	"""id for a new run: <host>_<date and time>_<pid>"""
+	return '_'.join([socket.gethostname(), datetime.datetime.now().strftime('%Y%m%d%H%M%S'), str(os.getpid())])
+
+def GetRunDir(OutputDir, RunId):
+	"""directory of a run; RunId can also be the path of the directory itself"""
+	if os.path.isdir(RunId):
+		return RunId
+	return os.path.join(OutputDir, RunsDirName, RunId)
+
+def ReadJournal(RunDir):
+	"""dict manifest entry index -> last journal record of that entry"""
+	RetVal={}
+	try:
+		with open(os.path.join(RunDir, JournalName)) as InHandle:
+			for Line in InHandle:
+				try:
+					Record=json.loads(Line)
+				except ValueError:
+					#cut off by a crash while writing
+					continue
+				RetVal[Record['Entry']]=Record
+	except FileNotFoundError:
+		pass
+	return RetVal
+
+###################################################################################
+
+class RunJournal:
+	"""append only journal of the manifest entries of a run"""
+
+	def __init__(self, RunDir, VerboseFlag=False, DebugFlag=False):
+		self.RunDir=RunDir
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		os.makedirs(RunDir, exist_ok=True)
+		self.Fd=os.open(os.path.join(RunDir, JournalName), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+	def Record(self, Indices, State, **Info):
+		"""note the new State of the entries Indices (an index or a list of them)
+
+		Info is added to the records (e.g. Reason='...')
+		"""
+		if isinstance(Indices, int):
+			Indices=[Indices]
+		Lines=[]
+		for Index in Indices:
+			Record={'Time':time.time(), 'Entry':Index, 'State':State}
+			Record.update(Info)
+			Lines.append(json.dumps(Record)+'\n')
+		if len(Lines) == 0:
+			return
+		#one write and one sync for all of them
+		os.write(self.Fd, ''.join(Lines).encode())
+		os.fsync(self.Fd)
+		if self.VerboseFlag and State in [SUCCEEDED, FAILED, UNKNOWN]:
+			sys.stderr.write('journal: entry '+', '.join([str(x) for x in Indices])+' '+State+'\n')
+
+	def Close(self):
+		os.close(self.Fd)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+################################################################
+# SlotManager.py
+#
+# cluster wide limit for the # of idl runs of the aerocom-tool-automation
+# software, using lease files in a directory shared by all hosts
+# (e.g. on lustre)
+#
+# Slot i is taken when the file slot_<i>.lease exists in the slot
+# directory. A lease is created by writing a temporary file and
+# hard linking it to the lease name; the link fails if the lease
+# exists already, so only one host can get a slot (this works
+# on NFS and lustre, unlike most locking calls).
+# A lease holds the host, pid, user and job name of its owner and
+# is renewed (its mtime set) regularly by the owner. A lease is stale
+# and gets removed by the next one looking for a slot when
+# - it has not been renewed for LeaseTime seconds or
+# - it belongs to a process on this host that does not exist anymore
+# A stale lease is moved aside before it is removed, and put back if it
+# turns out to be a fresh one taken in the mean time. If the slot was
+# taken by a third host before that, the fresh lease is lost: its owner
+# notices that when it renews or releases the lease (the lease file then
+# holds another Id) and drops it without touching the other one. Until
+# then the slot is used twice.
+#
+# When run as a program, the leases of a slot directory are listed.
+#
+# This program is part of the aerocom-tool-automation software
+#
+#################################################################
+# Created 20261018 for Met Norway
+#
+# Last changed: See git log
+#################################################################
+
+import pdb
+import os
+import sys
+import json
+import time
+import socket
+import getpass
+import argparse
+
+LeasePrefix='slot_'
+LeaseSuffix='.lease'
+DefaultLeaseTime=900.
+
+class SlotManager:
+	"""hand out at most MaxGlobal slots in total and MaxPerHost per host
+
+	Acquire() returns the name of the lease file or None if no slot is
+	free; Release() gives it back. Renew() has to be called more often
+	than every LeaseTime seconds while slots are held.
+	"""
+
+	def __init__(self, SlotDir, MaxGlobal, MaxPerHost=None, LeaseTime=DefaultLeaseTime,
+		VerboseFlag=False, DebugFlag=False):
+		self.SlotDir=SlotDir
+		self.MaxGlobal=MaxGlobal
+		self.MaxPerHost=MaxPerHost
+		self.LeaseTime=LeaseTime
+		self.VerboseFlag=VerboseFlag
+		self.DebugFlag=DebugFlag
+		self.Host=socket.gethostname()
+		self.Pid=os.getpid()
+		self.User=getpass.getuser()
+		#leases held by this process: lease file -> Id
+		self.Held={}
+		os.makedirs(SlotDir, exist_ok=True)
+
+	def _LeaseFile(self, Index):
+		return os.path.join(self.SlotDir, LeasePrefix+str(Index)+LeaseSuffix)
+
+	def ReadLeases(self):
+		"""dict with the contents of all leases (lease file name as key)
+
+		the keys Age (seconds since the last renewal) and Stale are added
+		"""
+		RetVal={}
+		Now=time.time()
+		for FileName in os.listdir(self.SlotDir):
+			if not (FileName.startswith(LeasePrefix) and FileName.endswith(LeaseSuffix)):
+				continue
+			LeaseFile=os.path.join(self.SlotDir, FileName)
+			try:
+				with open(LeaseFile) as InHandle:
+					Lease=json.load(InHandle)
+				Lease['Age']=Now-os.stat(LeaseFile).st_mtime
+			except (OSError, ValueError):
+				#removed in the mean time or broken
+				continue
+			Lease['Stale']=self._IsStale(Lease)
+			RetVal[LeaseFile]=Lease
+		return RetVal
+
+	def _IsStale(self, Lease):
+		if Lease['Age'] > self.LeaseTime:
+			return True
+		if Lease.get('Host') == self.Host:
+			try:
+				os.kill(Lease['Pid'], 0)
+			except ProcessLookupError:
+				return True
+			except (PermissionError, KeyError, TypeError):
+				pass
+		return False
+
+	def _IsOwn(self, LeaseFile):
+		#True if LeaseFile still holds our lease (see _RemoveStale)
+		try:
+			with open(LeaseFile) as InHandle:
+				return json.load(InHandle).get('Id') == self.Held.get(LeaseFile)
+		except (OSError, ValueError):
+			#removed or being written by someone else
+			return False
+
+	def _RemoveStale(self, LeaseFile, Lease):
+		#move the lease out of the way first, so that it can be checked that
+		#it is still the stale one and not one that was just taken by someone else
+		StaleFile=LeaseFile+'.stale.'+self.Host+'.'+str(self.Pid)
+		try:
+			os.rename(LeaseFile, StaleFile)
+		except FileNotFoundError:
+			return
+		try:
+			with open(StaleFile) as InHandle:
+				Moved=json.load(InHandle)
+		except (OSError, ValueError):
+			Moved=None
+		if Moved is not None and Moved.get('Id') != Lease.get('Id'):
+			#taken again in the mean time: put it back if the slot is still free
+			try:
+				os.link(StaleFile, LeaseFile)
+			except FileExistsError:
+				#a third one has taken the slot; keep that lease, the owner of the
+				#moved one finds out when renewing it
+				sys.stderr.write('Warning: lease '+LeaseFile+' of '+str(Moved.get('User'))+'@'+str(Moved.get('Host'))
+					+' was lost while removing a stale lease\n')
+		elif self.VerboseFlag:
+			sys.stderr.write('Removed stale lease '+LeaseFile+' of '+str(Lease.get('User'))+'@'+str(Lease.get('Host'))+'\n')
+		os.remove(StaleFile)
+
+	def Acquire(self, JobName=''):
+		"""take a free slot for JobName; returns the lease file or None"""
+		Leases=self.ReadLeases()
+		for LeaseFile in list(Leases):
+			if Leases[LeaseFile]['Stale']:
+				self._RemoveStale(LeaseFile, Leases[LeaseFile])
+				del Leases[LeaseFile]
+		if len(Leases) >= self.MaxGlobal:
+			return None
+		if self.MaxPerHost is not None:
+			if len([x for x in Leases.values() if x.get('Host') == self.Host]) >= self.MaxPerHost:
+				return None
+
+		Lease={}
+		Lease['Host']=self.Host
+		Lease['Pid']=self.Pid
+		Lease['User']=self.User
+		Lease['Job']=JobName
+		Lease['Start']=time.time()
+		Lease['Id']='_'.join([self.Host, str(self.Pid), str(time.time())])
+		TmpFile=os.path.join(self.SlotDir, '.'+Lease['Id']+'.tmp')
+		with open(TmpFile, 'w') as OutHandle:
+			json.dump(Lease, OutHandle)
+		try:
+			for Index in range(self.MaxGlobal):
+				LeaseFile=self._LeaseFile(Index)
+				if LeaseFile in Leases:
+					continue
+				try:
+					os.link(TmpFile, LeaseFile)
+				except FileExistsError:
+					#someone else was faster
+					continue
+				self.Held[LeaseFile]=Lease['Id']
+				if self.VerboseFlag:
+					sys.stderr.write('Got slot '+LeaseFile+' for '+JobName+'\n')
+				return LeaseFile
+		finally:
+			os.remove(TmpFile)
+		return None
+
+	def Release(self, LeaseFile):
+		"""give back a slot taken with Acquire()"""
+		if not self._IsOwn(LeaseFile):
+			sys.stderr.write('Warning: lease '+LeaseFile+' was removed or taken over by someone else\n')
+		else:
+			try:
+				os.remove(LeaseFile)
+			except FileNotFoundError:
+				sys.stderr.write('Warning: lease '+LeaseFile+' was removed by someone else\n')
+		self.Held.pop(LeaseFile, None)
+
+	def Renew(self):
+		"""renew the leases held by this process"""
+		for LeaseFile in list(self.Held):
+			if not self._IsOwn(LeaseFile):
+				sys.stderr.write('Warning: lease '+LeaseFile+' was removed or taken over by someone else\n')
+				self.Held.pop(LeaseFile, None)
+				continue
+			try:
+				os.utime(LeaseFile)
+			except FileNotFoundError:
+				sys.stderr.write('Warning: lease '+LeaseFile+' was removed by someone else\n')
+				self.Held.pop(LeaseFile, None)
+
+	def ReleaseAll(self):
+		"""give back all slots held by this process"""
+		for LeaseFile in list(self.Held):
+			self.Release(LeaseFile)
+
+###################################################################################
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='list the idl slots taken in a slot directory of the aerocom-tool-automation software\n\n')
+	parser.add_argument("slotdir", help="slot directory")
+	parser.add_argument("--leasetime", help="seconds after which a lease that has not been renewed is stale. Default is {:.0f}.".format(DefaultLeaseTime), type=float, default=DefaultLeaseTime)
+	parser.add_argument("--cleanup", help="remove the stale leases", action='store_true')
+	args = parser.parse_args()
+
+	if not os.path.isdir(args.slotdir):
+		sys.stderr.write('Error: slot directory '+args.slotdir+' does not exist.\n')
+		sys.exit(1)
+
+	Manager=SlotManager(args.slotdir, 0, LeaseTime=args.leasetime)
+	Leases=Manager.ReadLeases()
+	sys.stdout.write('{:20s} {:20s} {:>8s} {:>10s} {:>10s} {:6s} {}\n'.format('slot', 'host', 'pid', 'user', 'age [s]', 'stale', 'job'))
+	for LeaseFile in sorted(Leases):
+		Lease=Leases[LeaseFile]
+		sys.stdout.write('{:20s} {:20s} {:>8s} {:>10s} {:10.0f} {:6s} {}\n'.format(os.path.basename(LeaseFile),
+			str(Lease.get('Host')), str(Lease.get('Pid')), str(Lease.get('User')), Lease['Age'], str(Lease['Stale']), str(Lease.get('Job'))))
+	Hosts={}
+	for Lease in Leases.values():
+		Hosts[Lease.get('Host')]=Hosts.get(Lease.get('Host'), 0)+1
+	sys.stdout.write(str(len(Leases))+' slot(s) taken; '+', '.join([str(x)+': '+str(Hosts[x]) for x in sorted(Hosts, key=str)])+'\n')
+
+	if args.cleanup:
+		for LeaseFile in Leases:
+			if Leases[LeaseFile]['Stale']:
+				Manager._RemoveStale(LeaseFile, Leases[LeaseFile])
@@ -2,7 +2,12 @@
 # Taskinfo.py
 #
 # imitate ps -ef | grep <progname> using the psutil package
-# 
+#
+# TaskPids and TaskCounter are cheaper ways to get the pids of
+# the processes of a user with a given name: they read /proc
+# directly, check the owner first and read the name only for the
+# processes of that user.
+#
 # This program is part of the aerocom-tool-automation software
 #
 #################################################################
@@ -11,16 +16,29 @@
 # Last changed: See git log
 #################################################################
 
+import pdb
+import os
+import re
+import time
+import functools
+
+@functools.lru_cache(maxsize=64)
+def CompileRegexp(Pattern, Flags=0):
+	"""re.compile with a cache; the patterns used here are the same on every call"""
+	return re.compile(Pattern, Flags)
+
+###################################################################################
+
 def Taskinfo(Name, user=False, PrintInfo=False, RetNumber=False, VerboseFlag=False, DebugFlag=False):
 	"""imitate ps -ef | grep <progname> using the psutil package
 	"""
-	import psutil, re
+	import psutil
 
 	RetVal=[]
 
-	Regexp = re.compile(Name, re.IGNORECASE)
+	Regexp = CompileRegexp(Name, re.IGNORECASE)
 	if user is not False:
-		UserRegexp = re.compile(user)
+		UserRegexp = CompileRegexp(user)
 	for proc in psutil.process_iter():
 		try:
 			pinfo = proc.as_dict(attrs=['pid', 'name', 'cmdline','username'])
@@ -47,3 +65,112 @@ def Taskinfo(Name, user=False, PrintInfo=False, RetNumber=False, VerboseFlag=Fal
 		return len(RetVal)
 
 	return RetVal
+
+###################################################################################
+
+def GetUid(user):
+	"""uid of a user name; None stays None"""
+	import pwd
+
+	if user is None or isinstance(user, int):
+		return user
+	return pwd.getpwnam(user).pw_uid
+
+def _ReadName(ProcDir, Pid):
+	#the process name as in /proc/<pid>/comm (at most 15 characters)
+	#None if the process is gone
+	try:
+		with open(os.path.join(ProcDir, Pid, 'comm'), 'rb') as InHandle:
+			return InHandle.read().decode('utf-8', 'replace').rstrip('\n')
+	except OSError:
+		return None
+
+def TaskPids(Name, user=None, ProcDir='/proc'):
+	"""pids of the processes of user whose name matches the regexp Name
+
+	Like Taskinfo, Name is matched case insensitive, but user is the exact
+	user name (or uid) here; None means all users.
+	Just the owner of each process is checked (one stat), the name is
+	only read for the processes of the user.
+	Note that the kernel cuts process names to 15 characters.
+	"""
+	Regexp=CompileRegexp(Name, re.IGNORECASE)
+	Uid=GetUid(user)
+	RetVal=[]
+	for Pid in os.listdir(ProcDir):
+		if not Pid.isdigit():
+			continue
+		if Uid is not None:
+			try:
+				if os.stat(os.path.join(ProcDir, Pid)).st_uid != Uid:
+					continue
+			except OSError:
+				continue
+		ProcName=_ReadName(ProcDir, Pid)
+		if ProcName is not None and Regexp.match(ProcName):
+			RetVal.append(int(Pid))
+	return RetVal
+
+###################################################################################
+
+class TaskCounter:
+	"""incremental version of TaskPids for repeated calls
+
+	The pids owned by other users are remembered between calls and not
+	looked at again; only new pids are checked. The owner and the name
+	of the user's own processes are read on every call, since the name
+	changes when a process execs another program.
+	A pid of another user that is reused by a new process of the user
+	between two calls would be missed, so everything is checked again
+	after MaxAge seconds.
+	"""
+
+	def __init__(self, Name, user=None, ProcDir='/proc', MaxAge=60.):
+		self.Regexp=CompileRegexp(Name, re.IGNORECASE)
+		self.Uid=GetUid(user)
+		self.ProcDir=ProcDir
+		self.MaxAge=MaxAge
+		self.Foreign=set()
+		self.Own=set()
+		self.LastReset=time.time()
+
+	def Pids(self):
+		"""pids of the processes of the user whose name matches"""
+		if time.time()-self.LastReset > self.MaxAge:
+			self.Foreign=set()
+			self.Own=set()
+			self.LastReset=time.time()
+
+		Current=set([x for x in os.listdir(self.ProcDir) if x.isdigit()])
+		self.Foreign&=Current
+		self.Own&=Current
+		New=Current-self.Foreign-self.Own
+		for Pid in New:
+			if self.Uid is not None:
+				try:
+					if os.stat(os.path.join(self.ProcDir, Pid)).st_uid != self.Uid:
+						self.Foreign.add(Pid)
+						continue
+				except OSError:
+					continue
+			self.Own.add(Pid)
+
+		RetVal=[]
+		for Pid in list(self.Own):
+			if Pid not in New and self.Uid is not None:
+				#the pid might have been reused by a process of another user
+				try:
+					if os.stat(os.path.join(self.ProcDir, Pid)).st_uid != self.Uid:
+						self.Own.discard(Pid)
+						self.Foreign.add(Pid)
+						continue
+				except OSError:
+					continue
+			ProcName=_ReadName(self.ProcDir, Pid)
+			if ProcName is not None and self.Regexp.match(ProcName):
+				RetVal.append(int(Pid))
+		return sorted(RetVal)
+
+	def Count(self):
+		"""# of processes of the user whose name matches"""
+		return len(self.Pids())
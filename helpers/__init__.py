@@ -1,2 +1,15 @@
 from .Taskinfo import *
-#from .ReadIniFile import *
+from .IDLScheduler import *
+from .AerocomFileName import *
+from .ModelInventory import *
+from .ReadIniFile import *
+from .DirWalker import *
+from .FileWriter import *
+from .IDLSession import *
+from .IDLWorkerPool import *
+from .SlotManager import *
+from .Admission import *
+from .JobCost import *
+from .DurationDB import *
+from .RunJournal import *
+from .ResultCache import *
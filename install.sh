@@ -17,6 +17,7 @@ ln -sf ${CurrentDir}/ModAerocomMain/ModAerocomMain.py ModAerocomMain.py
 ln -sf ${CurrentDir}/folders.ini folders.ini
 ln -sf ${CurrentDir}/aerocom-tool-automation.py aerocom-tool-automation.py
 ln -sf ${CurrentDir}/ATAStats/ATAStats.py ATAStats.py
+ln -sf ${CurrentDir}/helpers/SlotManager.py SlotManager.py
 
 IFS=$SAVEIFS
 